@@ -0,0 +1,38 @@
+"""
+Configuración de gunicorn para producción
+Workers uvicorn con la app precargada en el maestro y el heap congelado antes de cada fork,
+para que los workers compartan (copy-on-write) los módulos, rutas y modelos importados.
+
+Uso (desde backend/, gunicorn lee este archivo automáticamente):
+    gunicorn server:app
+
+Variables: GUNICORN_BIND (0.0.0.0:8001), WEB_CONCURRENCY (2 workers)
+"""
+import gc
+import os
+
+# Lo primero: el maestro no recolecta mientras importa la app, así no deja huecos
+# en las páginas que heredan los workers
+gc.disable()
+
+from services.gc_monitor import enable_after_fork, freeze_before_fork  # noqa: E402
+from services.logging_config import setup_logging, shutdown_logging  # noqa: E402
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8001")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Importar server:app en el maestro (sin preload cada worker importa su copia)
+preload_app = True
+
+
+def pre_fork(server, worker):
+    frozen = freeze_before_fork()
+    server.log.info("gc.freeze() antes del fork: %d objetos", frozen)
+
+
+def post_fork(server, worker):
+    enable_after_fork()
+    # El hilo del QueueListener del maestro no existe en el worker: se vuelve a crear
+    shutdown_logging()
+    setup_logging()
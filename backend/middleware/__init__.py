@@ -1,5 +1,7 @@
 """
 Middleware del backend
 """
+from .tracing import TracingMiddleware
+from .request_context import RequestContextMiddleware
 
-__all__ = []
+__all__ = ['TracingMiddleware', 'RequestContextMiddleware']
@@ -0,0 +1,98 @@
+"""
+Middleware de contexto de request
+Asigna un request id, lo expone en la respuesta y registra un log de acceso muestreado
+"""
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from services.logging_config import request_id_var
+
+# Cargar variables de entorno
+load_dotenv()
+
+REQUEST_ID_HEADER = "x-request-id"
+
+logger = logging.getLogger("qa_master_path.access")
+
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    """
+    Interpretar LOG_SAMPLE_RATES: "/api/progress/subtask=0.05,/api/progress/module=0.1"
+    """
+    rates = {}
+    for item in raw.split(","):
+        path, _, rate = item.strip().partition("=")
+        if path and rate:
+            rates[path] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+# Rutas de alto volumen: solo se registra una fracción de los requests exitosos
+LOG_SAMPLE_RATES = _parse_sample_rates(
+    os.getenv("LOG_SAMPLE_RATES", "/api/progress/subtask=0.1,/api/progress/module=0.1")
+)
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que fija el request id del contexto y registra el acceso
+
+    Los errores (status >= 400) se registran siempre; el resto se muestrea
+    según LOG_SAMPLE_RATES usando la plantilla de ruta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER.encode("latin-1"):
+                request_id = value.decode("latin-1")[:128]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else scope["path"]
+            sample_rate = LOG_SAMPLE_RATES.get(path, 1.0)
+
+            if status_code >= 400 or sample_rate >= 1.0 or random.random() < sample_rate:
+                logger.info(
+                    "%s %s %s", scope["method"], scope["path"], status_code,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": path,
+                        "status": status_code,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                        "sample_rate": sample_rate,
+                    }
+                )
+            request_id_var.reset(token)
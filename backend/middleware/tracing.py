@@ -0,0 +1,59 @@
+"""
+Middleware de trazas
+Crea un span por request y propaga el contexto W3C (traceparent) entrante
+"""
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from services import tracing
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que envuelve cada request HTTP en un span de servidor
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracing.is_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        context = propagate.extract(carrier)
+        method = scope["method"]
+
+        with tracing.tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=context,
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.method": method,
+                "http.target": scope["path"],
+            },
+        ) as span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # FastAPI deja la ruta resuelta en el scope tras el enrutado
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
+
+                user_id = scope.get("path_params", {}).get("user_id")
+                if user_id:
+                    span.set_attribute("enduser.id", user_id)
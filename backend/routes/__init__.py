@@ -3,5 +3,11 @@ Rutas del backend
 """
 from .user import router as user_router
 from .progress import router as progress_router
+from .diagnostics import router as diagnostics_router
+from .docs import router as docs_router
+from .search import router as search_router
+from .content import router as content_router
+from .views import router as views_router
+from .ws import router as ws_router
 
-__all__ = ['user_router', 'progress_router']
+__all__ = ['user_router', 'progress_router', 'diagnostics_router', 'docs_router', 'search_router', 'content_router', 'views_router', 'ws_router']
@@ -0,0 +1,77 @@
+"""
+Rutas de Contenido
+Bundle versionado con todo el contenido del curso para cachear en el cliente
+"""
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from typing import Optional
+
+from services.content_bundle import get_bundle, ContentBundle
+from utils.static_files import accepted_encodings
+
+router = APIRouter()
+
+# La URL con ?v=<hash> nunca cambia de contenido
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _require_bundle() -> ContentBundle:
+    bundle = get_bundle()
+    if bundle is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El contenido aún no está cargado"
+        )
+    return bundle
+
+
+@router.get("/version")
+async def get_content_version():
+    """
+    Versión actual del bundle (sonda ligera para decidir si descargarlo)
+    
+    Returns:
+        Hash del contenido, URL versionada y tamaños
+    """
+    bundle = _require_bundle()
+    
+    return JSONResponse(
+        content={
+            "success": True,
+            **bundle.to_dict()
+        },
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/bundle")
+async def get_content_bundle(
+    v: Optional[str] = Query(None, description="Versión esperada del bundle"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Bundle con modules.json, manifest.json y todos los docs renderizados
+    
+    Returns:
+        JSON precomprimido (gzip si el cliente lo acepta); 304 si el ETag coincide
+    """
+    bundle = _require_bundle()
+    
+    headers = {"ETag": bundle.etag, "Vary": "Accept-Encoding"}
+    if v == bundle.version:
+        headers["Cache-Control"] = IMMUTABLE_CACHE
+    else:
+        # Sin versión (o una versión vieja) se sirve el actual y se revalida siempre
+        headers["Cache-Control"] = "no-cache"
+        headers["Content-Location"] = bundle.url
+    
+    if if_none_match and bundle.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    body = bundle.raw
+    if "gzip" in accepted_encodings(accept_encoding):
+        body = bundle.gzip
+        headers["Content-Encoding"] = "gzip"
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,107 @@
+"""
+Rutas de Diagnóstico
+Métricas internas del proceso para detectar problemas de rendimiento
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+
+from services.loop_monitor import loop_monitor
+from services.gc_monitor import gc_monitor
+from services.memory_diagnostics import memory_diagnostics, MEMORY_DIAGNOSTICS_ENABLED
+
+router = APIRouter()
+
+
+def _require_memory_diagnostics():
+    """Las rutas de memoria solo existen si se habilitan explícitamente"""
+    if not MEMORY_DIAGNOSTICS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Diagnóstico de memoria deshabilitado"
+        )
+
+
+@router.get("/loop")
+async def get_loop_metrics():
+    """
+    Obtener el histograma de lag del event loop
+    
+    Returns:
+        Histograma de lag y número de bloqueos detectados
+    """
+    return {
+        "success": True,
+        "loop": loop_monitor.snapshot()
+    }
+
+
+@router.get("/gc")
+async def get_gc_metrics():
+    """
+    Obtener colecciones y pausas del GC por generación
+    
+    Returns:
+        Contadores y histograma de pausas por generación
+    """
+    return {
+        "success": True,
+        "gc": gc_monitor.snapshot()
+    }
+
+
+@router.get("/memory")
+async def get_memory_summary(limit: int = Query(25, ge=1, le=200)):
+    """
+    Obtener RSS, memoria rastreada, objetos por tipo y tamaños de caché
+    
+    Returns:
+        Resumen de memoria del proceso
+    """
+    _require_memory_diagnostics()
+    
+    # gc.get_objects() recorre todo el heap: fuera del event loop
+    summary = await run_in_threadpool(memory_diagnostics.summary, limit)
+    
+    return {
+        "success": True,
+        "memory": summary
+    }
+
+
+@router.post("/memory/snapshot")
+async def take_memory_snapshot(
+    compare_to: str = Query("previous", pattern="^(previous|baseline)$"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    Tomar un snapshot de tracemalloc y compararlo con el anterior o con la base
+    
+    Returns:
+        Sitios de asignación con mayor crecimiento
+    """
+    _require_memory_diagnostics()
+    
+    diff = await run_in_threadpool(memory_diagnostics.take_snapshot, compare_to, limit)
+    
+    return {
+        "success": True,
+        "snapshot": diff
+    }
+
+
+@router.delete("/memory/snapshot")
+async def reset_memory_snapshots():
+    """
+    Descartar los snapshots guardados (el siguiente será la nueva base)
+    
+    Returns:
+        Confirmación
+    """
+    _require_memory_diagnostics()
+    
+    memory_diagnostics.reset()
+    
+    return {
+        "success": True,
+        "message": "Snapshots descartados"
+    }
@@ -0,0 +1,41 @@
+"""
+Rutas de Documentación
+Documentos de la base de conocimiento renderizados en el servidor
+"""
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from fastapi.responses import JSONResponse
+from typing import Optional
+
+from services.docs_renderer import docs_cache
+
+router = APIRouter()
+
+
+@router.get("/{doc_id}")
+async def get_doc(doc_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Obtener un documento renderizado a HTML con su tabla de contenidos
+    
+    Returns:
+        HTML, TOC y metadatos del manifest (304 si el ETag coincide)
+    """
+    doc = docs_cache.get(doc_id)
+    if doc is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento no encontrado"
+        )
+    
+    etag = f'"{doc.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return JSONResponse(
+        content={
+            "success": True,
+            "doc": doc.to_dict()
+        },
+        headers=headers
+    )
@@ -2,16 +2,39 @@
 Rutas de Progreso (SIN AUTENTICACIÓN)
 Endpoints públicos para gestión de progreso del usuario en el curso
 """
-from fastapi import APIRouter, HTTPException, status
+import logging
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
 from datetime import datetime
 from bson import ObjectId
 
 from services.database import get_database
-from utils.validators import validate_module_id, validate_badge_name, validate_xp_amount
+from services.catalog import get_catalog
+from services.progress_store import (
+    empty_progress, module_update, subtask_update, replace_fields,
+    to_api, decode_modules, decode_subtasks, count_completed, bump_version, version_filter,
+    API_FIELDS, VERSION_FIELD
+)
+from services.idempotency import idempotent
+from services.progress_hub import broadcast
+from services.progress_merge import CLOCKS_FIELD, RESET_AT_FIELD, clock_field, merge_ops, normalize_timestamp
+from services.notes_store import (
+    get_note, get_notes, save_note, delete_note, replace_notes, delete_user_notes, prepare_patch, write_patch, search_notes,
+    NOTE_MAX_LENGTH
+)
+from utils.projection import InvalidFieldsError, parse_fields, mongo_projection, prefixed, trim
+from utils.text_patch import PatchError, text_hash, utf16_length
+from utils.json_response import FastJSONResponse
+from utils.msgpack_route import MsgPackRoute
+from utils.validators import validate_module_id, validate_subtask_index, validate_badge_name, validate_xp_amount
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
+
+logger = logging.getLogger(__name__)
 
 
 # Request Models
@@ -20,6 +43,7 @@ class ModuleProgressUpdate(BaseModel):
     user_id: str = Field(..., description="ID del usuario")
     module_id: str = Field(..., description="ID del módulo (ej: '1', '2', '3')")
     is_completed: bool = Field(..., description="Estado de completitud")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
 
 
 class SubtaskProgressUpdate(BaseModel):
@@ -28,19 +52,38 @@ class SubtaskProgressUpdate(BaseModel):
     module_id: str = Field(..., description="ID del módulo")
     task_index: int = Field(..., ge=0, description="Índice de la tarea")
     is_completed: bool = Field(..., description="Estado de completitud")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
 
 
 class NoteUpdate(BaseModel):
     """Actualización de nota de módulo"""
     user_id: str = Field(..., description="ID del usuario")
     module_id: str = Field(..., description="ID del módulo")
-    note_text: str = Field(..., max_length=10000, description="Texto de la nota")
+    note_text: str = Field(..., max_length=NOTE_MAX_LENGTH, description="Texto de la nota")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
+
+
+class NotePatchOp(BaseModel):
+    """Reemplazo de un rango del texto base"""
+    start: int = Field(..., ge=0, description="Inicio del rango (unidades UTF-16 del texto base, como en JavaScript)")
+    end: int = Field(..., ge=0, description="Fin del rango, exclusivo (unidades UTF-16)")
+    text: str = Field("", max_length=NOTE_MAX_LENGTH, description="Texto que reemplaza al rango")
+
+
+class NotePatch(BaseModel):
+    """Parche de nota contra una revisión"""
+    user_id: str = Field(..., description="ID del usuario")
+    module_id: str = Field(..., description="ID del módulo")
+    base_hash: str = Field(..., description="Revisión (hash) del texto sobre el que se editó")
+    ops: List[NotePatchOp] = Field(..., max_length=500, description="Reemplazos ordenados y sin solaparse")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
 
 
 class BadgeAdd(BaseModel):
     """Agregar badge"""
     user_id: str = Field(..., description="ID del usuario")
     badge_name: str = Field(..., description="Nombre del badge")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
 
 
 class XPAdd(BaseModel):
@@ -48,6 +91,7 @@ class XPAdd(BaseModel):
     user_id: str = Field(..., description="ID del usuario")
     amount: int = Field(..., ge=1, le=1000, description="Cantidad de XP a agregar")
     reason: Optional[str] = Field(None, description="Razón del XP")
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
 
 
 class ProgressSync(BaseModel):
@@ -58,21 +102,248 @@ class ProgressSync(BaseModel):
     notes: Optional[Dict[str, str]] = None
     badges: Optional[List[str]] = None
     xp: Optional[int] = Field(None, ge=0)
+    expected_version: Optional[int] = Field(None, ge=0, description="Versión del progreso esperada (alternativa a If-Match)")
+
+
+class ProgressOp(BaseModel):
+    """Operación del registro offline del cliente"""
+    type: str = Field(..., pattern="^(module|subtask|note|badge|xp)$", description="Tipo de operación")
+    key: Optional[str] = Field(None, description="Módulo, subtarea ('1-0'), módulo de la nota o badge")
+    value: Optional[Union[bool, str]] = Field(None, description="Completado (module/subtask) o texto (note)")
+    amount: Optional[int] = Field(None, description="XP a sumar (xp)")
+    ts: datetime = Field(..., description="Hora de la operación en el cliente")
+
+
+class ProgressReplay(BaseModel):
+    """Registro de operaciones acumulado sin conexión"""
+    user_id: str = Field(..., description="ID del usuario")
+    ops: List[ProgressOp] = Field(..., max_length=1000, description="Operaciones con su hora")
+
+
+# Intentos de la fusión si otra escritura cambia la versión entre la lectura y el update
+REPLAY_MAX_ATTEMPTS = 3
+
+NOTE_CHANGED_DETAIL = "La nota cambió desde esa revisión: envía el texto completo"
+
+
+def _expected_version(if_match: Optional[str], expected_version: Optional[int]) -> Optional[int]:
+    """
+    Versión esperada de una escritura: cabecera If-Match ("3" o W/"3") o expected_version del body
+    """
+    if if_match is None or if_match.strip() == "*":
+        return expected_version
+    
+    tag = if_match.strip()
+    tag = tag[2:] if tag.startswith("W/") else tag
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match inválido: se espera la versión del progreso"
+        )
+
+
+def _validate_subtask_key(subtask_key: str) -> tuple[bool, Optional[str]]:
+    """
+    Validar una clave de subtarea con la forma "<módulo>-<índice>"
+    
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    module_id, _, task_index = subtask_key.partition("-")
+    is_valid, error_msg = validate_module_id(module_id)
+    if not is_valid:
+        return is_valid, error_msg
+    if not task_index.isdigit():
+        return False, "La subtarea debe tener la forma '<módulo>-<índice>'"
+    return validate_subtask_index(module_id, int(task_index))
+
+
+def _validate_progress_keys(modules: Optional[Dict], subtasks: Optional[Dict], notes: Optional[Dict] = None):
+    """
+    Validar las claves de módulos, subtareas y notas de un reemplazo completo (sync, replay)
+    
+    Raises:
+        HTTPException: 400 con la primera clave inválida
+    """
+    checks = [(validate_module_id, modules), (_validate_subtask_key, subtasks), (validate_module_id, notes)]
+    for validate, values in checks:
+        for key in values or {}:
+            is_valid, error_msg = validate(key)
+            if not is_valid:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Clave '{key}': {error_msg}"
+                )
+
+
+def _validate_op(index: int, op: ProgressOp, now: datetime) -> Dict:
+    """
+    Validar una operación del registro offline
+    
+    Returns:
+        dict: operación lista para merge_ops (hora normalizada)
+    """
+    if op.type == "xp":
+        is_valid, error_msg = validate_xp_amount(op.amount) if op.amount is not None else (False, "amount es requerido")
+    elif op.type == "badge":
+        is_valid, error_msg = validate_badge_name(op.key or "")
+    elif op.type == "subtask":
+        is_valid, error_msg = _validate_subtask_key(op.key or "")
+    else:
+        is_valid, error_msg = validate_module_id(op.key or "")
+    
+    if is_valid and op.type in ("module", "subtask") and not isinstance(op.value, bool):
+        is_valid, error_msg = False, "value debe ser true o false"
+    if is_valid and op.type == "note" and not isinstance(op.value, str):
+        is_valid, error_msg = False, "value debe ser el texto de la nota (vacío para eliminarla)"
+    if is_valid and op.type == "note" and len(op.value) > NOTE_MAX_LENGTH:
+        is_valid, error_msg = False, f"La nota supera los {NOTE_MAX_LENGTH} caracteres"
+    
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Operación {index} ({op.type}): {error_msg}"
+        )
+    
+    return {
+        "type": op.type,
+        "key": op.key,
+        "value": op.value,
+        "amount": op.amount,
+        "ts": normalize_timestamp(op.ts, now)
+    }
+
+
+async def _write_rejected(db, user_id: ObjectId, expected: Optional[int]):
+    """
+    La escritura no encontró el documento: usuario inexistente (404) o versión distinta (409)
+    
+    El 409 incluye el progreso actual para que el cliente reaplique sus cambios encima.
+    """
+    user_doc = await db.users.find_one({"_id": user_id}, {"progress.notes": 0})
+    if not user_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    
+    progress = to_api(user_doc.get("progress") or empty_progress())
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "El progreso cambió desde la versión indicada",
+            "expected_version": expected,
+            "version": progress.get("version", 0),
+            "progress": jsonable_encoder(progress)
+        }
+    )
+
+
+def _user_object_id(user_id: str) -> ObjectId:
+    """
+    ID de usuario del body (400 si no es un ObjectId)
+    """
+    try:
+        return ObjectId(user_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de usuario inválido"
+        )
+
+
+async def _check_version(db, user_id: str, expected: Optional[int]) -> ObjectId:
+    """
+    Comprobar usuario y versión sin escribir, para fallar pronto antes de preparar un parche
+    
+    No sustituye a _reserve_note_version: otra escritura puede cambiar la versión después.
+    
+    Returns:
+        ObjectId: ID del usuario
+    """
+    object_id = _user_object_id(user_id)
+    if await db.users.find_one({"_id": object_id, **version_filter(expected)}, {"_id": 1}) is None:
+        await _write_rejected(db, object_id, expected)
+    return object_id
+
+
+async def _reserve_note_version(db, user_id: ObjectId, module_id: str, expected: Optional[int]) -> Dict:
+    """
+    Reservar la versión de una escritura de nota antes de guardarla
+    
+    El update condicionado a la versión esperada es lo primero que se escribe: un 409
+    significa que la nota no se tocó. Si luego la escritura de la nota falla, la reserva
+    se deshace con _release_note_version.
+    
+    Returns:
+        dict: usuario con la versión nueva
+    """
+    updated_user = await db.users.find_one_and_update(
+        {"_id": user_id, **version_filter(expected)},
+        bump_version({
+            "$set": {
+                clock_field("notes", module_id): datetime.utcnow(),
+                "progress.last_sync": datetime.utcnow(),
+                "last_active": datetime.utcnow()
+            }
+        }),
+        projection={VERSION_FIELD: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated_user is None:
+        await _write_rejected(db, user_id, expected)
+    return updated_user
+
+
+async def _release_note_version(db, user_id: ObjectId, reserved: Dict):
+    """
+    Deshacer la reserva de versión de una nota que no llegó a guardarse
+    
+    Solo si nadie escribió después: una versión posterior ya no se puede devolver.
+    """
+    await db.users.update_one(
+        {"_id": user_id, VERSION_FIELD: reserved["progress"]["version"]},
+        {"$inc": {VERSION_FIELD: -1}}
+    )
 
 
 # Endpoints
 @router.get("/{user_id}")
-async def get_progress(user_id: str):
+async def get_progress(
+    user_id: str,
+    include_notes: bool = Query(False, description="Incluir las notas de todos los módulos"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (ej: xp,badges)")
+):
     """
     Obtener progreso completo del usuario
     
     Returns:
-        Todo el progreso: módulos, subtareas, notas, badges, XP
+        Progreso: módulos, subtareas, badges, XP (y notas si se piden),
+        solo los campos de fields si se indica
     """
+    try:
+        selected = parse_fields(fields, API_FIELDS)
+    except InvalidFieldsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     db = get_database()
     
+    # Las notas viven en su propia colección; las embebidas (antiguas) solo se leen para migrarlas
+    if selected is not None:
+        projection = mongo_projection(
+            [f"progress.{field}" for field in selected], prefixed(API_FIELDS, "progress"),
+            extra=[VERSION_FIELD, *(["progress.notes"] if include_notes else [])]
+        )
+    else:
+        projection = {"progress": 1} if include_notes else {"progress.notes": 0}
+    
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, projection)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -85,28 +356,34 @@ async def get_progress(user_id: str):
             detail="Usuario no encontrado"
         )
     
-    progress = user_doc.get("progress", {
-        "modules": {},
-        "subtasks": {},
-        "notes": {},
-        "badges": [],
-        "xp": 0,
-        "last_sync": None
-    })
+    progress = to_api(user_doc.get("progress") or empty_progress())
+    progress.pop("notes", None)
     
-    return {
-        "success": True,
-        "progress": progress
-    }
+    # La versión sirve de ETag para las escrituras con If-Match
+    etag = f'"{progress.get("version", 0)}"'
+    
+    if selected is not None:
+        progress = trim(progress, selected)
+    if include_notes:
+        progress["notes"] = await get_notes(db, user_doc["_id"], embedded=user_doc.get("progress", {}).get("notes"))
+    
+    return FastJSONResponse(
+        content={
+            "success": True,
+            "progress": progress
+        },
+        headers={"ETag": etag}
+    )
 
 
 @router.put("/module")
-async def update_module_progress(data: ModuleProgressUpdate):
+@broadcast("module")
+async def update_module_progress(data: ModuleProgressUpdate, if_match: Optional[str] = Header(None)):
     """
     Actualizar progreso de un módulo
     
     Returns:
-        Progreso actualizado de módulos
+        Progreso actualizado de módulos y versión (409 si no coincide la esperada)
     """
     # Validar module_id
     is_valid, error_msg = validate_module_id(data.module_id)
@@ -116,22 +393,20 @@ async def update_module_progress(data: ModuleProgressUpdate):
             detail=error_msg
         )
     
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
     
-    # Actualizar progreso del módulo
-    field_name = f"progress.modules.{data.module_id}"
+    # Actualizar progreso del módulo (clave del diccionario o bit, según el formato)
+    update = bump_version(module_update(data.module_id, data.is_completed))
+    update.setdefault("$set", {}).update({
+        clock_field("modules", data.module_id): datetime.utcnow(),
+        "progress.last_sync": datetime.utcnow(),
+        "last_active": datetime.utcnow()
+    })
     
     try:
-        result = await db.users.update_one(
-            {"_id": ObjectId(data.user_id)},
-            {
-                "$set": {
-                    field_name: data.is_completed,
-                    "progress.last_sync": datetime.utcnow(),
-                    "last_active": datetime.utcnow()
-                }
-            }
-        )
+        user_id = ObjectId(data.user_id)
+        result = await db.users.update_one({"_id": user_id, **version_filter(expected)}, update)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -139,29 +414,31 @@ async def update_module_progress(data: ModuleProgressUpdate):
         )
     
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
-        )
+        await _write_rejected(db, user_id, expected)
     
     # Obtener progreso actualizado
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    modules = updated_user.get("progress", {}).get("modules", {})
+    updated_user = await db.users.find_one(
+        {"_id": user_id},
+        {"progress.modules": 1, "progress.module_bits": 1, VERSION_FIELD: 1}
+    )
+    progress = updated_user.get("progress", {})
     
     return {
         "success": True,
         "message": f"Módulo {data.module_id} actualizado",
-        "modules": modules
+        "modules": decode_modules(progress),
+        "version": progress.get("version", 0)
     }
 
 
 @router.put("/subtask")
-async def update_subtask_progress(data: SubtaskProgressUpdate):
+@broadcast("subtask")
+async def update_subtask_progress(data: SubtaskProgressUpdate, if_match: Optional[str] = Header(None)):
     """
     Actualizar progreso de una subtarea
     
     Returns:
-        Progreso actualizado de subtareas
+        Progreso actualizado de subtareas y versión (409 si no coincide la esperada)
     """
     # Validar module_id
     is_valid, error_msg = validate_module_id(data.module_id)
@@ -171,23 +448,28 @@ async def update_subtask_progress(data: SubtaskProgressUpdate):
             detail=error_msg
         )
     
+    is_valid, error_msg = validate_subtask_index(data.module_id, data.task_index)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
     
     # Construir clave de subtarea: "module_id-task_index"
     subtask_key = f"{data.module_id}-{data.task_index}"
-    field_name = f"progress.subtasks.{subtask_key}"
+    update = bump_version(subtask_update(data.module_id, data.task_index, data.is_completed))
+    update.setdefault("$set", {}).update({
+        clock_field("subtasks", subtask_key): datetime.utcnow(),
+        "progress.last_sync": datetime.utcnow(),
+        "last_active": datetime.utcnow()
+    })
     
     try:
-        result = await db.users.update_one(
-            {"_id": ObjectId(data.user_id)},
-            {
-                "$set": {
-                    field_name: data.is_completed,
-                    "progress.last_sync": datetime.utcnow(),
-                    "last_active": datetime.utcnow()
-                }
-            }
-        )
+        user_id = ObjectId(data.user_id)
+        result = await db.users.update_one({"_id": user_id, **version_filter(expected)}, update)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -195,29 +477,31 @@ async def update_subtask_progress(data: SubtaskProgressUpdate):
         )
     
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
-        )
+        await _write_rejected(db, user_id, expected)
     
     # Obtener progreso actualizado
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    subtasks = updated_user.get("progress", {}).get("subtasks", {})
+    updated_user = await db.users.find_one(
+        {"_id": user_id},
+        {"progress.subtasks": 1, "progress.subtask_bits": 1, VERSION_FIELD: 1}
+    )
+    progress = updated_user.get("progress", {})
     
     return {
         "success": True,
         "message": f"Subtarea {subtask_key} actualizada",
-        "subtasks": subtasks
+        "subtasks": decode_subtasks(progress),
+        "version": progress.get("version", 0)
     }
 
 
 @router.put("/note")
-async def update_note(data: NoteUpdate):
+@broadcast("note")
+async def update_note(data: NoteUpdate, if_match: Optional[str] = Header(None)):
     """
     Actualizar nota de un módulo
     
     Returns:
-        Notas actualizadas
+        Notas actualizadas y versión (409 si no coincide la esperada)
     """
     # Validar module_id
     is_valid, error_msg = validate_module_id(data.module_id)
@@ -227,71 +511,111 @@ async def update_note(data: NoteUpdate):
             detail=error_msg
         )
     
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
-    
-    # Actualizar nota
-    field_name = f"progress.notes.{data.module_id}"
+    user_id = _user_object_id(data.user_id)
+    updated_user = await _reserve_note_version(db, user_id, data.module_id, expected)
     
     # Si el texto está vacío, eliminar la nota
-    if not data.note_text.strip():
-        try:
-            result = await db.users.update_one(
-                {"_id": ObjectId(data.user_id)},
-                {
-                    "$unset": {field_name: ""},
-                    "$set": {
-                        "progress.last_sync": datetime.utcnow(),
-                        "last_active": datetime.utcnow()
-                    }
-                }
-            )
-        except:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="ID de usuario inválido"
-            )
-    else:
-        try:
-            result = await db.users.update_one(
-                {"_id": ObjectId(data.user_id)},
-                {
-                    "$set": {
-                        field_name: data.note_text,
-                        "progress.last_sync": datetime.utcnow(),
-                        "last_active": datetime.utcnow()
-                    }
-                }
-            )
-        except:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="ID de usuario inválido"
-            )
+    try:
+        if not data.note_text.strip():
+            await delete_note(db, user_id, data.module_id)
+        else:
+            await save_note(db, user_id, data.module_id, data.note_text)
+    except PyMongoError:
+        await _release_note_version(db, user_id, updated_user)
+        raise
     
-    if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
-        )
+    # Quitar la copia embebida antigua una vez guardada la nota en su colección
+    await db.users.update_one({"_id": user_id}, {"$unset": {f"progress.notes.{data.module_id}": ""}})
     
     # Obtener notas actualizadas
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    notes = updated_user.get("progress", {}).get("notes", {})
+    notes = await get_notes(db, user_id)
     
     return {
         "success": True,
         "message": f"Nota del módulo {data.module_id} actualizada",
-        "notes": notes
+        "notes": notes,
+        "hash": text_hash(notes.get(data.module_id, "")),
+        "version": updated_user["progress"]["version"]
+    }
+
+
+@router.patch("/note")
+@broadcast("note_patch")
+async def patch_module_note(data: NotePatch, if_match: Optional[str] = Header(None)):
+    """
+    Autoguardado incremental de una nota: aplica los cambios sobre la revisión base_hash
+    
+    Si la nota cambió desde esa revisión responde 409 y el cliente debe
+    enviar el texto completo con PUT /note.
+    
+    Returns:
+        Revisión y longitud de la nota resultante, y versión del progreso
+    """
+    # Validar module_id
+    is_valid, error_msg = validate_module_id(data.module_id)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    expected = _expected_version(if_match, data.expected_version)
+    db = get_database()
+    user_id = await _check_version(db, data.user_id, expected)
+    
+    try:
+        prepared = await prepare_patch(
+            db, user_id, data.module_id, data.base_hash,
+            [(op.start, op.end, op.text) for op in data.ops]
+        )
+    except PatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if prepared is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=NOTE_CHANGED_DETAIL
+        )
+    
+    # Primero la versión (condicionada), después la nota (condicionada a su revisión)
+    current, text = prepared
+    updated_user = await _reserve_note_version(db, user_id, data.module_id, expected)
+    try:
+        written = await write_patch(db, user_id, data.module_id, data.base_hash, current, text)
+    except PyMongoError:
+        await _release_note_version(db, user_id, updated_user)
+        raise
+    
+    if not written:
+        await _release_note_version(db, user_id, updated_user)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=NOTE_CHANGED_DETAIL
+        )
+    
+    return {
+        "success": True,
+        "module_id": data.module_id,
+        "hash": text_hash(text),
+        "length": utf16_length(text),
+        "version": updated_user["progress"]["version"]
     }
 
 
 @router.post("/badge")
-async def add_badge(data: BadgeAdd):
+@idempotent("badge")
+@broadcast("badge")
+async def add_badge(data: BadgeAdd, if_match: Optional[str] = Header(None)):
     """
     Agregar un badge al usuario
     
     Returns:
-        Lista actualizada de badges
+        Lista actualizada de badges y versión (409 si no coincide la esperada)
     """
     # Validar badge_name
     is_valid, error_msg = validate_badge_name(data.badge_name)
@@ -301,11 +625,13 @@ async def add_badge(data: BadgeAdd):
             detail=error_msg
         )
     
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
     
     # Verificar usuario y badges actuales
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(data.user_id)})
+        user_id = ObjectId(data.user_id)
+        user_doc = await db.users.find_one({"_id": user_id}, {"progress.badges": 1, VERSION_FIELD: 1})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -318,44 +644,52 @@ async def add_badge(data: BadgeAdd):
             detail="Usuario no encontrado"
         )
     
-    current_badges = user_doc.get("progress", {}).get("badges", [])
-    if data.badge_name in current_badges:
+    progress = user_doc.get("progress", {})
+    current_badges = progress.get("badges", [])
+    if data.badge_name in current_badges and expected in (None, progress.get("version", 0)):
         return {
             "success": True,
             "message": "El badge ya existe",
-            "badges": current_badges
+            "badges": current_badges,
+            "version": progress.get("version", 0)
         }
     
     # Agregar badge
     result = await db.users.update_one(
-        {"_id": ObjectId(data.user_id)},
-        {
+        {"_id": user_id, **version_filter(expected)},
+        bump_version({
             "$addToSet": {"progress.badges": data.badge_name},
             "$set": {
                 "progress.last_sync": datetime.utcnow(),
                 "last_active": datetime.utcnow()
             }
-        }
+        })
     )
     
+    if result.matched_count == 0:
+        await _write_rejected(db, user_id, expected)
+    
     # Obtener badges actualizados
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    badges = updated_user.get("progress", {}).get("badges", [])
+    updated_user = await db.users.find_one({"_id": user_id}, {"progress.badges": 1, VERSION_FIELD: 1})
+    progress = updated_user.get("progress", {})
     
     return {
         "success": True,
         "message": f"Badge '{data.badge_name}' agregado",
-        "badges": badges
+        "badges": progress.get("badges", []),
+        "version": progress.get("version", 0)
     }
 
 
 @router.post("/xp")
-async def add_xp(data: XPAdd):
+@idempotent("xp")
+@broadcast("xp")
+async def add_xp(data: XPAdd, if_match: Optional[str] = Header(None)):
     """
     Agregar XP al usuario
     
     Returns:
-        XP total actualizado
+        XP total actualizado y versión (409 si no coincide la esperada)
     """
     # Validar amount
     is_valid, error_msg = validate_xp_amount(data.amount)
@@ -365,19 +699,21 @@ async def add_xp(data: XPAdd):
             detail=error_msg
         )
     
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
     
     # Incrementar XP
     try:
+        user_id = ObjectId(data.user_id)
         result = await db.users.update_one(
-            {"_id": ObjectId(data.user_id)},
-            {
+            {"_id": user_id, **version_filter(expected)},
+            bump_version({
                 "$inc": {"progress.xp": data.amount},
                 "$set": {
                     "progress.last_sync": datetime.utcnow(),
                     "last_active": datetime.utcnow()
                 }
-            }
+            })
         )
     except:
         raise HTTPException(
@@ -386,14 +722,12 @@ async def add_xp(data: XPAdd):
         )
     
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
-        )
+        await _write_rejected(db, user_id, expected)
     
     # Obtener XP actualizado
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    xp = updated_user.get("progress", {}).get("xp", 0)
+    updated_user = await db.users.find_one({"_id": user_id}, {"progress.xp": 1, VERSION_FIELD: 1})
+    progress = updated_user.get("progress", {})
+    xp = progress.get("xp", 0)
     
     message = f"{data.amount} XP agregado"
     if data.reason:
@@ -402,31 +736,39 @@ async def add_xp(data: XPAdd):
     return {
         "success": True,
         "message": message,
-        "xp": xp
+        "xp": xp,
+        "version": progress.get("version", 0)
     }
 
 
 @router.post("/sync")
-async def sync_progress(data: ProgressSync):
+@idempotent("sync")
+@broadcast("sync")
+async def sync_progress(data: ProgressSync, if_match: Optional[str] = Header(None)):
     """
     Sincronizar progreso completo del usuario
     
+    Con If-Match o expected_version solo se aplica si nadie escribió desde esa versión;
+    si no, responde 409 con el progreso actual en lugar de pisarlo.
+    
     Returns:
-        Progreso completo sincronizado
+        Progreso completo sincronizado (con su versión)
     """
+    expected = _expected_version(if_match, data.expected_version)
     db = get_database()
     
     # Preparar campos a actualizar
     update_fields = {"progress.last_sync": datetime.utcnow(), "last_active": datetime.utcnow()}
     
-    if data.modules is not None:
-        update_fields["progress.modules"] = data.modules
+    # Módulos y subtareas en el formato de almacenamiento configurado
+    _validate_progress_keys(data.modules, data.subtasks, data.notes)
+    fields_to_set, fields_to_unset = replace_fields(data.modules, data.subtasks)
+    update_fields.update(fields_to_set)
     
-    if data.subtasks is not None:
-        update_fields["progress.subtasks"] = data.subtasks
-    
-    if data.notes is not None:
-        update_fields["progress.notes"] = data.notes
+    # Relojes de la fusión offline: las claves enviadas se escribieron ahora
+    for section, values in (("modules", data.modules), ("subtasks", data.subtasks), ("notes", data.notes)):
+        if values is not None:
+            update_fields[f"{CLOCKS_FIELD}.{section}"] = {key: datetime.utcnow() for key in values}
     
     if data.badges is not None:
         update_fields["progress.badges"] = data.badges
@@ -436,10 +778,13 @@ async def sync_progress(data: ProgressSync):
     
     # Actualizar en la base de datos
     try:
-        result = await db.users.update_one(
-            {"_id": ObjectId(data.user_id)},
-            {"$set": update_fields}
-        )
+        user_id = ObjectId(data.user_id)
+        if data.notes is not None:
+            fields_to_unset["progress.notes"] = ""
+        update = bump_version({"$set": update_fields})
+        if fields_to_unset:
+            update["$unset"] = fields_to_unset
+        result = await db.users.update_one({"_id": user_id, **version_filter(expected)}, update)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -447,20 +792,110 @@ async def sync_progress(data: ProgressSync):
         )
     
     if result.matched_count == 0:
+        await _write_rejected(db, user_id, expected)
+    
+    if data.notes is not None:
+        await replace_notes(db, user_id, data.notes)
+    
+    # Obtener progreso actualizado (las notas, de su colección)
+    updated_user = await db.users.find_one({"_id": user_id}, {"progress": 1})
+    progress = to_api(updated_user.get("progress", {}))
+    progress["notes"] = await get_notes(db, user_id, embedded=progress.get("notes"))
+    
+    return {
+        "success": True,
+        "message": "Progreso sincronizado exitosamente",
+        "progress": progress,
+        "synced_at": datetime.utcnow()
+    }
+
+
+@router.post("/replay")
+@idempotent("replay")
+@broadcast("replay")
+async def replay_progress(data: ProgressReplay):
+    """
+    Fusionar el registro de operaciones offline del cliente con el progreso del servidor
+    
+    Módulos, subtareas y notas: gana la escritura más reciente de cada clave (las
+    anteriores a la última escritura del servidor o a un reset se descartan).
+    Badges: se añaden. XP: se suman los incrementos. Todo se guarda en un único
+    update condicionado a la versión leída.
+    
+    Returns:
+        Progreso fusionado, versión y operaciones aplicadas/descartadas
+    """
+    now = datetime.utcnow()
+    ops = [_validate_op(index, op, now) for index, op in enumerate(data.ops)]
+    
+    db = get_database()
+    
+    try:
+        user_id = ObjectId(data.user_id)
+    except:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de usuario inválido"
         )
     
-    # Obtener progreso actualizado
-    updated_user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-    progress = updated_user.get("progress", {})
+    for _ in range(REPLAY_MAX_ATTEMPTS):
+        user_doc = await db.users.find_one({"_id": user_id}, {"progress.notes": 0})
+        if not user_doc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+        
+        progress = user_doc.get("progress") or {}
+        merged = merge_ops(progress, ops)
+        
+        _validate_progress_keys(merged.modules, merged.subtasks)
+        fields_to_set, fields_to_unset = replace_fields(merged.modules, merged.subtasks)
+        fields_to_set.update({
+            "progress.badges": merged.badges,
+            "progress.xp": merged.xp,
+            CLOCKS_FIELD: merged.clocks,
+            "progress.last_sync": datetime.utcnow(),
+            "last_active": datetime.utcnow()
+        })
+        update = bump_version({"$set": fields_to_set})
+        if fields_to_unset:
+            update["$unset"] = fields_to_unset
+        
+        result = await db.users.update_one(
+            {"_id": user_id, **version_filter(progress.get("version", 0))}, update
+        )
+        if result.matched_count:
+            break
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El progreso cambió durante la fusión, reintenta"
+        )
+    
+    # Notas ganadoras a su colección (texto vacío = eliminar), condicionadas a su hora:
+    # un PUT /note posterior a la fusión no se pisa con el texto offline
+    for module_id, (text, ts) in merged.notes.items():
+        if text.strip():
+            await save_note(db, user_id, module_id, text, written_at=ts)
+        else:
+            await delete_note(db, user_id, module_id, written_at=ts)
+    
+    updated_user = await db.users.find_one({"_id": user_id}, {"progress.notes": 0})
+    progress = to_api(updated_user.get("progress", {}))
+    progress["notes"] = await get_notes(db, user_id)
+    
+    logger.info(
+        "Registro offline fusionado",
+        extra={"user_id": data.user_id, "applied": merged.applied, "skipped": merged.skipped}
+    )
     
     return {
         "success": True,
-        "message": "Progreso sincronizado exitosamente",
+        "applied": merged.applied,
+        "skipped": merged.skipped,
         "progress": progress,
-        "synced_at": datetime.utcnow().isoformat()
+        "version": progress.get("version", 0)
     }
 
 
@@ -475,7 +910,7 @@ async def get_progress_stats(user_id: str):
     db = get_database()
     
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, {"progress.notes": 0})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -490,15 +925,13 @@ async def get_progress_stats(user_id: str):
     
     progress = user_doc.get("progress", {})
     
-    # Módulos
-    modules = progress.get("modules", {})
-    modules_completed = sum(1 for v in modules.values() if v)
-    total_modules = len(modules)
+    # Totales reales del curso (catálogo); sin catálogo, lo que el usuario ha tocado
+    catalog = get_catalog()
     
-    # Subtareas
-    subtasks = progress.get("subtasks", {})
-    subtasks_completed = sum(1 for v in subtasks.values() if v)
-    total_subtasks = len(subtasks)
+    # Módulos y subtareas (popcount en el formato bitset)
+    modules_completed, subtasks_completed = count_completed(progress)
+    total_modules = catalog.module_count if catalog is not None else len(decode_modules(progress))
+    total_subtasks = catalog.total_subtasks if catalog is not None else len(decode_subtasks(progress))
     
     # Badges y XP
     badges = progress.get("badges", [])
@@ -513,7 +946,7 @@ async def get_progress_stats(user_id: str):
     level = xp // 100
     xp_for_next_level = 100 - (xp % 100)
     
-    return {
+    return FastJSONResponse(content={
         "success": True,
         "stats": {
             "modules": {
@@ -535,38 +968,119 @@ async def get_progress_stats(user_id: str):
                 "for_next_level": xp_for_next_level
             },
             "last_sync": progress.get("last_sync"),
-            "member_since": user_doc["created_at"].isoformat() if isinstance(user_doc["created_at"], datetime) else user_doc["created_at"]
+            "member_since": user_doc["created_at"]
         }
+    })
+
+
+@router.get("/{user_id}/notes/search")
+async def search_user_notes(
+    user_id: str,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Buscar en las notas del usuario
+    
+    Returns:
+        Módulos cuyas notas coinciden, ordenados por relevancia, con fragmento resaltado
+    """
+    db = get_database()
+    
+    try:
+        user_oid = ObjectId(user_id)
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de usuario inválido"
+        )
+    
+    found = await search_notes(db, user_oid, q, limit=limit)
+    
+    # Título del módulo desde el catálogo, si está cargado
+    catalog = get_catalog()
+    for result in found["results"]:
+        module = catalog.get(result["module_id"]) if catalog is not None else None
+        result["title"] = module.title if module is not None else None
+    
+    return {
+        "success": True,
+        "query": q,
+        "total": found["total"],
+        "results": found["results"]
+    }
+
+
+@router.get("/{user_id}/notes/{module_id}")
+async def get_module_note(user_id: str, module_id: str):
+    """
+    Obtener la nota de un módulo (carga individual, sin leer el resto del progreso)
+    
+    Returns:
+        Texto de la nota
+    """
+    is_valid, error_msg = validate_module_id(module_id)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    db = get_database()
+    
+    try:
+        user_oid = ObjectId(user_id)
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de usuario inválido"
+        )
+    
+    note = await get_note(db, user_oid, module_id)
+    if note is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nota no encontrada"
+        )
+    
+    return {
+        "success": True,
+        "module_id": module_id,
+        "note": note,
+        "hash": text_hash(note)
     }
 
 
 @router.delete("/{user_id}")
-async def reset_progress(user_id: str):
+@broadcast("reset")
+async def reset_progress(user_id: str, if_match: Optional[str] = Header(None)):
     """
     Resetear todo el progreso del usuario
     
     Returns:
-        Confirmación de reset
+        Confirmación de reset (la versión del progreso sigue creciendo)
     """
+    expected = _expected_version(if_match, None)
     db = get_database()
     
+    # Vaciar campo a campo para conservar y avanzar la versión
+    fields_to_set, fields_to_unset = replace_fields({}, {})
+    fields_to_set.update({
+        "progress.badges": [],
+        "progress.xp": 0,
+        CLOCKS_FIELD: {},
+        RESET_AT_FIELD: datetime.utcnow(),
+        "progress.last_sync": datetime.utcnow(),
+        "last_active": datetime.utcnow()
+    })
+    fields_to_unset["progress.notes"] = ""
+    
     # Resetear progreso
     try:
+        user_oid = ObjectId(user_id)
         result = await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {
-                "$set": {
-                    "progress": {
-                        "modules": {},
-                        "subtasks": {},
-                        "notes": {},
-                        "badges": [],
-                        "xp": 0,
-                        "last_sync": datetime.utcnow()
-                    },
-                    "last_active": datetime.utcnow()
-                }
-            }
+            {"_id": user_oid, **version_filter(expected)},
+            bump_version({"$set": fields_to_set, "$unset": fields_to_unset})
         )
     except:
         raise HTTPException(
@@ -575,10 +1089,11 @@ async def reset_progress(user_id: str):
         )
     
     if result.matched_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Usuario no encontrado"
-        )
+        await _write_rejected(db, user_oid, expected)
+    
+    await delete_user_notes(db, user_oid)
+    
+    logger.info("Progreso reseteado", extra={"user_id": user_id})
     
     return {
         "success": True,
@@ -0,0 +1,53 @@
+"""
+Rutas de Búsqueda
+Búsqueda de texto completo y autocompletado sobre el contenido del curso
+"""
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from services.search_index import search_index
+from services.suggest import get_suggest_trie, SUGGEST_TOP_K
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar"),
+    limit: int = Query(10, ge=1, le=50),
+    type: Optional[str] = Query(None, pattern="^(doc|module)$", description="Filtrar por tipo")
+):
+    """
+    Buscar en el contenido del curso (ranking BM25)
+    
+    Returns:
+        Resultados con score y fragmento resaltado
+    """
+    found = search_index.search(q, limit=limit, doc_type=type)
+    
+    return {
+        "success": True,
+        "query": q,
+        "total": found["total"],
+        "results": found["results"]
+    }
+
+
+@router.get("/suggest")
+async def suggest_content(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Texto escrito hasta ahora"),
+    limit: int = Query(8, ge=1, le=SUGGEST_TOP_K)
+):
+    """
+    Autocompletado por prefijo (módulos, temas, docs y badges)
+    
+    Returns:
+        Sugerencias ordenadas por peso
+    """
+    suggestions = get_suggest_trie().suggest(prefix, limit=limit)
+    
+    return {
+        "success": True,
+        "prefix": prefix,
+        "suggestions": [entry.to_dict() for entry in suggestions]
+    }
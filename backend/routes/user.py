@@ -2,15 +2,39 @@
 Rutas de Usuario (SIN AUTENTICACIÓN)
 Endpoints públicos para gestión de perfil de usuario
 """
-from fastapi import APIRouter, HTTPException, status
+import logging
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from bson import ObjectId
 from datetime import datetime
 
 from services.database import get_database
+from services.catalog import get_catalog
+from services.notes_store import delete_user_notes
+from services.progress_store import empty_progress, to_api, count_completed, decode_modules, decode_subtasks, API_FIELDS
+from utils.projection import InvalidFieldsError, parse_fields, mongo_projection, prefixed, trim
+from utils.json_response import FastJSONResponse
+from utils.msgpack_route import MsgPackRoute
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
+
+logger = logging.getLogger(__name__)
+
+# Campos del perfil seleccionables con ?fields= -> campos del documento
+PROFILE_FIELDS = {
+    "email": ("email",),
+    "display_name": ("display_name",),
+    "photo_url": ("photo_url",),
+    "created_at": ("created_at",),
+    "last_active": ("last_active",),
+    "progress": tuple(path for paths in prefixed(API_FIELDS, "progress").values() for path in paths),
+    **prefixed(API_FIELDS, "progress"),
+    "settings": ("settings",),
+    "settings.notifications": ("settings.notifications",),
+    "settings.theme": ("settings.theme",),
+    "settings.language": ("settings.language",),
+}
 
 
 class CreateUserRequest(BaseModel):
@@ -56,14 +80,7 @@ async def create_user(user_data: CreateUserRequest):
         "display_name": user_data.display_name,
         "created_at": datetime.utcnow(),
         "last_active": datetime.utcnow(),
-        "progress": {
-            "modules": {},
-            "subtasks": {},
-            "notes": {},
-            "badges": [],
-            "xp": 0,
-            "last_sync": None
-        },
+        "progress": empty_progress(),
         "settings": {
             "notifications": True,
             "theme": "dark",
@@ -75,6 +92,8 @@ async def create_user(user_data: CreateUserRequest):
     result = await db.users.insert_one(user_doc)
     user_doc["_id"] = result.inserted_id
     
+    logger.info("Usuario creado", extra={"user_id": str(result.inserted_id)})
+    
     return {
         "success": True,
         "message": "Usuario creado exitosamente",
@@ -87,17 +106,30 @@ async def create_user(user_data: CreateUserRequest):
 
 
 @router.get("/{user_id}")
-async def get_user_profile(user_id: str):
+async def get_user_profile(
+    user_id: str,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (ej: display_name,progress.xp)")
+):
     """
     Obtener perfil de usuario por ID
     
     Returns:
-        Información del usuario
+        Información del usuario (solo id y los campos de fields si se indica)
     """
+    try:
+        selected = parse_fields(fields, PROFILE_FIELDS)
+    except InvalidFieldsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     db = get_database()
     
+    projection = mongo_projection(selected, PROFILE_FIELDS) if selected is not None else {"progress.notes": 0}
+    
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, projection)
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -110,19 +142,21 @@ async def get_user_profile(user_id: str):
             detail="Usuario no encontrado"
         )
     
-    return {
-        "success": True,
-        "user": {
-            "id": str(user_doc["_id"]),
-            "email": user_doc["email"],
-            "display_name": user_doc["display_name"],
-            "photo_url": user_doc.get("photo_url"),
-            "created_at": user_doc["created_at"].isoformat() if isinstance(user_doc["created_at"], datetime) else user_doc["created_at"],
-            "last_active": user_doc["last_active"].isoformat() if isinstance(user_doc["last_active"], datetime) else user_doc["last_active"],
-            "progress": user_doc.get("progress", {}),
-            "settings": user_doc.get("settings", {})
-        }
+    user = {
+        "id": str(user_doc["_id"]),
+        "email": user_doc.get("email"),
+        "display_name": user_doc.get("display_name"),
+        "photo_url": user_doc.get("photo_url"),
+        "created_at": user_doc.get("created_at"),
+        "last_active": user_doc.get("last_active"),
+        "progress": to_api(user_doc.get("progress", {})),
+        "settings": user_doc.get("settings", {})
     }
+    
+    return FastJSONResponse(content={
+        "success": True,
+        "user": trim(user, selected, keep=["id"]) if selected is not None else user
+    })
 
 
 @router.put("/{user_id}")
@@ -175,7 +209,7 @@ async def update_user_profile(user_id: str, profile_data: UpdateProfileRequest):
         )
     
     # Obtener usuario actualizado
-    updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+    updated_user = await db.users.find_one({"_id": ObjectId(user_id)}, {"email": 1, "display_name": 1, "photo_url": 1})
     
     return {
         "success": True,
@@ -200,7 +234,7 @@ async def update_user_settings(user_id: str, settings_data: UpdateSettingsReques
     db = get_database()
     
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, {"settings": 1})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -278,6 +312,10 @@ async def delete_user(user_id: str):
             detail="Usuario no encontrado"
         )
     
+    await delete_user_notes(db, ObjectId(user_id))
+    
+    logger.info("Usuario eliminado", extra={"user_id": user_id})
+    
     return {
         "success": True,
         "message": "Usuario eliminado exitosamente"
@@ -295,7 +333,7 @@ async def get_user_stats(user_id: str):
     db = get_database()
     
     try:
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, {"progress.notes": 0})
     except:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -310,12 +348,13 @@ async def get_user_stats(user_id: str):
     
     progress = user_doc.get("progress", {})
     
-    # Calcular estadísticas
-    modules_completed = sum(1 for v in progress.get("modules", {}).values() if v)
-    total_modules = len(progress.get("modules", {}))
+    # Totales reales del curso (catálogo); sin catálogo, lo que el usuario ha tocado
+    catalog = get_catalog()
     
-    subtasks_completed = sum(1 for v in progress.get("subtasks", {}).values() if v)
-    total_subtasks = len(progress.get("subtasks", {}))
+    # Calcular estadísticas
+    modules_completed, subtasks_completed = count_completed(progress)
+    total_modules = catalog.module_count if catalog is not None else len(decode_modules(progress))
+    total_subtasks = catalog.total_subtasks if catalog is not None else len(decode_subtasks(progress))
     
     badges_count = len(progress.get("badges", []))
     xp = progress.get("xp", 0)
@@ -325,7 +364,7 @@ async def get_user_stats(user_id: str):
     if total_modules > 0:
         completion_percentage = (modules_completed / total_modules) * 100
     
-    return {
+    return FastJSONResponse(content={
         "success": True,
         "stats": {
             "modules": {
@@ -339,7 +378,7 @@ async def get_user_stats(user_id: str):
             },
             "badges": badges_count,
             "xp": xp,
-            "member_since": user_doc["created_at"].isoformat() if isinstance(user_doc["created_at"], datetime) else user_doc["created_at"],
-            "last_active": user_doc["last_active"].isoformat() if isinstance(user_doc["last_active"], datetime) else user_doc["last_active"]
+            "member_since": user_doc["created_at"],
+            "last_active": user_doc["last_active"]
         }
-    }
+    })
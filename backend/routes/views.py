@@ -0,0 +1,86 @@
+"""
+Rutas de Vistas (SIN AUTENTICACIÓN)
+Dashboard y roadmap ya unidos con el catálogo y calculados en el servidor
+"""
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import Callable, Dict, Optional
+from bson import ObjectId
+
+from services.database import get_database
+from services.catalog import get_catalog, CourseCatalog
+from services.progress_store import to_api
+from services.progress_views import VIEW_PROJECTION, build_dashboard_view, build_roadmap_view, view_etag
+from utils.json_response import FastJSONResponse
+
+router = APIRouter()
+
+
+async def _render_view(
+    view: str,
+    user_id: str,
+    if_none_match: Optional[str],
+    build: Callable[[CourseCatalog, Dict], Dict]
+) -> Response:
+    catalog = get_catalog()
+    if catalog is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El catálogo del curso aún no está cargado"
+        )
+    
+    db = get_database()
+    
+    try:
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, VIEW_PROJECTION)
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de usuario inválido"
+        )
+    
+    if not user_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    
+    progress = to_api(user_doc.get("progress", {}))
+    
+    # Privada: depende del usuario; se revalida siempre con el ETag
+    etag = view_etag(view, user_doc, catalog)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return FastJSONResponse(
+        content={
+            "success": True,
+            "user": {"id": user_id, "display_name": user_doc.get("display_name")},
+            "catalog_version": catalog.version,
+            view: build(catalog, progress)
+        },
+        headers=headers
+    )
+
+
+@router.get("/dashboard/{user_id}")
+async def get_dashboard_view(user_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Vista del dashboard en una sola petición
+    
+    Returns:
+        Porcentajes, XP, rango, nivel, badges, siguiente módulo y módulos destacados
+    """
+    return await _render_view("dashboard", user_id, if_none_match, build_dashboard_view)
+
+
+@router.get("/roadmap/{user_id}")
+async def get_roadmap_view(user_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Vista del roadmap en una sola petición
+    
+    Returns:
+        Estado y progreso de tareas de cada módulo, y avance por fase
+    """
+    return await _render_view("roadmap", user_id, if_none_match, build_roadmap_view)
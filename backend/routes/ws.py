@@ -0,0 +1,159 @@
+"""
+Rutas WebSocket (SIN AUTENTICACIÓN)
+Canal persistente de sincronización de progreso: el cliente envía las mismas operaciones
+que acepta la API REST y recibe los cambios hechos desde otras pestañas o dispositivos
+
+Mensajes del cliente:
+    {"id": 1, "op": "module", "data": {"module_id": "1", "is_completed": true},
+     "if_match": "3", "idempotency_key": "..."}     (if_match e idempotency_key opcionales)
+
+Mensajes del servidor:
+    {"type": "hello", "connection_id": "...", "version": 3}
+    {"type": "result", "id": 1, "ok": true, "result": {...}}      (respuesta de la ruta REST)
+    {"type": "result", "id": 1, "ok": false, "status": 409, "detail": ...}
+    {"type": "op", "op": "module", "data": {...}, "version": 4}   (cambio de otra conexión)
+"""
+import inspect
+import json
+import logging
+from typing import Dict
+
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+
+from services.database import get_database
+from services.progress_hub import progress_hub, current_origin
+from services.progress_store import VERSION_FIELD
+from routes.progress import (
+    ModuleProgressUpdate, SubtaskProgressUpdate, NoteUpdate, NotePatch, BadgeAdd, XPAdd,
+    ProgressSync, ProgressReplay,
+    update_module_progress, update_subtask_progress, update_note, patch_module_note,
+    add_badge, add_xp, sync_progress, replay_progress
+)
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# Operación -> (endpoint REST, modelo del cuerpo)
+OPERATIONS = {
+    "module": (update_module_progress, ModuleProgressUpdate),
+    "subtask": (update_subtask_progress, SubtaskProgressUpdate),
+    "note": (update_note, NoteUpdate),
+    "note_patch": (patch_module_note, NotePatch),
+    "badge": (add_badge, BadgeAdd),
+    "xp": (add_xp, XPAdd),
+    "sync": (sync_progress, ProgressSync),
+    "replay": (replay_progress, ProgressReplay),
+}
+
+# Operaciones que aceptan Idempotency-Key
+IDEMPOTENT_OPERATIONS = {
+    op for op, (endpoint, _) in OPERATIONS.items()
+    if "idempotency_key" in inspect.signature(endpoint).parameters
+}
+
+# Operaciones que aceptan If-Match (replay se protege con su propia versión)
+VERSIONED_OPERATIONS = {
+    op for op, (endpoint, _) in OPERATIONS.items()
+    if "if_match" in inspect.signature(endpoint).parameters
+}
+
+# Códigos de cierre (rango 4000-4999 reservado a la aplicación)
+CLOSE_INVALID_USER = 4400
+CLOSE_USER_NOT_FOUND = 4404
+
+
+def _error(message_id, status_code: int, detail) -> Dict:
+    return {"type": "result", "id": message_id, "ok": False, "status": status_code, "detail": detail}
+
+
+async def _handle_message(user_id: str, connection_id: str, raw: str) -> Dict:
+    """
+    Ejecutar una operación del cliente con el endpoint REST correspondiente
+
+    Returns:
+        dict: mensaje de resultado para el cliente
+    """
+    try:
+        message = json.loads(raw)
+    except ValueError:
+        return _error(None, status.HTTP_400_BAD_REQUEST, "El mensaje debe ser JSON")
+    if not isinstance(message, dict):
+        return _error(None, status.HTTP_400_BAD_REQUEST, "El mensaje debe ser un objeto JSON")
+
+    message_id = message.get("id")
+    op = message.get("op")
+    if op not in OPERATIONS:
+        return _error(message_id, status.HTTP_400_BAD_REQUEST, f"Operación desconocida: {op}")
+
+    endpoint, model = OPERATIONS[op]
+    try:
+        data = model(**{**(message.get("data") or {}), "user_id": user_id})
+    except ValidationError as e:
+        return _error(message_id, status.HTTP_422_UNPROCESSABLE_ENTITY, jsonable_encoder(e.errors()))
+
+    kwargs = {"data": data}
+    if op in VERSIONED_OPERATIONS:
+        kwargs["if_match"] = message.get("if_match")
+    if op in IDEMPOTENT_OPERATIONS:
+        kwargs["idempotency_key"] = message.get("idempotency_key")
+
+    # Los eventos que publique esta escritura no vuelven a esta conexión
+    token = current_origin.set(connection_id)
+    try:
+        result = await endpoint(**kwargs)
+    except HTTPException as e:
+        return _error(message_id, e.status_code, e.detail)
+    except Exception:
+        # Un fallo de una operación no cierra el canal
+        logger.exception("Error en operación de progreso por WebSocket", extra={"user_id": user_id, "op": op})
+        return _error(message_id, status.HTTP_500_INTERNAL_SERVER_ERROR, "Error interno del servidor")
+    finally:
+        current_origin.reset(token)
+
+    # Respuesta repetida por Idempotency-Key
+    if isinstance(result, JSONResponse):
+        result = json.loads(result.body)
+
+    return {"type": "result", "id": message_id, "ok": True, "result": jsonable_encoder(result)}
+
+
+@router.websocket("/progress/{user_id}")
+async def progress_socket(websocket: WebSocket, user_id: str):
+    """
+    Canal de sincronización de progreso de un usuario
+    """
+    db = get_database()
+
+    try:
+        user_doc = await db.users.find_one({"_id": ObjectId(user_id)}, {VERSION_FIELD: 1})
+    except Exception:
+        await websocket.close(code=CLOSE_INVALID_USER)
+        return
+
+    if not user_doc:
+        await websocket.close(code=CLOSE_USER_NOT_FOUND)
+        return
+
+    await websocket.accept()
+    connection_id = progress_hub.connect(user_id, websocket)
+    logger.info("WebSocket de progreso conectado", extra={"user_id": user_id, "connection_id": connection_id})
+
+    try:
+        await websocket.send_json({
+            "type": "hello",
+            "connection_id": connection_id,
+            "version": user_doc.get("progress", {}).get("version", 0)
+        })
+        while True:
+            raw = await websocket.receive_text()
+            await websocket.send_json(await _handle_message(user_id, connection_id, raw))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        progress_hub.disconnect(user_id, connection_id)
+        logger.info("WebSocket de progreso desconectado", extra={"user_id": user_id, "connection_id": connection_id})
@@ -0,0 +1,120 @@
+"""
+Benchmark de serialización de respuestas
+Compara, con payloads del tamaño de un usuario con el curso completo, el coste de
+serializar la respuesta de cada endpoint:
+
+    antes     isoformat a mano + jsonable_encoder + JSONResponse (json estándar)
+    ahora     jsonable_encoder + FastJSONResponse (orjson)
+    directo   FastJSONResponse con el documento tal cual (sin jsonable_encoder)
+
+Uso (desde backend/):
+    python -m scripts.benchmark_serialization [repeticiones]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from bson import Int64, ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.progress_store import to_api
+from utils.json_response import FastJSONResponse, orjson, register_bson_encoders
+
+MODULES = 12
+SUBTASKS_PER_MODULE = 8
+BADGES = 20
+
+
+def _user_doc() -> Dict:
+    now = datetime.utcnow()
+    modules = {str(m): m % 3 != 0 for m in range(1, MODULES + 1)}
+    subtasks = {
+        f"{m}-{i}": (m + i) % 2 == 0
+        for m in range(1, MODULES + 1) for i in range(SUBTASKS_PER_MODULE)
+    }
+    return {
+        "_id": ObjectId(),
+        "email": "ana@example.com",
+        "display_name": "Ana",
+        "photo_url": None,
+        "created_at": now - timedelta(days=90),
+        "last_active": now,
+        "progress": {
+            "modules": modules,
+            "subtasks": subtasks,
+            "badges": [f"badge-{i}" for i in range(BADGES)],
+            "xp": Int64(1250),
+            "last_sync": now,
+            "version": 42,
+            "clocks": {"modules": {key: now for key in modules}, "subtasks": {key: now for key in subtasks}},
+        },
+        "settings": {"theme": "dark", "language": "es"}
+    }
+
+
+def _profile(doc: Dict, convert: bool) -> Dict:
+    created_at, last_active = doc["created_at"], doc["last_active"]
+    user = {
+        "id": str(doc["_id"]),
+        "email": doc["email"],
+        "display_name": doc["display_name"],
+        "photo_url": doc["photo_url"],
+        "created_at": created_at.isoformat() if convert and isinstance(created_at, datetime) else created_at,
+        "last_active": last_active.isoformat() if convert and isinstance(last_active, datetime) else last_active,
+        "progress": to_api(doc["progress"]),
+        "settings": doc["settings"]
+    }
+    return {"success": True, "user": user}
+
+
+def _progress(doc: Dict, convert: bool) -> Dict:
+    return {"success": True, "progress": to_api(doc["progress"])}
+
+
+def _stats(doc: Dict, convert: bool) -> Dict:
+    progress = doc["progress"]
+    created_at = doc["created_at"]
+    return {
+        "success": True,
+        "stats": {
+            "modules": {"completed": sum(progress["modules"].values()), "total": MODULES},
+            "subtasks": {"completed": sum(progress["subtasks"].values()), "total": MODULES * SUBTASKS_PER_MODULE},
+            "badges": {"total": len(progress["badges"]), "list": progress["badges"]},
+            "xp": {"total": progress["xp"], "level": progress["xp"] // 100},
+            "last_sync": progress["last_sync"],
+            "member_since": created_at.isoformat() if convert and isinstance(created_at, datetime) else created_at
+        }
+    }
+
+
+ENDPOINTS: Dict[str, Callable[[Dict, bool], Dict]] = {
+    "GET /api/user/{id}": _profile,
+    "GET /api/progress/{id}": _progress,
+    "GET /api/progress/{id}/stats": _stats,
+}
+
+
+def _time(fn: Callable[[], object], number: int) -> float:
+    # Mejor de 5 rondas, en microsegundos por respuesta
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(number: int):
+    doc = _user_doc()
+    print(f"orjson: {'sí' if orjson is not None else 'no (json estándar)'}  repeticiones: {number}")
+    print(f"{'endpoint':32} {'antes':>9} {'ahora':>9} {'directo':>9} {'ahorro':>9}")
+
+    for name, build in ENDPOINTS.items():
+        before = _time(lambda: JSONResponse(jsonable_encoder(build(doc, True))), number)
+        after = _time(lambda: FastJSONResponse(jsonable_encoder(build(doc, False))), number)
+        direct = _time(lambda: FastJSONResponse(build(doc, False)), number)
+        saved = before - direct
+        print(f"{name:32} {before:8.1f}µ {after:8.1f}µ {direct:8.1f}µ {saved:8.1f}µ")
+
+
+if __name__ == "__main__":
+    # Como en server.py: "ahora" pasa ObjectId por jsonable_encoder
+    register_bson_encoders()
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
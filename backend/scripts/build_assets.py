@@ -0,0 +1,161 @@
+"""
+Build de assets estáticos
+Copia app/ y docs/ a STATIC_BUILD_DIR, añade un hash de contenido al nombre de
+style.css y de assets/js/*.js, reescribe las referencias en el HTML y en los
+imports de los módulos, y genera variantes .gz (y .br si brotli está instalado)
+
+Uso (desde backend/):
+    python -m scripts.build_assets
+"""
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from services.content_paths import APP_DIR, DOCS_DIR, STATIC_BUILD_DIR, ASSET_MANIFEST_FILE
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+# Extensiones que vale la pena comprimir
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".md", ".svg", ".txt", ".map"}
+# Por debajo de este tamaño la compresión no compensa
+MIN_COMPRESS_SIZE = 1024
+FINGERPRINT_CHARS = 10
+
+# Archivos del repo que no son parte del sitio
+IGNORED = {"vitest.config.js"}
+
+_IMPORT_RE = re.compile(r"""((?:import|export)\s[^'"]*?from\s*|import\s*\(?\s*)(['"])(\./[\w.-]+\.js)\2""")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fingerprinted_name(path: Path, data: bytes) -> str:
+    return f"{path.stem}.{_digest(data)[:FINGERPRINT_CHARS]}{path.suffix}"
+
+
+def _copy_tree(source: Path, target: Path):
+    for path in source.rglob("*"):
+        if path.is_dir() or path.name in IGNORED:
+            continue
+        destination = target / path.relative_to(source)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, destination)
+
+
+def _fingerprint_modules(js_dir: Path, renamed: Dict[str, str]):
+    """
+    Fingerprint de los módulos JS reescribiendo antes sus imports relativos,
+    para que el hash de cada módulo cubra también el de sus dependencias
+    """
+    sources = {path.name: path.read_text(encoding="utf-8") for path in sorted(js_dir.glob("*.js"))}
+    names: Dict[str, str] = {}
+
+    def resolve(name: str, visiting: Set[str]) -> Optional[str]:
+        if name in names:
+            return names[name]
+        if name not in sources or name in visiting:
+            # Ciclo o import externo: se deja el nombre original
+            return None
+        visiting.add(name)
+
+        def rewrite(match):
+            dependency = resolve(match.group(3)[2:], visiting)
+            if dependency is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}./{dependency}{match.group(2)}"
+
+        code = _IMPORT_RE.sub(rewrite, sources[name])
+        data = code.encode("utf-8")
+        fingerprinted = _fingerprinted_name(Path(name), data)
+        (js_dir / fingerprinted).write_bytes(data)
+        names[name] = fingerprinted
+        visiting.discard(name)
+        return fingerprinted
+
+    for name in sources:
+        resolve(name, set())
+
+    for name, fingerprinted in names.items():
+        renamed[f"/app/assets/js/{name}"] = f"/app/assets/js/{fingerprinted}"
+
+
+def _rewrite_html(root: Path, renamed: Dict[str, str]):
+    if not renamed:
+        return
+    pattern = re.compile("|".join(re.escape(url) for url in sorted(renamed, key=len, reverse=True)))
+    for path in root.rglob("*.html"):
+        html = path.read_text(encoding="utf-8")
+        path.write_text(pattern.sub(lambda match: renamed[match.group(0)], html), encoding="utf-8")
+
+
+def _compress(path: Path) -> Dict[str, int]:
+    data = path.read_bytes()
+    sizes = {}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        # Solo se guarda la variante si realmente ahorra bytes
+        if len(compressed) < len(data):
+            Path(f"{path}{suffix}").write_bytes(compressed)
+            sizes[suffix] = len(compressed)
+    return sizes
+
+
+def build(output_dir: Path = STATIC_BUILD_DIR) -> Dict:
+    """
+    Generar el directorio de assets listo para servir
+
+    Returns:
+        dict: manifest con los nombres fingerprint y el ETag de cada archivo
+    """
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    _copy_tree(APP_DIR, output_dir / "app")
+    _copy_tree(DOCS_DIR, output_dir / "docs")
+
+    renamed: Dict[str, str] = {}
+    assets_dir = output_dir / "app" / "assets"
+
+    stylesheet = assets_dir / "style.css"
+    if stylesheet.exists():
+        fingerprinted = _fingerprinted_name(stylesheet, stylesheet.read_bytes())
+        shutil.copy2(stylesheet, assets_dir / fingerprinted)
+        renamed["/app/assets/style.css"] = f"/app/assets/{fingerprinted}"
+
+    _fingerprint_modules(assets_dir / "js", renamed)
+    _rewrite_html(output_dir / "app", renamed)
+
+    files = {}
+    compressed = 0
+    for path in sorted(output_dir.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        relative = path.relative_to(output_dir).as_posix()
+        files[relative] = _digest(path.read_bytes())[:32]
+        if path.suffix in COMPRESSIBLE and path.stat().st_size >= MIN_COMPRESS_SIZE:
+            compressed += bool(_compress(path))
+
+    manifest = {"assets": renamed, "files": files}
+    (output_dir / ASSET_MANIFEST_FILE.name).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+    print(
+        f"✅ {len(files)} archivos en {output_dir} "
+        f"({len(renamed)} con fingerprint, {compressed} comprimidos"
+        f"{'' if brotli is not None else ', sin brotli'})"
+    )
+    return manifest
+
+
+if __name__ == "__main__":
+    build(Path(sys.argv[1]) if len(sys.argv) > 1 else STATIC_BUILD_DIR)
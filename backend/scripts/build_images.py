@@ -0,0 +1,118 @@
+"""
+Variantes responsive de las imágenes de docs/
+Genera versiones redimensionadas en AVIF, WebP y JPEG (PNG si la imagen tiene
+transparencia) con el hash del contenido en el nombre, y un manifest que usa
+services/docs_renderer.py para emitir <picture> con srcset
+
+Las variantes ya generadas se reutilizan: solo se procesan imágenes nuevas o modificadas.
+
+Uso (desde backend/):
+    python -m scripts.build_images
+
+Requiere Pillow (AVIF solo si la instalación de Pillow lo soporta)
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from services.content_paths import DOCS_DIR, IMAGE_VARIANTS_DIR, IMAGE_VARIANTS_MANIFEST
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+SOURCE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+# Anchos generados (nunca mayores que el original)
+WIDTHS = (480, 960, 1440)
+# Formato -> (extensión, opciones de guardado)
+QUALITY = {
+    "avif": (".avif", {"quality": 55}),
+    "webp": (".webp", {"quality": 78, "method": 6}),
+    "jpeg": (".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": (".png", {"optimize": True}),
+}
+HASH_CHARS = 12
+
+
+def _formats(has_alpha: bool) -> List[str]:
+    formats = []
+    if features.check("avif"):
+        formats.append("avif")
+    formats.append("webp")
+    # Fallback universal; JPEG no tiene canal alfa
+    formats.append("png" if has_alpha else "jpeg")
+    return formats
+
+
+def _source_images(docs_dir: Path, output_dir: Path) -> List[Path]:
+    return sorted(
+        path for path in docs_dir.rglob("*")
+        if path.suffix.lower() in SOURCE_EXTENSIONS
+        and output_dir not in path.parents
+    )
+
+
+def _build_variants(source: Path, digest: str, output_dir: Path) -> Dict:
+    with Image.open(source) as image:
+        image.load()
+        width, height = image.size
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        pixels = image.convert("RGBA" if has_alpha else "RGB")
+
+        widths = sorted({w for w in WIDTHS if w < width} | {min(width, WIDTHS[-1])})
+        variants = []
+        for image_format in _formats(has_alpha):
+            extension, options = QUALITY[image_format]
+            for target_width in widths:
+                target_height = round(height * target_width / width)
+                name = f"{source.stem}.{digest}.{target_width}{extension}"
+                path = output_dir / name
+                if not path.exists():
+                    resized = pixels if target_width == width else pixels.resize(
+                        (target_width, target_height), Image.Resampling.LANCZOS
+                    )
+                    resized.save(path, format=image_format.upper(), **options)
+                variants.append({"format": image_format, "width": target_width, "file": name})
+
+    return {"hash": digest, "width": width, "height": height, "variants": variants}
+
+
+def build(docs_dir: Path = DOCS_DIR, output_dir: Path = IMAGE_VARIANTS_DIR) -> Dict:
+    """
+    Generar las variantes que falten y reescribir el manifest
+
+    Returns:
+        dict: ruta relativa a docs/ -> tamaño original y variantes
+    """
+    if Image is None:
+        print("❌ Pillow no está instalado: pip install Pillow")
+        sys.exit(1)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    images = {}
+    for source in _source_images(docs_dir, output_dir):
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()[:HASH_CHARS]
+        try:
+            images[source.relative_to(docs_dir).as_posix()] = _build_variants(source, digest, output_dir)
+        except OSError as e:
+            print(f"⚠️  {source}: {e}")
+
+    # Borrar variantes de imágenes que ya no existen o cambiaron
+    referenced = {v["file"] for image in images.values() for v in image["variants"]}
+    for path in output_dir.iterdir():
+        if path.is_file() and path.name != IMAGE_VARIANTS_MANIFEST.name and path.name not in referenced:
+            path.unlink()
+
+    manifest = {"images": images}
+    (output_dir / IMAGE_VARIANTS_MANIFEST.name).write_text(
+        json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8"
+    )
+    print(f"✅ {len(images)} imágenes, {len(referenced)} variantes en {output_dir}")
+    return manifest
+
+
+if __name__ == "__main__":
+    build()
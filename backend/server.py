@@ -3,24 +3,46 @@ QA Master Path - Backend API
 FastAPI + MongoDB + JWT Authentication
 """
 import os
-from fastapi import FastAPI
+import logging
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 # Importar servicios
 from services.database import connect_to_mongo, close_mongo_connection, test_connection
+from services.tracing import setup_tracing, shutdown_tracing
+from services.logging_config import setup_logging, shutdown_logging
+from services.loop_monitor import start_loop_monitor, stop_loop_monitor
+from services.memory_diagnostics import start_memory_diagnostics
+from services.gc_monitor import start_gc_monitor, stop_gc_monitor, freeze_after_startup
+from services.content_pipeline import load_content, unload_content
+from services.progress_hub import start_progress_hub, stop_progress_hub
+from services.notes_store import NoteCodecError
+from services.content_paths import APP_DIR, DOCS_DIR, STATIC_BUILD_DIR, ASSET_MANIFEST_FILE
+from utils import PrecompressedStaticFiles, FastJSONResponse, register_bson_encoders
+from middleware.tracing import TracingMiddleware
+from middleware.request_context import RequestContextMiddleware
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Logging estructurado en cola (antes de crear la app)
+setup_logging()
+logger = logging.getLogger("qa_master_path")
+
+# jsonable_encoder con ObjectId, Decimal128 y bytes (cambia la tabla global de FastAPI)
+register_bson_encoders()
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title="QA Master Path API",
     description="Backend para la aplicación QA Master Path",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    # orjson con datetime, ObjectId y bytes nativos
+    default_response_class=FastJSONResponse
 )
 
 # Configuración CORS
@@ -49,6 +71,13 @@ app.add_middleware(
     expose_headers=["Set-Cookie"],  # Exponer header Set-Cookie
 )
 
+# Request id y log de acceso muestreado
+app.add_middleware(RequestContextMiddleware)
+
+# Trazas distribuidas (activas solo si TRACING_EXPORTER está configurado)
+# Se registra después para envolver al anterior y exponer el trace_id en sus logs
+app.add_middleware(TracingMiddleware)
+
 
 # Eventos de inicio y cierre
 @app.on_event("startup")
@@ -56,9 +85,13 @@ async def startup_event():
     """
     Ejecutar al iniciar la aplicación
     """
-    print("\n" + "="*60)
-    print("🚀 QA MASTER PATH BACKEND - INICIANDO")
-    print("="*60)
+    logger.info("QA Master Path backend iniciando")
+    
+    # Configurar trazas antes de abrir conexiones
+    setup_tracing()
+    
+    # tracemalloc (solo con MEMORY_DIAGNOSTICS_ENABLED=true)
+    start_memory_diagnostics()
     
     # Conectar a MongoDB
     await connect_to_mongo()
@@ -66,9 +99,22 @@ async def startup_event():
     # Test de conexión
     await test_connection()
     
-    print("✅ Backend iniciado correctamente")
-    print("📍 Docs: http://localhost:8001/api/docs")
-    print("="*60 + "\n")
+    # Catálogo, docs renderizados e índice de búsqueda (se recargan al cambiar)
+    await load_content()
+    
+    # Monitores de lag del event loop y pausas del GC
+    start_loop_monitor()
+    start_gc_monitor()
+    
+    # Eventos de progreso de otros workers para los WebSockets
+    start_progress_hub()
+    
+    # Debe ser el último paso: todo lo cargado hasta aquí pasa al heap permanente
+    frozen = freeze_after_startup()
+    if frozen:
+        logger.info("gc.freeze() aplicado", extra={"frozen_objects": frozen})
+    
+    logger.info("Backend iniciado correctamente", extra={"docs": "http://localhost:8001/api/docs"})
 
 
 @app.on_event("shutdown")
@@ -76,9 +122,25 @@ async def shutdown_event():
     """
     Ejecutar al cerrar la aplicación
     """
-    print("\n🔌 Cerrando conexión a MongoDB...")
+    stop_loop_monitor()
+    stop_gc_monitor()
+    await stop_progress_hub()
+    await unload_content()
+    
+    logger.info("Cerrando conexión a MongoDB")
     await close_mongo_connection()
-    print("👋 Backend cerrado correctamente\n")
+    shutdown_tracing()
+    logger.info("Backend cerrado correctamente")
+    shutdown_logging()
+
+
+@app.exception_handler(NoteCodecError)
+async def note_codec_error_handler(request: Request, exc: NoteCodecError):
+    """
+    Nota guardada con un codec que este worker no puede leer: 500 con el motivo
+    """
+    logger.error("No se pudo leer una nota: %s", exc, extra={"path": request.url.path})
+    return FastJSONResponse(status_code=500, content={"detail": str(exc)})
 
 
 # Rutas básicas
@@ -142,7 +204,14 @@ async def status():
                 "endpoints": [
                     "/api/health",
                     "/api/status",
-                    "/api/docs"
+                    "/api/docs",
+                    "/api/content/version",
+                    "/api/content/bundle",
+                    "/api/views/dashboard/{user_id}",
+                    "/api/views/roadmap/{user_id}",
+                    "/api/ws/progress/{user_id}",
+                    "/api/diagnostics/loop",
+                    "/api/diagnostics/gc"
                 ]
             }
         }
@@ -157,9 +226,40 @@ async def status():
 
 
 # Importar y registrar rutas
-from routes import user_router, progress_router
+from routes import (
+    user_router, progress_router, diagnostics_router, docs_router, search_router, content_router, views_router, ws_router
+)
 app.include_router(user_router, prefix="/api/user", tags=["Usuario"])
 app.include_router(progress_router, prefix="/api/progress", tags=["Progreso"])
+app.include_router(diagnostics_router, prefix="/api/diagnostics", tags=["Diagnóstico"])
+app.include_router(docs_router, prefix="/api/docs", tags=["Documentación"])
+app.include_router(search_router, prefix="/api", tags=["Búsqueda"])
+app.include_router(content_router, prefix="/api/content", tags=["Contenido"])
+app.include_router(views_router, prefix="/api/views", tags=["Vistas"])
+app.include_router(ws_router, prefix="/api/ws", tags=["WebSocket"])
+
+
+# Frontend estático (app/ y docs/); usa la salida de scripts/build_assets.py si existe
+# Cada directorio se monta solo si existe: un contenedor solo de API arranca sin ellos
+if os.getenv("SERVE_STATIC", "true").lower() == "true":
+    static_root = STATIC_BUILD_DIR if (STATIC_BUILD_DIR / "app").is_dir() else None
+    for name, source_dir in (("app", APP_DIR), ("docs", DOCS_DIR)):
+        directory = static_root / name if static_root else source_dir
+        if not directory.is_dir():
+            logger.warning(
+                "Directorio estático no encontrado, no se sirve",
+                extra={"mount": f"/{name}", "path": str(directory)}
+            )
+            continue
+        app.mount(
+            f"/{name}",
+            PrecompressedStaticFiles(
+                directory=directory,
+                manifest_file=ASSET_MANIFEST_FILE if static_root else None
+            ),
+            name=name
+        )
+        logger.info("Sirviendo frontend estático", extra={"mount": f"/{name}", "path": str(directory)})
 
 
 if __name__ == "__main__":
@@ -168,5 +268,6 @@ if __name__ == "__main__":
         "server:app",
         host="0.0.0.0",
         port=8001,
-        reload=True
+        reload=True,
+        access_log=False  # RequestContextMiddleware registra el acceso
     )
\ No newline at end of file
@@ -8,11 +8,17 @@ from .database import (
     get_sync_database,
     test_connection
 )
+from .tracing import setup_tracing, shutdown_tracing
+from .logging_config import setup_logging, shutdown_logging
 
 __all__ = [
     'connect_to_mongo',
     'close_mongo_connection',
     'get_database',
     'get_sync_database',
-    'test_connection'
+    'test_connection',
+    'setup_tracing',
+    'shutdown_tracing',
+    'setup_logging',
+    'shutdown_logging'
 ]
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Catálogo del curso en memoria
+Índice de módulos, subtareas, fases y XP construido desde modules.json
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from services.content_paths import MODULES_FILE
+from services.memory_diagnostics import register_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleRecord:
+    """
+    Módulo del curso (registro compacto con __slots__)
+    """
+    __slots__ = (
+        "id", "key", "phase", "title", "doc_ref", "duration", "xp",
+        "objective", "subtask_count", "topics", "tasks"
+    )
+
+    def __init__(self, data: Dict):
+        self.id: int = int(data["id"])
+        self.key: str = str(self.id)
+        self.phase: str = data.get("phase", "")
+        self.title: str = data.get("title", "")
+        self.doc_ref: Optional[str] = data.get("doc_ref")
+        self.duration: Optional[str] = data.get("duration")
+        self.xp: int = int(data.get("xp", 0))
+        self.objective: str = data.get("objective", "")
+
+        schedule = data.get("schedule") or []
+        # Las subtareas del frontend son las entradas del schedule ("<id>-<índice>")
+        self.subtask_count: int = len(schedule)
+        self.topics: Tuple[str, ...] = tuple(item.get("topic", "") for item in schedule)
+        self.tasks: Tuple[str, ...] = tuple(item.get("task", "") for item in schedule)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "phase": self.phase,
+            "title": self.title,
+            "doc_ref": self.doc_ref,
+            "duration": self.duration,
+            "xp": self.xp,
+            "subtask_count": self.subtask_count,
+        }
+
+
+class PhaseRecord:
+    """
+    Fase del curso con sus módulos y totales
+    """
+    __slots__ = ("name", "badge", "module_keys", "total_xp", "subtask_count")
+
+    def __init__(self, name: str):
+        self.name = name
+        # Los badges del frontend usan el nombre de la fase en minúsculas (core, technical...)
+        self.badge = name.lower()
+        self.module_keys: List[str] = []
+        self.total_xp = 0
+        self.subtask_count = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "badge": self.badge,
+            "modules": [int(key) for key in self.module_keys],
+            "total_xp": self.total_xp,
+            "subtask_count": self.subtask_count,
+        }
+
+
+class CourseCatalog:
+    """
+    Índice inmutable del curso: búsqueda O(1) por ID de módulo y totales precalculados
+    """
+    __slots__ = (
+        "modules", "by_key", "phases", "module_count",
+        "total_subtasks", "total_xp", "version", "source", "raw"
+    )
+
+    def __init__(self, data: Dict, version: str, source: str):
+        self.modules: Tuple[ModuleRecord, ...] = tuple(
+            sorted((ModuleRecord(item) for item in data.get("modules", [])), key=lambda m: m.id)
+        )
+        self.by_key: Dict[str, ModuleRecord] = {module.key: module for module in self.modules}
+
+        self.phases: Dict[str, PhaseRecord] = {}
+        for module in self.modules:
+            phase = self.phases.get(module.phase)
+            if phase is None:
+                phase = self.phases[module.phase] = PhaseRecord(module.phase)
+            phase.module_keys.append(module.key)
+            phase.total_xp += module.xp
+            phase.subtask_count += module.subtask_count
+
+        self.module_count = len(self.modules)
+        self.total_subtasks = sum(module.subtask_count for module in self.modules)
+        self.total_xp = sum(module.xp for module in self.modules)
+        self.version = version
+        self.source = source
+        # Documento original (lo reutilizan otros servicios de contenido)
+        self.raw = data
+
+    def get(self, module_id: str) -> Optional[ModuleRecord]:
+        """
+        Obtener un módulo por su ID ("1", "2", ...)
+        """
+        return self.by_key.get(str(module_id))
+
+    def has_subtask(self, module_id: str, task_index: int) -> bool:
+        """
+        Indica si el módulo tiene una subtarea con ese índice
+        """
+        module = self.by_key.get(str(module_id))
+        return module is not None and 0 <= task_index < module.subtask_count
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "module_count": self.module_count,
+            "total_subtasks": self.total_subtasks,
+            "total_xp": self.total_xp,
+            "phases": [phase.to_dict() for phase in self.phases.values()],
+            "modules": [module.to_dict() for module in self.modules],
+        }
+
+
+def load_catalog(path: Path = MODULES_FILE) -> CourseCatalog:
+    """
+    Leer modules.json y construir el catálogo
+
+    Returns:
+        CourseCatalog: Catálogo indexado
+    """
+    raw = Path(path).read_bytes()
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    return CourseCatalog(json.loads(raw), version=version, source=str(path))
+
+
+_catalog: Optional[CourseCatalog] = None
+
+
+def get_catalog() -> Optional[CourseCatalog]:
+    """
+    Catálogo actual (None si aún no se ha cargado)
+    """
+    return _catalog
+
+
+def set_catalog(catalog: Optional[CourseCatalog]):
+    """
+    Reemplazar el catálogo actual (el cambio de referencia es atómico)
+    """
+    global _catalog
+    _catalog = catalog
+
+
+async def reload_catalog(path: Path = MODULES_FILE) -> Optional[CourseCatalog]:
+    """
+    Recargar el catálogo desde disco sin bloquear el event loop
+
+    Si el archivo es inválido se conserva el catálogo anterior.
+    """
+    try:
+        catalog = await run_in_threadpool(load_catalog, path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error("No se pudo cargar el catálogo: %s", e, extra={"path": str(path)})
+        return _catalog
+
+    set_catalog(catalog)
+    logger.info(
+        "Catálogo cargado",
+        extra={
+            "version": catalog.version,
+            "modules": catalog.module_count,
+            "subtasks": catalog.total_subtasks,
+        }
+    )
+    return catalog
+
+
+register_cache("catalog.modules", lambda: _catalog.module_count if _catalog else 0)
@@ -0,0 +1,90 @@
+"""
+Bundle de contenido
+Un único JSON versionado con modules.json, manifest.json y todos los docs renderizados,
+precomprimido una vez por cada cambio de contenido
+"""
+import gzip
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from services.catalog import CourseCatalog
+from services.docs_renderer import RenderedDoc
+from services.memory_diagnostics import register_cache
+
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 9
+
+
+class ContentBundle:
+    """
+    Bundle serializado y comprimido, identificado por el hash de su contenido
+    """
+    __slots__ = ("version", "raw", "gzip", "built_at")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        # mtime=0 para que el gzip sea reproducible con el mismo contenido
+        self.gzip = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        self.built_at = time.time()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    @property
+    def url(self) -> str:
+        return f"/api/content/bundle?v={self.version}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "url": self.url,
+            "size": len(self.raw),
+            "gzip_size": len(self.gzip),
+        }
+
+
+def build_bundle(catalog: Optional[CourseCatalog], manifest: Dict, docs: Dict[str, RenderedDoc]) -> ContentBundle:
+    """
+    Serializar y comprimir el contenido (se ejecuta en el threadpool)
+    """
+    payload = {
+        "modules": catalog.raw if catalog is not None else None,
+        "manifest": manifest,
+        "docs": {doc_id: docs[doc_id].to_dict() for doc_id in sorted(docs)},
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return ContentBundle(raw)
+
+
+_bundle: Optional[ContentBundle] = None
+
+
+def get_bundle() -> Optional[ContentBundle]:
+    """
+    Bundle actual (None hasta la primera carga de contenido)
+    """
+    return _bundle
+
+
+async def rebuild_bundle(catalog: Optional[CourseCatalog], manifest: Dict, docs: Dict[str, RenderedDoc]):
+    """
+    Reconstruir el bundle fuera del event loop y reemplazar el actual si cambió
+    """
+    global _bundle
+
+    bundle = await run_in_threadpool(build_bundle, catalog, manifest, docs)
+    if _bundle is not None and _bundle.version == bundle.version:
+        return
+    _bundle = bundle
+    logger.info("Bundle de contenido construido", extra=bundle.to_dict())
+
+
+register_cache("content.bundle_bytes", lambda: len(_bundle.raw) + len(_bundle.gzip) if _bundle else 0)
@@ -0,0 +1,32 @@
+"""
+Rutas del contenido del curso
+Ubicación de modules.json, el manifest de docs y los archivos markdown
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Raíz del proyecto (contiene app/ y docs/)
+PROJECT_ROOT = Path(os.getenv("PROJECT_ROOT", str(BACKEND_DIR.parent)))
+
+APP_DIR = PROJECT_ROOT / "app"
+DOCS_DIR = PROJECT_ROOT / "docs"
+
+MODULES_FILE = Path(os.getenv("MODULES_FILE", str(APP_DIR / "assets" / "data" / "modules.json")))
+DOCS_MANIFEST_FILE = DOCS_DIR / "manifest.json"
+DOCS_CONTENT_DIR = DOCS_DIR / "content"
+
+# Salida del build de assets estáticos (fingerprint + .gz/.br)
+STATIC_BUILD_DIR = Path(os.getenv("STATIC_BUILD_DIR", str(PROJECT_ROOT / "build")))
+ASSET_MANIFEST_FILE = STATIC_BUILD_DIR / "asset-manifest.json"
+
+# Variantes redimensionadas de las imágenes de docs/ (scripts/build_images.py)
+IMAGE_VARIANTS_DIR = DOCS_DIR / "images" / "variants"
+IMAGE_VARIANTS_MANIFEST = IMAGE_VARIANTS_DIR / "manifest.json"
+IMAGE_VARIANTS_URL = "/docs/images/variants"
@@ -0,0 +1,53 @@
+"""
+Pipeline de contenido
+Orquesta la carga y recarga de todo lo derivado de modules.json y docs/
+"""
+from services.catalog import get_catalog, reload_catalog
+from services.content_bundle import rebuild_bundle
+from services.content_paths import MODULES_FILE, DOCS_MANIFEST_FILE, DOCS_CONTENT_DIR, IMAGE_VARIANTS_MANIFEST
+from services.content_watcher import content_watcher
+from services.docs_renderer import docs_cache
+from services.search_index import index_catalog, index_docs
+from services.suggest import rebuild_suggest_trie
+
+
+async def refresh_catalog():
+    """
+    Recargar el catálogo y lo que depende de él
+    """
+    catalog = await reload_catalog()
+    await index_catalog(catalog)
+    await rebuild_suggest_trie(catalog, docs_cache.manifest)
+    await rebuild_bundle(catalog, docs_cache.manifest, docs_cache.docs)
+
+
+async def refresh_docs():
+    """
+    Re-renderizar los docs modificados y actualizar lo que depende de ellos
+    """
+    await docs_cache.rebuild()
+    await index_docs(docs_cache.manifest)
+    await rebuild_suggest_trie(get_catalog(), docs_cache.manifest)
+    await rebuild_bundle(get_catalog(), docs_cache.manifest, docs_cache.docs)
+
+
+async def load_content():
+    """
+    Cargar todo el contenido al arrancar y registrar la recarga por cambios
+    """
+    await refresh_catalog()
+    await refresh_docs()
+
+    content_watcher.watch("catalog", [MODULES_FILE], refresh_catalog)
+    content_watcher.watch(
+        "docs", [DOCS_MANIFEST_FILE, DOCS_CONTENT_DIR, IMAGE_VARIANTS_MANIFEST], refresh_docs, pattern="*.md"
+    )
+    content_watcher.start()
+
+
+async def unload_content():
+    """
+    Detener la vigilancia y liberar el pool de renderizado
+    """
+    await content_watcher.stop()
+    docs_cache.shutdown()
@@ -0,0 +1,123 @@
+"""
+Vigilancia de archivos de contenido
+Detecta cambios de mtime por sondeo y dispara la recarga de los servicios registrados
+"""
+import asyncio
+import inspect
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+# Cargar variables de entorno
+load_dotenv()
+
+CONTENT_WATCH_ENABLED = os.getenv("CONTENT_WATCH_ENABLED", "true").lower() == "true"
+CONTENT_WATCH_INTERVAL = float(os.getenv("CONTENT_WATCH_INTERVAL", "2.0"))
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Union[None, Awaitable[None]]]
+Signature = Tuple[Tuple[str, float, int], ...]
+
+
+def _signature(paths: List[Path], pattern: Optional[str]) -> Signature:
+    """
+    Firma (ruta, mtime, tamaño) de los archivos vigilados
+    """
+    entries = []
+    for path in paths:
+        files = sorted(path.rglob(pattern)) if pattern and path.is_dir() else [path]
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            entries.append((str(file_path), stat.st_mtime, stat.st_size))
+    return tuple(entries)
+
+
+class _Watch:
+    __slots__ = ("name", "paths", "pattern", "callback", "signature")
+
+    def __init__(self, name: str, paths: List[Path], pattern: Optional[str], callback: Callback):
+        self.name = name
+        self.paths = paths
+        self.pattern = pattern
+        self.callback = callback
+        self.signature: Signature = _signature(paths, pattern)
+
+
+class ContentWatcher:
+    """
+    Sondeo periódico de mtimes (sin dependencias de inotify)
+
+    Cada vigilancia tiene un nombre, una lista de archivos o directorios y un
+    callback síncrono o asíncrono que se ejecuta cuando cambia la firma.
+    """
+
+    def __init__(self, interval: float = CONTENT_WATCH_INTERVAL):
+        self.interval = interval
+        self._watches: Dict[str, _Watch] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(self, name: str, paths: List[Path], callback: Callback, pattern: Optional[str] = None):
+        """
+        Registrar una vigilancia
+
+        Args:
+            name: Identificador de la vigilancia
+            paths: Archivos o directorios a vigilar
+            callback: Función a ejecutar cuando cambian
+            pattern: Patrón glob para directorios (ej: "*.md")
+        """
+        self._watches[name] = _Watch(name, list(paths), pattern, callback)
+
+    def start(self):
+        """
+        Iniciar el sondeo en segundo plano
+        """
+        if self._task is None and CONTENT_WATCH_ENABLED:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Detener el sondeo
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def check(self):
+        """
+        Revisar todas las vigilancias una vez
+        """
+        for watch in list(self._watches.values()):
+            # rglob/stat fuera del event loop
+            signature = await run_in_threadpool(_signature, watch.paths, watch.pattern)
+            if signature == watch.signature:
+                continue
+
+            watch.signature = signature
+            logger.info("Cambio de contenido detectado", extra={"watch": watch.name})
+            try:
+                result = watch.callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Error recargando contenido", extra={"watch": watch.name})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+
+content_watcher = ContentWatcher()
@@ -3,17 +3,22 @@ Servicio de conexión a MongoDB
 Maneja la conexión a la base de datos y proporciona acceso a las colecciones
 """
 import os
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError
 from dotenv import load_dotenv
 
+from services.tracing import mongo_command_tracer
+
 # Cargar variables de entorno
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017/")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "qa_master_path")
 
+logger = logging.getLogger(__name__)
+
 # Cliente MongoDB asíncrono (para FastAPI)
 motor_client: AsyncIOMotorClient = None
 motor_db = None
@@ -30,11 +35,12 @@ async def connect_to_mongo():
     global motor_client, motor_db
     
     try:
-        print(f"🔌 Conectando a MongoDB: {MONGO_URL}")
+        logger.info("Conectando a MongoDB", extra={"mongo_url": MONGO_URL})
         motor_client = AsyncIOMotorClient(
             MONGO_URL,
             serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000
+            connectTimeoutMS=5000,
+            event_listeners=[mongo_command_tracer]
         )
         
         # Verificar conexión
@@ -44,11 +50,11 @@ async def connect_to_mongo():
         # Crear índices
         await create_indexes()
         
-        print(f"✅ MongoDB conectado exitosamente: {MONGO_DB_NAME}")
+        logger.info("MongoDB conectado exitosamente", extra={"db_name": MONGO_DB_NAME})
         return motor_db
         
     except Exception as e:
-        print(f"❌ Error conectando a MongoDB: {e}")
+        logger.error("Error conectando a MongoDB: %s", e)
         raise
 
 
@@ -59,7 +65,7 @@ async def close_mongo_connection():
     global motor_client
     if motor_client:
         motor_client.close()
-        print("🔌 Conexión MongoDB cerrada")
+        logger.info("Conexión MongoDB cerrada")
 
 
 async def create_indexes():
@@ -69,7 +75,7 @@ async def create_indexes():
     global motor_db
     
     if motor_db is None:
-        print("⚠️ motor_db es None, no se pueden crear índices")
+        logger.warning("motor_db es None, no se pueden crear índices")
         return
     
     try:
@@ -83,10 +89,19 @@ async def create_indexes():
         await users_collection.create_index([("created_at", 1)])
         await users_collection.create_index([("last_active", 1)])
         
-        print("✅ Índices MongoDB creados correctamente")
+        # Notas: una por usuario y módulo
+        await motor_db.notes.create_index([("user_id", 1), ("module_id", 1)], unique=True)
+        # Búsqueda en las notas del usuario (multikey sobre los términos)
+        await motor_db.notes.create_index([("user_id", 1), ("terms", 1)])
+        
+        # Claves de idempotencia con caducidad (TTL)
+        from services.idempotency import create_idempotency_indexes
+        await create_idempotency_indexes(motor_db)
+        
+        logger.info("Índices MongoDB creados correctamente")
         
     except Exception as e:
-        print(f"⚠️ Error creando índices: {e}")
+        logger.warning("Error creando índices: %s", e)
 
 
 def get_database():
@@ -126,17 +141,18 @@ async def test_connection():
         # Obtener información del servidor
         server_info = await motor_client.server_info()
         
-        print("\n" + "="*50)
-        print("✅ TEST DE CONEXIÓN MONGODB")
-        print("="*50)
-        print(f"📍 URL: {MONGO_URL}")
-        print(f"📊 Base de datos: {MONGO_DB_NAME}")
-        print(f"🏷️ Versión MongoDB: {server_info.get('version')}")
-        print(f"📋 Colecciones: {await motor_db.list_collection_names()}")
-        print("="*50 + "\n")
+        logger.info(
+            "Test de conexión MongoDB exitoso",
+            extra={
+                "mongo_url": MONGO_URL,
+                "db_name": MONGO_DB_NAME,
+                "mongo_version": server_info.get("version"),
+                "collections": await motor_db.list_collection_names()
+            }
+        )
         
         return True
         
     except Exception as e:
-        print(f"\n❌ ERROR EN TEST DE CONEXIÓN: {e}\n")
+        logger.error("Error en test de conexión MongoDB: %s", e)
         return False
\ No newline at end of file
@@ -0,0 +1,367 @@
+"""
+Renderizado de la base de conocimiento
+Convierte los markdown de docs/manifest.json a HTML una sola vez y los cachea en memoria
+"""
+import asyncio
+import hashlib
+import html as html_lib
+import json
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from markdown_it import MarkdownIt
+from starlette.concurrency import run_in_threadpool
+
+from services.content_paths import (
+    DOCS_DIR, DOCS_CONTENT_DIR, DOCS_MANIFEST_FILE, IMAGE_VARIANTS_MANIFEST, IMAGE_VARIANTS_URL
+)
+from services.memory_diagnostics import register_cache
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Procesos para renderizar; 0 = renderizar en el threadpool del proceso actual
+DOCS_RENDER_WORKERS = int(os.getenv("DOCS_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+logger = logging.getLogger(__name__)
+
+# Mismas opciones que marked en docs-enhanced.js (gfm + breaks + HTML embebido)
+_markdown = MarkdownIt("commonmark", {"html": True, "breaks": True}).enable(["table", "strikethrough"])
+
+# Niveles que docs-enhanced.js muestra en la tabla de contenidos
+TOC_LEVELS = ("h2", "h3")
+
+# Ancho de la columna de contenido de knowledge-base.html
+IMAGE_SIZES = "(max-width: 768px) 100vw, 768px"
+# Ancho preferido para el src de respaldo (navegadores sin srcset)
+IMAGE_FALLBACK_WIDTH = 960
+
+_image_variants: Tuple[Optional[float], Dict] = (None, {})
+
+
+def load_image_variants(manifest_file: Path = IMAGE_VARIANTS_MANIFEST) -> Dict:
+    """
+    Variantes generadas por scripts/build_images.py (se relee solo si cambió el mtime)
+
+    Returns:
+        dict: ruta relativa a docs/ -> {width, height, variants}
+    """
+    global _image_variants
+
+    try:
+        mtime = Path(manifest_file).stat().st_mtime
+    except OSError:
+        return {}
+    if _image_variants[0] != mtime:
+        images = json.loads(Path(manifest_file).read_text(encoding="utf-8")).get("images", {})
+        _image_variants = (mtime, images)
+    return _image_variants[1]
+
+
+def resolve_doc_image(src: str, doc_path: Optional[Path]) -> Optional[str]:
+    """
+    Ruta relativa a docs/ de una imagen referenciada en un markdown
+
+    Acepta /app/docs/..., /docs/... y rutas relativas al archivo; las URLs externas devuelven None.
+    """
+    if "://" in src or src.startswith(("data:", "//")):
+        return None
+    path = src.split("#", 1)[0].split("?", 1)[0]
+
+    for prefix in ("/app/docs/", "/docs/"):
+        if path.startswith(prefix):
+            candidate = DOCS_DIR / path[len(prefix):]
+            break
+    else:
+        if path.startswith("/") or doc_path is None:
+            return None
+        candidate = Path(doc_path).parent / path
+
+    try:
+        return candidate.resolve().relative_to(DOCS_DIR.resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def picture_html(image: Dict, alt: str, title: Optional[str] = None) -> str:
+    """
+    <picture> con un <source> por formato moderno y un <img> de respaldo con srcset
+    """
+    by_format: Dict[str, List[Dict]] = {}
+    for variant in image["variants"]:
+        by_format.setdefault(variant["format"], []).append(variant)
+
+    def srcset(variants: List[Dict]) -> str:
+        return ", ".join(f"{IMAGE_VARIANTS_URL}/{v['file']} {v['width']}w" for v in variants)
+
+    *modern, fallback_format = list(by_format)
+    fallback = by_format[fallback_format]
+    default = max(
+        (v for v in fallback if v["width"] <= IMAGE_FALLBACK_WIDTH),
+        key=lambda v: v["width"],
+        default=fallback[0]
+    )
+
+    parts = ["<picture>"]
+    for image_format in modern:
+        parts.append(
+            f'<source type="image/{image_format}" srcset="{srcset(by_format[image_format])}" sizes="{IMAGE_SIZES}">'
+        )
+    title_attr = f' title="{html_lib.escape(title)}"' if title else ""
+    parts.append(
+        f'<img src="{IMAGE_VARIANTS_URL}/{default["file"]}" srcset="{srcset(fallback)}" sizes="{IMAGE_SIZES}" '
+        f'alt="{html_lib.escape(alt)}"{title_attr} width="{image["width"]}" height="{image["height"]}" '
+        f'loading="lazy" decoding="async">'
+    )
+    parts.append("</picture>")
+    return "".join(parts)
+
+
+def _render_image(self, tokens, idx, options, env):
+    token = tokens[idx]
+    images = env.get("images") or {}
+    relative = resolve_doc_image(token.attrGet("src") or "", env.get("doc_path"))
+    image = images.get(relative) if relative else None
+    if image is None or not image.get("variants"):
+        return self.image(tokens, idx, options, env)
+
+    alt = self.renderInlineAsText(token.children or [], options, env)
+    return picture_html(image, alt, token.attrGet("title"))
+
+
+_markdown.add_render_rule("image", _render_image)
+
+
+def slugify_heading(text: str) -> str:
+    """
+    ID de encabezado compatible con generateTableOfContents() del frontend
+    """
+    return re.sub(r"[^a-z0-9]+", "-", text.lower())
+
+
+def render_markdown(source: str, doc_path: Optional[Path] = None, images: Optional[Dict] = None) -> Tuple[str, List[Dict]]:
+    """
+    Renderizar markdown a HTML y extraer la tabla de contenidos
+
+    Las imágenes con variantes en images se emiten como <picture> con srcset.
+
+    Returns:
+        tuple: (html, toc) donde toc es una lista de {level, text, id}
+    """
+    tokens = _markdown.parse(source)
+    toc = []
+
+    for index, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+
+        inline = tokens[index + 1]
+        text = "".join(
+            child.content for child in (inline.children or [])
+            if child.type in ("text", "code_inline")
+        )
+        heading_id = slugify_heading(text)
+        token.attrSet("id", heading_id)
+
+        if token.tag in TOC_LEVELS:
+            toc.append({"level": int(token.tag[1]), "text": text, "id": heading_id})
+
+    html = _markdown.renderer.render(tokens, _markdown.options, {"doc_path": doc_path, "images": images})
+    return html, toc
+
+
+def render_doc_file(path: str) -> Dict:
+    """
+    Renderizar un archivo markdown (se ejecuta en el pool de procesos)
+
+    Returns:
+        dict: html, toc y content_hash (hash del HTML generado, que incluye las variantes de imagen)
+    """
+    raw = Path(path).read_bytes()
+    html, toc = render_markdown(raw.decode("utf-8"), doc_path=Path(path), images=load_image_variants())
+    return {
+        "html": html,
+        "toc": toc,
+        "content_hash": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+    }
+
+
+def scan_manifest(manifest_file: Path, content_dir: Path) -> Tuple[Dict, List[Tuple], Optional[float]]:
+    """
+    Leer el manifest y el mtime de cada documento (E/S de disco: se ejecuta en el threadpool)
+
+    Returns:
+        tuple: manifest, entradas (block_id, entry, path, mtime) y mtime de las variantes de imagen
+    """
+    manifest = json.loads(Path(manifest_file).read_text(encoding="utf-8"))
+
+    entries = []
+    for block in manifest.get("blocks", []):
+        for entry in block.get("docs", []):
+            path = Path(content_dir) / entry["file"]
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                logger.warning("Documento del manifest no encontrado", extra={"doc_id": entry["id"], "file": str(path)})
+                continue
+            entries.append((block["id"], entry, path, mtime))
+
+    try:
+        images_mtime = IMAGE_VARIANTS_MANIFEST.stat().st_mtime
+    except OSError:
+        images_mtime = None
+
+    return manifest, entries, images_mtime
+
+
+class RenderedDoc:
+    """
+    Documento renderizado y cacheado
+    """
+    __slots__ = ("id", "title", "block_id", "file", "evidence", "html", "toc", "content_hash", "etag", "mtime")
+
+    def __init__(self, entry: Dict, block_id: str, rendered: Dict, mtime: float):
+        self.id: str = entry["id"]
+        self.title: str = entry.get("title", "")
+        self.block_id = block_id
+        self.file: str = entry["file"]
+        self.evidence: Optional[str] = entry.get("evidence")
+        self.html: str = rendered["html"]
+        self.toc: List[Dict] = rendered["toc"]
+        self.content_hash: str = rendered["content_hash"]
+        self.mtime = mtime
+        # El ETag cubre el contenido y los metadatos del manifest que viajan en la respuesta
+        metadata = f"{self.content_hash}|{self.id}|{self.title}|{block_id}|{self.evidence}"
+        self.etag: str = hashlib.sha256(metadata.encode("utf-8")).hexdigest()[:32]
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "block": self.block_id,
+            "file": self.file,
+            "evidence": self.evidence,
+            "html": self.html,
+            "toc": self.toc,
+            "etag": self.etag,
+        }
+
+
+class DocsCache:
+    """
+    Caché de documentos renderizados indexada por el ID del manifest
+
+    Cada reconstrucción solo re-renderiza los archivos cuyo mtime cambió y
+    reemplaza el diccionario completo de una vez.
+    """
+
+    def __init__(self):
+        self.docs: Dict[str, RenderedDoc] = {}
+        self.manifest: Dict = {}
+        self._executor: Optional[Executor] = None
+        self._images_mtime: Optional[float] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if DOCS_RENDER_WORKERS <= 0:
+            return None
+        if self._executor is None:
+            # spawn: el proceso ya tiene hilos (listener de logs, Motor) y fork no es seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=DOCS_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _render(self, path: Path) -> Dict:
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, render_doc_file, str(path))
+            except BrokenProcessPool:
+                logger.warning("Pool de renderizado caído, renderizando en el proceso actual")
+                self.shutdown()
+        return await run_in_threadpool(render_doc_file, str(path))
+
+    async def _render_or_skip(self, doc_id: str, path: Path) -> Optional[Dict]:
+        # Un documento ilegible (UTF-8 inválido, borrado a mitad de la reconstrucción)
+        # no debe impedir el arranque ni descartar el resto
+        try:
+            return await self._render(path)
+        except Exception:
+            logger.exception("No se pudo renderizar el documento", extra={"doc_id": doc_id, "file": str(path)})
+            return None
+
+    async def rebuild(self, manifest_file: Path = DOCS_MANIFEST_FILE, content_dir: Path = DOCS_CONTENT_DIR):
+        """
+        Re-renderizar los documentos nuevos o modificados del manifest
+
+        Si el manifest es inválido se conserva la caché anterior (vacía en el arranque).
+        Un documento que no se puede renderizar conserva su versión anterior o se omite.
+        """
+        try:
+            manifest, entries, images_mtime = await run_in_threadpool(scan_manifest, manifest_file, content_dir)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.error("No se pudo leer el manifest de documentos: %s", e, extra={"path": str(manifest_file)})
+            return
+
+        # Si cambiaron las variantes de imagen se re-renderiza todo
+        current = self.docs if images_mtime == self._images_mtime else {}
+
+        pending = [
+            (block_id, entry, path, mtime)
+            for block_id, entry, path, mtime in entries
+            if entry["id"] not in current
+            or current[entry["id"]].mtime != mtime
+            or current[entry["id"]].file != entry["file"]
+        ]
+        rendered = await asyncio.gather(*(self._render_or_skip(entry["id"], path) for _, entry, path, _ in pending))
+        fresh = {
+            entry["id"]: RenderedDoc(entry, block_id, result, mtime)
+            for (block_id, entry, _, mtime), result in zip(pending, rendered)
+            if result is not None
+        }
+
+        docs = {}
+        for block_id, entry, _, mtime in entries:
+            doc = fresh.get(entry["id"]) or current.get(entry["id"])
+            if doc is None:
+                continue
+            if (doc.title, doc.evidence, doc.block_id) != (entry.get("title", ""), entry.get("evidence"), block_id):
+                # Solo cambió el manifest: conservar el HTML ya renderizado
+                rendered = {"html": doc.html, "toc": doc.toc, "content_hash": doc.content_hash}
+                doc = RenderedDoc(entry, block_id, rendered, doc.mtime)
+            docs[entry["id"]] = doc
+
+        self.manifest = manifest
+        self.docs = docs
+        self._images_mtime = images_mtime
+        logger.info(
+            "Documentos renderizados",
+            extra={"rendered": len(fresh), "failed": len(pending) - len(fresh), "total": len(docs)}
+        )
+
+    def get(self, doc_id: str) -> Optional[RenderedDoc]:
+        """
+        Obtener un documento renderizado por ID
+        """
+        return self.docs.get(doc_id)
+
+    def shutdown(self):
+        """
+        Cerrar el pool de procesos
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+docs_cache = DocsCache()
+
+register_cache("docs.rendered", lambda: len(docs_cache.docs))
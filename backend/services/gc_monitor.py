@@ -0,0 +1,149 @@
+"""
+Monitor del recolector de basura
+Registra colecciones y pausas por generación y permite congelar el heap tras el arranque
+"""
+import gc
+import os
+import time
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from utils.metrics import Histogram
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Mover al heap permanente todo lo cargado en el arranque (rutas, modelos, catálogo)
+# para que las colecciones de generación 2 no lo recorran
+GC_FREEZE_AFTER_STARTUP = os.getenv("GC_FREEZE_AFTER_STARTUP", "false").lower() == "true"
+
+# Las pausas del GC suelen ser de micro a milisegundos
+GC_PAUSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class GCMonitor:
+    """
+    Callback de gc.callbacks que mide la duración de cada colección
+    """
+
+    def __init__(self):
+        self.pauses = [Histogram(GC_PAUSE_BUCKETS) for _ in range(3)]
+        self.collected = [0, 0, 0]
+        self.uncollectable = [0, 0, 0]
+        self._started_at = None
+        self._installed = False
+
+    def _callback(self, phase: str, info: Dict):
+        if phase == "start":
+            self._started_at = time.perf_counter()
+            return
+
+        if self._started_at is None:
+            return
+
+        generation = info["generation"]
+        self.pauses[generation].observe(time.perf_counter() - self._started_at)
+        self.collected[generation] += info["collected"]
+        self.uncollectable[generation] += info["uncollectable"]
+        self._started_at = None
+
+    def install(self):
+        """
+        Registrar el callback en el GC
+        """
+        if not self._installed:
+            gc.callbacks.append(self._callback)
+            self._installed = True
+
+    def uninstall(self):
+        """
+        Quitar el callback del GC
+        """
+        if self._installed:
+            gc.callbacks.remove(self._callback)
+            self._installed = False
+
+    def snapshot(self) -> Dict:
+        """
+        Métricas por generación
+        """
+        generations = []
+        for generation, histogram in enumerate(self.pauses):
+            pauses = histogram.snapshot()
+            generations.append({
+                "generation": generation,
+                "collections": pauses["count"],
+                "collected": self.collected[generation],
+                "uncollectable": self.uncollectable[generation],
+                "pause_seconds": pauses,
+            })
+
+        return {
+            "enabled": self._installed,
+            "generations": generations,
+            "thresholds": gc.get_threshold(),
+            "counts": gc.get_count(),
+            "frozen_objects": gc.get_freeze_count(),
+        }
+
+
+gc_monitor = GCMonitor()
+
+
+def start_gc_monitor():
+    """
+    Iniciar la instrumentación del GC
+    """
+    gc_monitor.install()
+
+
+def stop_gc_monitor():
+    """
+    Detener la instrumentación del GC
+    """
+    gc_monitor.uninstall()
+
+
+def freeze_before_fork() -> int:
+    """
+    Congelar el heap del proceso maestro justo antes de crear un worker
+
+    Los objetos congelados no se recorren en las colecciones de los workers, así que sus
+    páginas siguen compartidas con el maestro (copy-on-write) en lugar de copiarse.
+
+    Returns:
+        int: Número de objetos congelados
+    """
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def enable_after_fork():
+    """
+    Reactivar el GC en el worker recién creado
+    """
+    gc.enable()
+
+
+def freeze_after_startup() -> int:
+    """
+    Congelar los objetos del arranque si GC_FREEZE_AFTER_STARTUP está habilitado
+
+    gc.freeze() saca los objetos actuales de las colecciones de generación 2,
+    de modo que el GC no vuelve a recorrerlos: pausas de generación 2 más cortas.
+
+    Se llama desde el evento startup, que corre en cada worker después del fork:
+    congela lo que carga el propio worker (catálogo, docs, índice). Para compartir
+    entre workers lo importado por el maestro se usa gunicorn.conf.py
+    (freeze_before_fork); lo congelado allí no lo recorre este gc.collect().
+
+    Returns:
+        int: Número de objetos congelados (0 si la opción está deshabilitada)
+    """
+    if not GC_FREEZE_AFTER_STARTUP:
+        return 0
+
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
@@ -0,0 +1,183 @@
+"""
+Claves de idempotencia
+Las escrituras no idempotentes (XP, badges, sync, replay) aceptan la cabecera
+Idempotency-Key: la primera petición con una clave se ejecuta y su respuesta se guarda
+en la colección idempotency_keys (índice TTL); los reintentos con la misma clave y el
+mismo cuerpo reciben esa respuesta sin volver a escribir
+
+Las claves son por usuario: dos usuarios pueden usar la misma clave sin chocar.
+"""
+import asyncio
+import contextlib
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from services.database import get_database
+from utils.json_response import FastJSONResponse
+
+# Cargar variables de entorno
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Tiempo que se conserva una respuesta para reintentos
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Una petición en curso que no renueva su reserva en este tiempo (worker caído) se puede
+# retomar; mientras el endpoint corre, la reserva se renueva cada tercio de este tiempo
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "30"))
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def create_idempotency_indexes(db):
+    """
+    Índice TTL: MongoDB borra las claves pasado IDEMPOTENCY_TTL_SECONDS
+    """
+    await db.idempotency_keys.create_index([("created_at", 1)], expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS)
+
+
+def _fingerprint(payload: dict) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+async def _acquire(db, record_id: str, fingerprint: str) -> Optional[dict]:
+    """
+    Reservar la clave para esta petición
+
+    Returns:
+        dict: registro existente ya completado (reintento); None si la petición debe ejecutarse
+    """
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": record_id,
+            "fingerprint": fingerprint,
+            "status": "pending",
+            "created_at": now,
+            "locked_at": now
+        })
+        return None
+    except DuplicateKeyError:
+        pass
+
+    record = await db.idempotency_keys.find_one({"_id": record_id})
+    if record is None:
+        # Expiró entre el insert y la lectura
+        return await _acquire(db, record_id, fingerprint)
+
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key ya usada con otra petición"
+        )
+
+    if record["status"] == "done":
+        return record
+
+    # En curso: solo se retoma si el worker que la reservó dejó de renovar la reserva
+    taken = await db.idempotency_keys.find_one_and_update(
+        {
+            "_id": record_id,
+            "status": "pending",
+            "locked_at": {"$lt": now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}
+        },
+        {"$set": {"locked_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if taken is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya hay una petición en curso con esta Idempotency-Key"
+        )
+    return None
+
+
+async def _renew_lock(db, record_id: str):
+    # Mantener la reserva mientras el endpoint sigue ejecutándose (/sync o /replay largos)
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_LOCK_SECONDS / 3)
+        try:
+            await db.idempotency_keys.update_one(
+                {"_id": record_id, "status": "pending"},
+                {"$set": {"locked_at": datetime.utcnow()}}
+            )
+        except PyMongoError as e:
+            logger.warning("No se pudo renovar la Idempotency-Key %s: %s", record_id, e)
+
+
+def idempotent(scope: str):
+    """
+    Decorador de endpoint: añade la cabecera opcional Idempotency-Key
+
+    Sin cabecera el endpoint se ejecuta como siempre. Con ella, los reintentos reciben la
+    respuesta guardada (cabecera Idempotent-Replayed: true). Si el endpoint falla, la clave
+    se libera para que el reintento se ejecute de nuevo.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, idempotency_key: Optional[str] = None, **kwargs):
+            if idempotency_key is None:
+                return await endpoint(*args, **kwargs)
+
+            if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Idempotency-Key debe tener entre 1 y {IDEMPOTENCY_KEY_MAX_LENGTH} caracteres"
+                )
+
+            db = get_database()
+            user_id = getattr(kwargs.get("data"), "user_id", None)
+            record_id = f"{scope}:{user_id}:{idempotency_key}"
+            record = await _acquire(db, record_id, _fingerprint(kwargs))
+            if record is not None:
+                return FastJSONResponse(content=json.loads(record["response"]), headers={REPLAYED_HEADER: "true"})
+
+            renewal = asyncio.create_task(_renew_lock(db, record_id))
+            try:
+                response = await endpoint(*args, **kwargs)
+            except Exception:
+                await db.idempotency_keys.delete_one({"_id": record_id, "status": "pending"})
+                raise
+            finally:
+                renewal.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await renewal
+
+            await db.idempotency_keys.update_one(
+                {"_id": record_id},
+                {"$set": {
+                    "status": "done",
+                    "response": json.dumps(jsonable_encoder(response), ensure_ascii=False)
+                }}
+            )
+            return response
+
+        # FastAPI lee la firma: la del endpoint más la cabecera
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(
+                "idempotency_key",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Header(None, alias="Idempotency-Key"),
+                annotation=Optional[str]
+            )
+        ])
+        return wrapper
+
+    return decorator
@@ -0,0 +1,161 @@
+"""
+Configuración de logging estructurado
+Logs JSON con request id, escritos desde un hilo propio mediante QueueHandler
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from opentelemetry import trace
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# json | text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# ID del request en curso (lo fija RequestContextMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos propios de LogRecord: todo lo demás se considera un campo extra
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "trace_id", "span_id"
+}
+
+# Loggers de uvicorn que se redirigen a la cola
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Añade request_id y trace_id al registro en el hilo que emite el log
+
+    Debe ejecutarse antes de encolar: los contextvars no cruzan al hilo del listener.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        else:
+            record.trace_id = None
+            record.span_id = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea cada registro como un objeto JSON de una línea
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Excepción ya formateada por NonBlockingQueueHandler
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que conserva el registro original para el formateador JSON
+
+    El QueueHandler estándar formatea el mensaje en el hilo emisor y descarta
+    los campos extra; aquí solo se resuelven los argumentos del mensaje y la
+    excepción, y el formateo completo ocurre en el hilo del listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "text":
+        return logging.Formatter(
+            "%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s"
+        )
+    return JsonFormatter()
+
+
+def setup_logging():
+    """
+    Configurar el logging raíz con un handler en cola y un listener en segundo plano
+
+    Las escrituras a stdout ocurren en el hilo del QueueListener, nunca en el event loop.
+    """
+    global _listener
+
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_formatter())
+
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Vaciar la cola también si el proceso termina sin evento de shutdown
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Vaciar la cola de logs y detener el listener
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
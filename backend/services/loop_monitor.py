@@ -0,0 +1,143 @@
+"""
+Monitor del event loop
+Mide el retraso (lag) del loop de asyncio y detecta callbacks que lo bloquean
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from utils.metrics import Histogram
+
+# Cargar variables de entorno
+load_dotenv()
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+# Cada cuánto se programa el latido en el loop (segundos)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+# Bloqueo a partir del cual se registra el stack del hilo del loop (segundos)
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.25"))
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Monitor de lag basado en un latido programado con call_later
+
+    El latido mide cuánto tarda el loop en ejecutar un callback respecto a lo
+    programado. Un hilo watchdog revisa el último latido y, si el loop lleva
+    más de `threshold` sin avanzar, registra el stack del hilo del loop para
+    identificar la llamada bloqueante (p. ej. el MongoClient síncrono).
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.blocked_count = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._expected = 0.0
+        self._last_beat = 0.0
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Iniciar el monitor sobre el loop en ejecución
+        """
+        if self._loop is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._schedule()
+
+        self._stop.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        """
+        Detener el latido y el watchdog
+        """
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        self._loop = None
+
+    def _schedule(self):
+        self._expected = self._loop.time() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _beat(self):
+        lag = max(0.0, self._loop.time() - self._expected)
+        self.lag.observe(lag)
+        self._last_beat = time.monotonic()
+        self._schedule()
+
+    def _watch(self):
+        reported_beat = None
+        poll = min(self.interval, self.threshold / 2)
+
+        while not self._stop.wait(poll):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+            if stalled < self.threshold or reported_beat == last_beat:
+                continue
+
+            # Reportar una sola vez por bloqueo
+            reported_beat = last_beat
+            self.blocked_count += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<sin stack>"
+            logger.warning(
+                "Event loop bloqueado %.3fs (umbral %.3fs). Stack del hilo del loop:\n%s",
+                stalled, self.threshold, stack
+            )
+
+    def snapshot(self) -> Dict:
+        """
+        Estado del monitor para exponer como métrica
+        """
+        return {
+            "enabled": self._loop is not None,
+            "interval_seconds": self.interval,
+            "block_threshold_seconds": self.threshold,
+            "blocked_count": self.blocked_count,
+            "lag_seconds": self.lag.snapshot(),
+        }
+
+
+loop_monitor = LoopMonitor()
+
+
+def start_loop_monitor():
+    """
+    Iniciar el monitor global si está habilitado
+    """
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+
+def stop_loop_monitor():
+    """
+    Detener el monitor global
+    """
+    loop_monitor.stop()
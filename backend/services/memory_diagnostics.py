@@ -0,0 +1,181 @@
+"""
+Diagnóstico de memoria
+Snapshots de tracemalloc bajo demanda, RSS, conteo de objetos y tamaños de caché
+"""
+import gc
+import os
+import resource
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Superficie de depuración deshabilitada por defecto
+MEMORY_DIAGNOSTICS_ENABLED = os.getenv("MEMORY_DIAGNOSTICS_ENABLED", "false").lower() == "true"
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "5"))
+
+# Cachés registradas por otros servicios: nombre -> función que devuelve su tamaño
+_cache_registry: Dict[str, Callable[[], int]] = {}
+
+# Archivos internos que no aportan a la comparación
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def register_cache(name: str, size_fn: Callable[[], int]):
+    """
+    Registrar una caché en memoria para reportar su tamaño
+
+    Args:
+        name: Nombre de la caché
+        size_fn: Función sin argumentos que devuelve el número de entradas
+    """
+    _cache_registry[name] = size_fn
+
+
+def get_cache_sizes() -> Dict[str, int]:
+    """
+    Tamaño actual de las cachés registradas
+    """
+    sizes = {}
+    for name, size_fn in _cache_registry.items():
+        try:
+            sizes[name] = size_fn()
+        except Exception:
+            sizes[name] = -1
+    return sizes
+
+
+def get_rss_bytes() -> int:
+    """
+    Memoria residente actual del proceso (pico si /proc no está disponible)
+    """
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss está en KB en Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def count_objects_by_type(limit: int = 25) -> List[Dict]:
+    """
+    Contar objetos rastreados por el GC agrupados por tipo
+    """
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
+
+
+class MemoryDiagnostics:
+    """
+    Gestor de snapshots de tracemalloc
+
+    Guarda un snapshot base (el primero) y el último tomado, de modo que cada
+    nuevo snapshot se compara con el anterior o con la base. Los snapshots se toman
+    en el threadpool, así que el lock protege el par base/último.
+    """
+
+    def __init__(self, frames: int = TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self._last_taken_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Empezar a rastrear asignaciones
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def reset(self):
+        """
+        Descartar los snapshots guardados
+        """
+        with self._lock:
+            self._baseline = None
+            self._last = None
+            self._last_taken_at = None
+
+    def take_snapshot(self, compare_to: str = "previous", limit: int = 20) -> Dict:
+        """
+        Tomar un snapshot y compararlo con el anterior o con la base
+
+        Args:
+            compare_to: "previous" o "baseline"
+            limit: Número de sitios de asignación a reportar
+
+        Returns:
+            dict: Sitios con mayor crecimiento desde el snapshot de referencia
+        """
+        self.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+
+        with self._lock:
+            reference = self._baseline if compare_to == "baseline" else self._last
+            if self._baseline is None:
+                self._baseline = snapshot
+
+            previous_taken_at = self._last_taken_at
+            taken_at = datetime.utcnow()
+            self._last = snapshot
+            self._last_taken_at = taken_at
+
+        top_growth = []
+        if reference is not None:
+            stats = snapshot.compare_to(reference, "traceback")
+            for stat in stats[:limit]:
+                frame = stat.traceback[0]
+                top_growth.append({
+                    "site": f"{frame.filename}:{frame.lineno}",
+                    "traceback": stat.traceback.format(),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                })
+
+        return {
+            "compared_to": compare_to if reference is not None else None,
+            "previous_taken_at": previous_taken_at.isoformat() if previous_taken_at else None,
+            "taken_at": taken_at.isoformat(),
+            "top_growth": top_growth,
+        }
+
+    def summary(self, limit: int = 25) -> Dict:
+        """
+        Resumen de memoria del proceso
+        """
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        return {
+            "rss_bytes": get_rss_bytes(),
+            "tracemalloc": {
+                "tracing": tracemalloc.is_tracing(),
+                "current_bytes": traced_current,
+                "peak_bytes": traced_peak,
+            },
+            "gc_objects": count_objects_by_type(limit),
+            "caches": get_cache_sizes(),
+        }
+
+
+memory_diagnostics = MemoryDiagnostics()
+
+
+def start_memory_diagnostics():
+    """
+    Iniciar tracemalloc al arrancar si la superficie de depuración está habilitada
+    """
+    if MEMORY_DIAGNOSTICS_ENABLED:
+        memory_diagnostics.start()
@@ -0,0 +1,436 @@
+"""
+Almacenamiento de notas
+Las notas de cada módulo viven en la colección notes, un documento por (user_id, module_id),
+fuera del documento del usuario
+
+Los usuarios antiguos pueden tener aún las notas embebidas en progress.notes: se migran
+a la colección la primera vez que se leen.
+
+Las notas largas se guardan comprimidas (body binario + codec) en lugar de en text;
+las que se guardaron sin comprimir se comprimen al leerlas.
+
+Cada nota guarda además sus términos normalizados (terms, índice multikey con user_id)
+para buscar en las notas del usuario sin descomprimirlas todas.
+"""
+import logging
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import Binary, ObjectId
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from utils.text import highlight, query_terms, tokenize
+from utils.text_patch import PatchError, Splice, apply_patch, text_hash
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Cargar variables de entorno
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_NOTES_FIELD = "progress.notes"
+
+# Longitud máxima de una nota (caracteres)
+NOTE_MAX_LENGTH = 10000
+
+# Longitud de los fragmentos de la búsqueda en notas
+NOTE_SNIPPET_CHARS = 160
+
+# Usuarios cuyas notas ya están listas para buscar (migradas e indexadas) en este proceso
+_search_ready: Set[ObjectId] = set()
+# Tope del registro anterior: al llenarse se vacía y se vuelve a comprobar
+SEARCH_READY_MAX_USERS = 100000
+
+# Notas de este tamaño (bytes UTF-8) o más se guardan comprimidas; 0 desactiva la compresión
+NOTES_COMPRESSION_THRESHOLD = int(os.getenv("NOTES_COMPRESSION_THRESHOLD", "512"))
+# Codecs que sabe leer decode_note
+NOTE_CODECS = ("zlib", "zstd")
+
+
+class NoteCodecError(RuntimeError):
+    """
+    Nota comprimida con un codec que este proceso no puede leer
+    """
+
+
+def _configured_codec(codec: str) -> str:
+    # Un codec desconocido o sin su librería se guardaría con un nombre que nadie puede leer
+    if codec not in NOTE_CODECS:
+        logger.warning("NOTES_CODEC desconocido, se usa zlib", extra={"codec": codec})
+        return "zlib"
+    if codec == "zstd" and zstandard is None:
+        logger.warning("NOTES_CODEC=zstd sin zstandard instalado, se usa zlib")
+        return "zlib"
+    return codec
+
+
+# zstd (si está instalado zstandard) | zlib
+NOTES_CODEC = _configured_codec(os.getenv("NOTES_CODEC", "zstd" if zstandard is not None else "zlib").lower())
+
+# Campos de la colección notes necesarios para reconstruir el texto
+NOTE_PROJECTION = {"_id": 0, "module_id": 1, "text": 1, "body": 1, "codec": 1}
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec not in NOTE_CODECS:
+        raise NoteCodecError(f"Nota guardada con un codec desconocido: {codec}")
+    if codec == "zstd":
+        if zstandard is None:
+            raise NoteCodecError("Nota comprimida con zstd: instala zstandard para leerla")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _should_compress(text: str) -> bool:
+    return 0 < NOTES_COMPRESSION_THRESHOLD <= len(text.encode("utf-8"))
+
+
+def encode_note(text: str) -> Dict:
+    """
+    Campos a guardar para una nota: text si es corta, body + codec si es larga
+
+    Returns:
+        dict: campos para $set (o $setOnInsert) del documento de la nota
+    """
+    if not _should_compress(text):
+        return {"text": text}
+
+    body = _compress(text.encode("utf-8"), NOTES_CODEC)
+    return {"body": Binary(body), "codec": NOTES_CODEC}
+
+
+def note_terms(text: str) -> List[str]:
+    """
+    Términos normalizados de una nota (sin acentos ni palabras vacías), sin repetir
+    """
+    return sorted({term for term, _, _ in tokenize(text)})
+
+
+def _stored_fields(text: str, now: datetime) -> Dict:
+    # Contenido (comprimido o no), revisión, términos de búsqueda y fecha
+    return {**encode_note(text), "hash": text_hash(text), "terms": note_terms(text), "updated_at": now}
+
+
+def _at_revision(revision: str) -> Dict:
+    # Filtro de escritura condicionada: notas en la revisión leída (las antiguas no tienen hash)
+    return {"$or": [{"hash": revision}, {"hash": {"$exists": False}}]}
+
+
+def _update_fields(text: str, now: datetime) -> Dict:
+    fields = _stored_fields(text, now)
+    update = {"$set": fields}
+    # Quitar la representación anterior si cambia de formato
+    update["$unset"] = {"text": ""} if "body" in fields else {"body": "", "codec": ""}
+    return update
+
+
+def decode_note(doc: Dict) -> str:
+    """
+    Texto de un documento de la colección notes, comprimido o no
+
+    Raises:
+        NoteCodecError: si la nota usa un codec desconocido o sin su librería instalada
+    """
+    if doc.get("body") is None:
+        return doc.get("text", "")
+    return _decompress(bytes(doc["body"]), doc.get("codec", "zlib")).decode("utf-8")
+
+
+async def _compress_plain_notes(db, user_id: ObjectId, docs) -> None:
+    # Migración perezosa: notas largas guardadas antes de la compresión
+    pending = [
+        doc for doc in docs
+        if doc.get("body") is None and _should_compress(doc.get("text", ""))
+    ]
+    if not pending:
+        return
+
+    now = datetime.utcnow()
+    await db.notes.bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "module_id": doc["module_id"], "text": doc["text"]},
+            _update_fields(doc["text"], now)
+        )
+        for doc in pending
+    ], ordered=False)
+
+
+async def migrate_embedded_notes(db, user_id: ObjectId, embedded: Dict[str, str]):
+    """
+    Mover notas embebidas a la colección notes sin pisar las que ya existan
+    """
+    if not embedded:
+        return
+
+    now = datetime.utcnow()
+    await db.notes.bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "module_id": module_id},
+            {"$setOnInsert": _stored_fields(text, now)},
+            upsert=True
+        )
+        for module_id, text in embedded.items()
+    ], ordered=False)
+    await db.users.update_one(
+        {"_id": user_id},
+        {"$unset": {f"{EMBEDDED_NOTES_FIELD}.{module_id}": "" for module_id in embedded}}
+    )
+    logger.info("Notas embebidas migradas", extra={"user_id": str(user_id), "notes": len(embedded)})
+
+
+async def get_note(db, user_id: ObjectId, module_id: str) -> Optional[str]:
+    """
+    Obtener la nota de un módulo
+
+    Returns:
+        str o None si el usuario no tiene nota en ese módulo
+    """
+    doc = await db.notes.find_one({"user_id": user_id, "module_id": module_id}, NOTE_PROJECTION)
+    if doc is not None:
+        await _compress_plain_notes(db, user_id, [doc])
+        return decode_note(doc)
+
+    # Nota todavía embebida en el documento del usuario
+    field = f"{EMBEDDED_NOTES_FIELD}.{module_id}"
+    user_doc = await db.users.find_one({"_id": user_id, field: {"$exists": True}}, {field: 1})
+    if user_doc is None:
+        return None
+
+    text = user_doc["progress"]["notes"][module_id]
+    await migrate_embedded_notes(db, user_id, {module_id: text})
+    return text
+
+
+async def get_notes(db, user_id: ObjectId, embedded: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Todas las notas del usuario
+
+    Args:
+        embedded: progress.notes del documento del usuario, si ya se leyó (se migra)
+
+    Returns:
+        dict: module_id -> texto
+    """
+    docs = [doc async for doc in db.notes.find({"user_id": user_id}, NOTE_PROJECTION)]
+    notes = {doc["module_id"]: decode_note(doc) for doc in docs}
+    await _compress_plain_notes(db, user_id, docs)
+
+    if embedded:
+        await migrate_embedded_notes(db, user_id, embedded)
+        for module_id, text in embedded.items():
+            notes.setdefault(module_id, text)
+
+    return notes
+
+
+def _older_than(written_at: datetime) -> Dict:
+    # Filtro de última escritura gana: la nota guardada es anterior a written_at (o no tiene fecha)
+    return {"$or": [{"updated_at": {"$lt": written_at}}, {"updated_at": {"$exists": False}}]}
+
+
+async def save_note(db, user_id: ObjectId, module_id: str, text: str, written_at: Optional[datetime] = None) -> bool:
+    """
+    Crear o reemplazar la nota de un módulo
+
+    Con written_at (hora de una operación offline) solo se escribe si la nota guardada
+    es anterior, y esa hora queda como updated_at.
+
+    Returns:
+        bool: False si una escritura más reciente ganó
+    """
+    query = {"user_id": user_id, "module_id": module_id}
+    if written_at is not None:
+        query.update(_older_than(written_at))
+
+    try:
+        await db.notes.update_one(
+            query,
+            _update_fields(text, written_at or datetime.utcnow()),
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # La nota existe y es más reciente: el upsert chocó con el índice único
+        return False
+    return True
+
+
+async def delete_note(db, user_id: ObjectId, module_id: str, written_at: Optional[datetime] = None) -> bool:
+    """
+    Eliminar la nota de un módulo (con written_at, solo si la guardada es anterior)
+
+    Returns:
+        bool: False si no había nota que eliminar o una escritura más reciente ganó
+    """
+    query = {"user_id": user_id, "module_id": module_id}
+    if written_at is not None:
+        query.update(_older_than(written_at))
+
+    result = await db.notes.delete_one(query)
+    return result.deleted_count > 0
+
+
+async def replace_notes(db, user_id: ObjectId, notes: Dict[str, str]):
+    """
+    Reemplazar todas las notas del usuario (sincronización completa)
+
+    Escribe primero y borra después: si la escritura falla, el usuario conserva sus notas
+    """
+    if notes:
+        now = datetime.utcnow()
+        await db.notes.bulk_write([
+            UpdateOne(
+                {"user_id": user_id, "module_id": module_id},
+                _update_fields(text, now),
+                upsert=True
+            )
+            for module_id, text in notes.items()
+        ], ordered=False)
+    await db.notes.delete_many({"user_id": user_id, "module_id": {"$nin": list(notes)}})
+
+
+async def delete_user_notes(db, user_id: ObjectId):
+    """
+    Eliminar todas las notas del usuario (reset o baja)
+    """
+    await db.notes.delete_many({"user_id": user_id})
+
+
+async def prepare_patch(db, user_id: ObjectId, module_id: str, base_hash: str, ops: List[Splice]) -> Optional[Tuple[str, str]]:
+    """
+    Aplicar un parche sobre la revisión base_hash de la nota sin guardarlo todavía
+
+    Returns:
+        tuple: (texto actual, texto resultante); None si la nota ya no está en esa revisión (conflicto)
+
+    Raises:
+        PatchError: si las operaciones no encajan en el texto o lo dejan demasiado largo
+    """
+    current = await get_note(db, user_id, module_id) or ""
+    if text_hash(current) != base_hash:
+        return None
+
+    text = apply_patch(current, ops)
+    if len(text) > NOTE_MAX_LENGTH:
+        raise PatchError(f"La nota supera los {NOTE_MAX_LENGTH} caracteres")
+    return current, text
+
+
+async def write_patch(db, user_id: ObjectId, module_id: str, base_hash: str, current: str, text: str) -> bool:
+    """
+    Guardar el resultado de prepare_patch solo si la nota sigue en la revisión base_hash
+    (autoguardado incremental)
+
+    Returns:
+        bool: False si otra escritura cambió la nota desde la lectura (conflicto)
+    """
+    query = {"user_id": user_id, "module_id": module_id, **_at_revision(base_hash)}
+
+    # Si el texto queda vacío, eliminar la nota
+    if not text.strip():
+        result = await db.notes.delete_one(query)
+        return bool(result.deleted_count or not current)
+
+    try:
+        await db.notes.update_one(query, _update_fields(text, datetime.utcnow()), upsert=True)
+    except DuplicateKeyError:
+        # Otra escritura cambió la nota entre la lectura y el update
+        return False
+    return True
+
+
+async def _prepare_search(db, user_id: ObjectId):
+    # Primera búsqueda del usuario en este proceso: migrar las notas aún embebidas
+    # e indexar las guardadas antes de que existiera terms
+    if user_id in _search_ready:
+        return
+
+    field = EMBEDDED_NOTES_FIELD
+    user_doc = await db.users.find_one({"_id": user_id, field: {"$exists": True}}, {field: 1})
+    embedded = (user_doc or {}).get("progress", {}).get("notes")
+    if embedded:
+        await migrate_embedded_notes(db, user_id, embedded)
+
+    await _index_legacy_notes(db, user_id)
+
+    if len(_search_ready) >= SEARCH_READY_MAX_USERS:
+        _search_ready.clear()
+    _search_ready.add(user_id)
+
+
+async def _index_legacy_notes(db, user_id: ObjectId):
+    # Notas guardadas antes de que existiera terms
+    docs = [
+        doc async for doc in db.notes.find(
+            {"user_id": user_id, "terms": {"$exists": False}}, NOTE_PROJECTION
+        )
+    ]
+    if not docs:
+        return
+
+    await db.notes.bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "module_id": doc["module_id"], "terms": {"$exists": False}},
+            {"$set": {"terms": note_terms(decode_note(doc))}}
+        )
+        for doc in docs
+    ], ordered=False)
+
+
+def _note_result(module_id: str, text: str, terms: List[str]) -> Optional[Dict]:
+    tokens = tokenize(text)
+    spans = [(start, end) for term, start, end in tokens if term in terms]
+    if not spans:
+        return None
+
+    matched = {term for term, _, _ in tokens if term in terms}
+    # Primero las notas que contienen más términos distintos; luego la densidad de aciertos
+    score = len(matched) + len(spans) / len(tokens)
+
+    start = max(0, spans[0][0] - NOTE_SNIPPET_CHARS // 3)
+    end = min(len(text), start + NOTE_SNIPPET_CHARS)
+    return {
+        "module_id": module_id,
+        "score": round(score, 4),
+        "matched_terms": sorted(matched),
+        "snippet": highlight(text, spans, start, end),
+    }
+
+
+async def search_notes(db, user_id: ObjectId, query: str, limit: int = 10) -> Dict:
+    """
+    Buscar en las notas del usuario (índice multikey user_id + terms)
+
+    La primera búsqueda de cada usuario en el proceso migra sus notas embebidas e
+    indexa las antiguas; las siguientes van directas al índice.
+
+    Returns:
+        dict: total de notas que coinciden y resultados ordenados por score con fragmento resaltado
+    """
+    terms = query_terms(query)
+    if not terms:
+        return {"total": 0, "results": []}
+
+    await _prepare_search(db, user_id)
+
+    results = []
+    async for doc in db.notes.find({"user_id": user_id, "terms": {"$in": terms}}, NOTE_PROJECTION):
+        result = _note_result(doc["module_id"], decode_note(doc), terms)
+        if result is not None:
+            results.append(result)
+
+    results.sort(key=lambda result: (-result["score"], result["module_id"]))
+    return {"total": len(results), "results": results[:limit]}
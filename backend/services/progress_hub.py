@@ -0,0 +1,280 @@
+"""
+Hub de sincronización de progreso
+Reparte a las conexiones WebSocket de un usuario los cambios de progreso hechos desde
+otras pestañas o dispositivos
+
+Dentro del proceso el reparto es directo (conexiones registradas por usuario). Entre
+workers, cada cambio se inserta también en la colección limitada (capped) progress_events,
+que cada worker lee con un cursor tailable y reparte a sus propias conexiones.
+
+La publicación corre en una tarea en segundo plano: la escritura REST no espera ni al
+insert del evento ni a los envíos a los sockets.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from services.database import get_database
+
+# Cargar variables de entorno
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Reparto entre workers a través de MongoDB (con un único worker se puede desactivar)
+PROGRESS_HUB_CROSS_WORKER = os.getenv("PROGRESS_HUB_CROSS_WORKER", "true").lower() == "true"
+# Tamaño máximo de la colección limitada de eventos (bytes)
+PROGRESS_EVENTS_SIZE = int(os.getenv("PROGRESS_EVENTS_SIZE", str(8 * 1024 * 1024)))
+# Espera antes de reabrir el cursor tailable si se cierra (segundos); se duplica tras cada
+# error hasta PROGRESS_EVENTS_RETRY_MAX
+PROGRESS_EVENTS_RETRY = float(os.getenv("PROGRESS_EVENTS_RETRY", "1.0"))
+PROGRESS_EVENTS_RETRY_MAX = float(os.getenv("PROGRESS_EVENTS_RETRY_MAX", "30.0"))
+# Margen de relectura al reabrir el cursor: cubre eventos de otros workers con un _id
+# anterior al último leído (relojes y contadores de ObjectId no ordenados entre procesos)
+PROGRESS_EVENTS_RESUME_WINDOW = timedelta(seconds=float(os.getenv("PROGRESS_EVENTS_RESUME_WINDOW", "10")))
+# Tiempo máximo de un envío a un socket: un cliente lento no retrasa a los demás (segundos)
+PROGRESS_SEND_TIMEOUT = float(os.getenv("PROGRESS_SEND_TIMEOUT", "2.0"))
+
+EVENTS_COLLECTION = "progress_events"
+# IDs vistos a partir de los que se descartan los que quedan fuera de la ventana
+PROGRESS_EVENTS_SEEN_PRUNE = 1000
+
+# Conexión WebSocket que originó la escritura en curso (no recibe su propio eco)
+current_origin: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("progress_origin", default=None)
+
+
+class ProgressHub:
+    """
+    Registro de conexiones por usuario y reparto de eventos
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._connections: Dict[str, Dict[str, WebSocket]] = defaultdict(dict)
+        self._task: Optional[asyncio.Task] = None
+        # Publicaciones en curso (referencia para que no se recojan antes de terminar)
+        self._pending: Set[asyncio.Task] = set()
+        self.published = 0
+        self.delivered = 0
+
+    def connect(self, user_id: str, websocket: WebSocket) -> str:
+        """
+        Registrar una conexión
+
+        Returns:
+            str: ID de la conexión
+        """
+        connection_id = uuid.uuid4().hex
+        self._connections[user_id][connection_id] = websocket
+        return connection_id
+
+    def disconnect(self, user_id: str, connection_id: str):
+        connections = self._connections.get(user_id)
+        if connections is None:
+            return
+        connections.pop(connection_id, None)
+        if not connections:
+            del self._connections[user_id]
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self._connections.values())
+
+    async def _send(self, user_id: str, connection_id: str, websocket: WebSocket, event: Dict):
+        try:
+            await asyncio.wait_for(websocket.send_json(event), PROGRESS_SEND_TIMEOUT)
+            self.delivered += 1
+        except Exception:
+            # Conexión cerrada o lenta: la quita su propio handler al salir
+            logger.debug("Evento no entregado", extra={"user_id": user_id, "connection_id": connection_id})
+
+    async def _deliver(self, user_id: str, event: Dict, origin: Optional[str]):
+        connections = self._connections.get(user_id)
+        if not connections:
+            return
+        await asyncio.gather(*(
+            self._send(user_id, connection_id, websocket, event)
+            for connection_id, websocket in list(connections.items())
+            if connection_id != origin
+        ))
+
+    def publish(self, user_id: str, event: Dict) -> asyncio.Task:
+        """
+        Publicar un cambio en segundo plano: a las conexiones de este worker y,
+        si está activo, al resto
+
+        Returns:
+            asyncio.Task: la publicación (solo hace falta esperarla en tests)
+        """
+        event = jsonable_encoder(event)
+        origin = current_origin.get()
+        self.published += 1
+        task = asyncio.get_running_loop().create_task(self._publish(user_id, event, origin))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def _publish(self, user_id: str, event: Dict, origin: Optional[str]):
+        await self._deliver(user_id, event, origin)
+
+        db = get_database()
+        if not PROGRESS_HUB_CROSS_WORKER or db is None:
+            return
+        try:
+            await db[EVENTS_COLLECTION].insert_one({
+                "user_id": user_id,
+                "worker_id": self.worker_id,
+                "origin": origin,
+                "event": json.dumps(event, ensure_ascii=False),
+                "created_at": datetime.utcnow()
+            })
+        except PyMongoError as e:
+            logger.warning("No se pudo publicar el evento de progreso: %s", e)
+
+    async def _ensure_collection(self, db):
+        try:
+            await db.create_collection(EVENTS_COLLECTION, capped=True, size=PROGRESS_EVENTS_SIZE)
+        except CollectionInvalid:
+            pass
+
+    @staticmethod
+    def _prune_seen(seen: Dict[ObjectId, datetime], resume_from: datetime) -> Dict[ObjectId, datetime]:
+        horizon = resume_from - PROGRESS_EVENTS_RESUME_WINDOW
+        return {event_id: created for event_id, created in seen.items() if created >= horizon}
+
+    async def _read_recent(self, db, since: datetime, seen: Dict[ObjectId, datetime]):
+        # Eventos ya existentes en la ventana de reanudación: no se reparten
+        query = {"_id": {"$gte": ObjectId.from_datetime(since - PROGRESS_EVENTS_RESUME_WINDOW)}}
+        async for document in db[EVENTS_COLLECTION].find(query, {"_id": 1}):
+            seen[document["_id"]] = document["_id"].generation_time
+
+    async def _tail(self):
+        """
+        Leer los eventos de otros workers con un cursor tailable, reabriéndolo si se cierra
+
+        Los ObjectId de workers distintos no llegan ordenados, así que al reabrir no basta
+        con {"_id": {"$gt": último}}: se relee en orden natural desde un margen
+        (PROGRESS_EVENTS_RESUME_WINDOW) antes del último evento y se saltan los ya vistos.
+        """
+        db = get_database()
+        seen: Dict[ObjectId, datetime] = {}
+        resume_from: Optional[datetime] = None
+        delay = PROGRESS_EVENTS_RETRY
+        prune_at = PROGRESS_EVENTS_SEEN_PRUNE
+
+        while True:
+            try:
+                if resume_from is None:
+                    # Arranque: solo eventos posteriores al inicio del worker
+                    await self._ensure_collection(db)
+                    resume_from = datetime.now(timezone.utc)
+                    await self._read_recent(db, resume_from, seen)
+
+                seen = self._prune_seen(seen, resume_from)
+                cursor = db[EVENTS_COLLECTION].find(
+                    {"_id": {"$gte": ObjectId.from_datetime(resume_from - PROGRESS_EVENTS_RESUME_WINDOW)}},
+                    cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                while cursor.alive:
+                    async for document in cursor:
+                        delay = PROGRESS_EVENTS_RETRY
+                        event_id = document["_id"]
+                        if event_id in seen:
+                            continue
+                        seen[event_id] = event_id.generation_time
+                        resume_from = max(resume_from, event_id.generation_time)
+                        if len(seen) >= prune_at:
+                            seen = self._prune_seen(seen, resume_from)
+                            prune_at = max(PROGRESS_EVENTS_SEEN_PRUNE, 2 * len(seen))
+                        if document["worker_id"] == self.worker_id or document["user_id"] not in self._connections:
+                            continue
+                        await self._deliver(document["user_id"], json.loads(document["event"]), document["origin"])
+                # Colección vacía o cursor cerrado por el servidor: reabrir tras la espera normal
+                await asyncio.sleep(PROGRESS_EVENTS_RETRY)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Cualquier fallo reabre el cursor: el reparto entre workers no se detiene
+                logger.exception("Error leyendo los eventos de progreso, reintentando en %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, PROGRESS_EVENTS_RETRY_MAX)
+
+    def start(self):
+        """
+        Empezar a leer los eventos de otros workers
+        """
+        if not PROGRESS_HUB_CROSS_WORKER or self._task is not None or get_database() is None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._tail())
+        logger.info("Hub de progreso iniciado", extra={"worker_id": self.worker_id})
+
+    async def stop(self):
+        # Terminar las publicaciones en curso antes de cerrar la conexión a MongoDB
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=PROGRESS_SEND_TIMEOUT)
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+progress_hub = ProgressHub()
+
+
+def start_progress_hub():
+    progress_hub.start()
+
+
+async def stop_progress_hub():
+    await progress_hub.stop()
+
+
+def _event_data(data) -> Dict:
+    # Mismo cuerpo que acepta la ruta REST, sin el usuario ni la versión esperada
+    fields = data.model_dump() if hasattr(data, "model_dump") else {}
+    fields.pop("user_id", None)
+    fields.pop("expected_version", None)
+    return fields
+
+
+def broadcast(op: str):
+    """
+    Decorador de endpoint: tras una escritura correcta publica {"type": "op", "op", "data", "version"}
+    a las demás conexiones del usuario (sin esperar al reparto)
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+
+            data = kwargs.get("data")
+            user_id = getattr(data, "user_id", None) or kwargs.get("user_id")
+            if user_id and isinstance(result, dict) and result.get("success"):
+                progress_hub.publish(user_id, {
+                    "type": "op",
+                    "op": op,
+                    "data": _event_data(data),
+                    "version": result.get("version")
+                })
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,104 @@
+"""
+Fusión del registro de operaciones offline
+Aplica las operaciones con marca de tiempo que el cliente acumuló sin conexión sobre el
+progreso del servidor: última escritura gana por clave (módulos, subtareas, notas),
+los badges son un conjunto que solo crece y el XP un contador que solo suma
+
+Cada escritura del servidor deja su hora en progress.clocks.<sección>.<clave>; un reset
+deja progress.reset_at y las operaciones anteriores a él se descartan.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from services.progress_store import decode_modules, decode_subtasks
+
+CLOCKS_FIELD = "progress.clocks"
+RESET_AT_FIELD = "progress.reset_at"
+
+# Tipo de operación -> sección de progress.clocks (las de última escritura gana)
+CLOCK_SECTIONS = {"module": "modules", "subtask": "subtasks", "note": "notes"}
+
+
+def clock_field(section: str, key: str) -> str:
+    """
+    Campo con la hora de la última escritura de una clave
+    """
+    return f"{CLOCKS_FIELD}.{section}.{key}"
+
+
+def normalize_timestamp(ts: datetime, now: datetime) -> datetime:
+    """
+    Marca de tiempo del cliente en UTC naive (como las del servidor), nunca en el futuro
+
+    Un reloj adelantado no debe ganar a todas las escrituras posteriores.
+    """
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(ts, now)
+
+
+class MergeResult:
+    """
+    Estado fusionado y resumen de lo aplicado
+    """
+    __slots__ = ("modules", "subtasks", "badges", "xp", "clocks", "notes", "applied", "skipped")
+
+    def __init__(self, progress: Dict):
+        self.modules = decode_modules(progress)
+        self.subtasks = decode_subtasks(progress)
+        self.badges: List[str] = list(progress.get("badges") or [])
+        self.xp: int = progress.get("xp", 0)
+        self.clocks: Dict[str, Dict[str, datetime]] = {
+            section: dict((progress.get("clocks") or {}).get(section) or {})
+            for section in CLOCK_SECTIONS.values()
+        }
+        # module_id -> (texto, hora) de la última operación de nota del registro
+        self.notes: Dict[str, Tuple[str, datetime]] = {}
+        self.applied = 0
+        self.skipped = 0
+
+
+def merge_ops(progress: Dict, ops: List[Dict]) -> MergeResult:
+    """
+    Fusionar el registro de operaciones con el progreso guardado
+
+    Cada operación es {"type", "key", "value", "amount", "ts"} con ts ya normalizado.
+    El texto de las notas vive en su colección: se devuelve la última nota ganadora
+    de cada módulo para guardarla allí.
+
+    Returns:
+        MergeResult
+    """
+    result = MergeResult(progress)
+    reset_at: Optional[datetime] = progress.get("reset_at")
+
+    # Orden estable por hora: a igual hora gana la que llegó después en el registro
+    for op in sorted(ops, key=lambda op: op["ts"]):
+        ts = op["ts"]
+        if reset_at is not None and ts <= reset_at:
+            result.skipped += 1
+            continue
+
+        op_type = op["type"]
+        if op_type == "xp":
+            result.xp += op["amount"]
+        elif op_type == "badge":
+            if op["key"] not in result.badges:
+                result.badges.append(op["key"])
+        else:
+            section = CLOCK_SECTIONS[op_type]
+            clock = result.clocks[section].get(op["key"])
+            if clock is not None and ts <= clock:
+                result.skipped += 1
+                continue
+            result.clocks[section][op["key"]] = ts
+            if op_type == "module":
+                result.modules[op["key"]] = bool(op["value"])
+            elif op_type == "subtask":
+                result.subtasks[op["key"]] = bool(op["value"])
+            else:
+                result.notes[op["key"]] = (op["value"] or "", ts)
+
+        result.applied += 1
+
+    return result
@@ -0,0 +1,267 @@
+"""
+Almacenamiento de progreso
+Capa de traducción entre el formato de la API (diccionarios "1": true / "1-0": true)
+y el formato guardado en MongoDB, que puede ser el mismo diccionario o máscaras de bits
+
+Formato bitset:
+    progress.module_bits.<palabra>      bit (id % 63) de la palabra (id // 63) = módulo completado
+    progress.subtask_bits.<módulo>      bit i = subtarea "<módulo>-<i>" completada
+    progress.subtask_bits.<módulo>_<n>  palabras adicionales si el módulo tiene más de 63 tareas
+
+Las claves explícitas del formato diccionario tienen prioridad sobre los bits, así que
+ambos formatos conviven en un mismo documento mientras se migra de uno a otro.
+"""
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+from bson.int64 import Int64
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# dict (compatible con los documentos existentes) | bitset
+PROGRESS_STORAGE_FORMAT = os.getenv("PROGRESS_STORAGE_FORMAT", "dict").lower()
+
+# Int64 de MongoDB sin usar el bit de signo
+BITS_PER_WORD = 63
+
+MODULES_FIELD = "progress.modules"
+SUBTASKS_FIELD = "progress.subtasks"
+MODULE_BITS_FIELD = "progress.module_bits"
+SUBTASK_BITS_FIELD = "progress.subtask_bits"
+
+# Versión del progreso: cada escritura la incrementa (concurrencia optimista)
+VERSION_FIELD = "progress.version"
+
+# Claves internas de progress que no viajan a la API (bits y relojes de la fusión offline)
+INTERNAL_KEYS = ("module_bits", "subtask_bits", "clocks", "reset_at")
+
+# Campos de progreso que hay que leer para reconstruir módulos y subtareas
+PROGRESS_FIELDS = (MODULES_FIELD, SUBTASKS_FIELD, MODULE_BITS_FIELD, SUBTASK_BITS_FIELD)
+
+# Campos de progreso de la API (?fields=) -> campos guardados bajo progress
+API_FIELDS = {
+    "modules": ("modules", "module_bits"),
+    "subtasks": ("subtasks", "subtask_bits"),
+    "badges": ("badges",),
+    "xp": ("xp",),
+    "last_sync": ("last_sync",),
+    "version": ("version",),
+}
+
+
+def use_bitset() -> bool:
+    return PROGRESS_STORAGE_FORMAT == "bitset"
+
+
+def _position(value) -> int:
+    # Solo enteros no negativos: un "-1" acabaría en la palabra "-1"
+    position = int(value)
+    if position < 0:
+        raise ValueError(f"Posición negativa en el bitset: {value}")
+    return position
+
+
+def _module_position(module_id: str) -> Tuple[str, int]:
+    word, bit = divmod(_position(module_id), BITS_PER_WORD)
+    return str(word), 1 << bit
+
+
+def _subtask_position(module_id: str, task_index: int) -> Tuple[str, int]:
+    word, bit = divmod(_position(task_index), BITS_PER_WORD)
+    module_number = _position(module_id)
+    key = str(module_number) if word == 0 else f"{module_number}_{word}"
+    return key, 1 << bit
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _bit_update(field: str, mask: int, value: bool) -> Dict:
+    operation = {"or": Int64(mask)} if value else {"and": Int64(~mask)}
+    return {"$bit": {field: operation}}
+
+
+def empty_progress() -> Dict:
+    """
+    Progreso inicial de un usuario en el formato configurado
+    """
+    progress = {"notes": {}, "badges": [], "xp": 0, "last_sync": None, "version": 0}
+    if use_bitset():
+        progress.update({"module_bits": {}, "subtask_bits": {}})
+    else:
+        progress.update({"modules": {}, "subtasks": {}})
+    return progress
+
+
+def bump_version(update: Dict) -> Dict:
+    """
+    Añadir a una actualización el incremento atómico de progress.version
+    """
+    update.setdefault("$inc", {})[VERSION_FIELD] = 1
+    return update
+
+
+def version_filter(expected: Optional[int]) -> Dict:
+    """
+    Condición de la escritura sobre la versión esperada (vacía si no se indicó)
+
+    Los documentos anteriores a la versión no tienen el campo: cuentan como versión 0.
+    """
+    if expected is None:
+        return {}
+    return {VERSION_FIELD: expected if expected else {"$in": [0, None]}}
+
+
+def module_update(module_id: str, completed: bool) -> Dict:
+    """
+    Operadores de actualización para marcar un módulo (atómico en ambos formatos)
+    """
+    if not use_bitset():
+        return {"$set": {f"{MODULES_FIELD}.{module_id}": completed}}
+
+    word, mask = _module_position(module_id)
+    update = _bit_update(f"{MODULE_BITS_FIELD}.{word}", mask, completed)
+    # La clave del formato diccionario tendría prioridad sobre el bit
+    update["$unset"] = {f"{MODULES_FIELD}.{module_id}": ""}
+    return update
+
+
+def subtask_update(module_id: str, task_index: int, completed: bool) -> Dict:
+    """
+    Operadores de actualización para marcar una subtarea (atómico en ambos formatos)
+    """
+    subtask_key = f"{module_id}-{task_index}"
+    if not use_bitset():
+        return {"$set": {f"{SUBTASKS_FIELD}.{subtask_key}": completed}}
+
+    key, mask = _subtask_position(module_id, task_index)
+    update = _bit_update(f"{SUBTASK_BITS_FIELD}.{key}", mask, completed)
+    update["$unset"] = {f"{SUBTASKS_FIELD}.{subtask_key}": ""}
+    return update
+
+
+def encode_modules(modules: Dict[str, bool]) -> Dict[str, Int64]:
+    """
+    Diccionario de módulos -> máscaras por palabra
+
+    Raises:
+        ValueError: si un ID no es un entero no negativo
+    """
+    words: Dict[str, int] = {}
+    for module_id, completed in modules.items():
+        if completed:
+            word, mask = _module_position(module_id)
+            words[word] = words.get(word, 0) | mask
+    return {word: Int64(mask) for word, mask in words.items()}
+
+
+def encode_subtasks(subtasks: Dict[str, bool]) -> Dict[str, Int64]:
+    """
+    Diccionario de subtareas ("1-0") -> máscaras por módulo
+
+    Raises:
+        ValueError: si un módulo o índice no es un entero no negativo
+    """
+    words: Dict[str, int] = {}
+    for subtask_key, completed in subtasks.items():
+        if completed:
+            module_id, _, task_index = subtask_key.partition("-")
+            key, mask = _subtask_position(module_id, int(task_index))
+            words[key] = words.get(key, 0) | mask
+    return {key: Int64(mask) for key, mask in words.items()}
+
+
+def replace_fields(modules=None, subtasks=None) -> Tuple[Dict, Dict]:
+    """
+    Campos $set/$unset para reemplazar módulos y/o subtareas completos (sync)
+    """
+    to_set, to_unset = {}, {}
+    if use_bitset():
+        if modules is not None:
+            to_set[MODULE_BITS_FIELD] = encode_modules(modules)
+            to_unset[MODULES_FIELD] = ""
+        if subtasks is not None:
+            to_set[SUBTASK_BITS_FIELD] = encode_subtasks(subtasks)
+            to_unset[SUBTASKS_FIELD] = ""
+    else:
+        if modules is not None:
+            to_set[MODULES_FIELD] = modules
+            to_unset[MODULE_BITS_FIELD] = ""
+        if subtasks is not None:
+            to_set[SUBTASKS_FIELD] = subtasks
+            to_unset[SUBTASK_BITS_FIELD] = ""
+    return to_set, to_unset
+
+
+def decode_modules(progress: Dict) -> Dict[str, bool]:
+    """
+    Módulos en el formato de la API a partir de cualquiera de los dos formatos
+    """
+    modules = {}
+    for word, mask in (progress.get("module_bits") or {}).items():
+        for bit in _bits(int(mask)):
+            modules[str(int(word) * BITS_PER_WORD + bit)] = True
+    modules.update(progress.get("modules") or {})
+    return modules
+
+
+def decode_subtasks(progress: Dict) -> Dict[str, bool]:
+    """
+    Subtareas en el formato de la API a partir de cualquiera de los dos formatos
+    """
+    subtasks = {}
+    for key, mask in (progress.get("subtask_bits") or {}).items():
+        module_id, _, word = key.partition("_")
+        offset = int(word or 0) * BITS_PER_WORD
+        for bit in _bits(int(mask)):
+            subtasks[f"{module_id}-{offset + bit}"] = True
+    subtasks.update(progress.get("subtasks") or {})
+    return subtasks
+
+
+def to_api(progress: Dict) -> Dict:
+    """
+    Progreso con la forma que espera el frontend (sin los campos internos)
+    """
+    api_progress = {
+        key: value for key, value in progress.items()
+        if key not in INTERNAL_KEYS
+    }
+    api_progress["modules"] = decode_modules(progress)
+    api_progress["subtasks"] = decode_subtasks(progress)
+    return api_progress
+
+
+def _count(flags: Dict, bit_words: Dict, position) -> int:
+    total = sum(int(mask).bit_count() for mask in bit_words.values())
+    # Las claves explícitas del diccionario reemplazan al bit correspondiente
+    for key, value in flags.items():
+        try:
+            word, mask = position(key)
+        except ValueError:
+            total += bool(value)
+            continue
+        total += bool(value) - bool(int(bit_words.get(word, 0)) & mask)
+    return total
+
+
+def count_completed(progress: Dict) -> Tuple[int, int]:
+    """
+    Módulos y subtareas completados (popcount sobre los bits, sin decodificar)
+
+    Returns:
+        tuple: (módulos completados, subtareas completadas)
+    """
+    modules = _count(progress.get("modules") or {}, progress.get("module_bits") or {}, _module_position)
+    subtasks = _count(
+        progress.get("subtasks") or {},
+        progress.get("subtask_bits") or {},
+        lambda key: _subtask_position(key.partition("-")[0], int(key.partition("-")[2]))
+    )
+    return modules, subtasks
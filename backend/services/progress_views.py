@@ -0,0 +1,174 @@
+"""
+Vistas precalculadas de progreso
+Une el catálogo en memoria con el progreso del usuario para el dashboard y el roadmap
+(los mismos cálculos que hacían dashboard-ui.js y roadmap-ui-enhanced.js en el cliente)
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+from services.catalog import CourseCatalog, ModuleRecord
+
+# Campos del usuario que necesitan las vistas (las notas no viajan)
+VIEW_PROJECTION = {
+    "display_name": 1,
+    "progress.modules": 1,
+    "progress.subtasks": 1,
+    "progress.module_bits": 1,
+    "progress.subtask_bits": 1,
+    "progress.badges": 1,
+    "progress.xp": 1,
+    "progress.last_sync": 1,
+    "progress.version": 1,
+}
+
+# Rangos del dashboard (de mayor a menor XP mínimo)
+RANKS = (
+    (10000, "Senior QA Automation"),
+    (5000, "QA Engineer Mid"),
+    (1000, "Technical QA Tester"),
+    (0, "Junior Talent"),
+)
+
+XP_PER_LEVEL = 100
+
+
+def _percentage(completed: int, total: int) -> int:
+    return round(completed * 100 / total) if total else 0
+
+
+def rank_for(xp: int) -> str:
+    """
+    Nombre del rango correspondiente a un XP
+    """
+    return next(name for minimum, name in RANKS if xp >= minimum)
+
+
+def view_etag(view: str, user_doc: Dict, catalog: Optional[CourseCatalog]) -> str:
+    """
+    ETag de una vista: cambia con cada escritura del progreso (progress.version; last_sync
+    para los usuarios anteriores a la versión), con el nombre mostrado o con el catálogo
+    """
+    progress = user_doc.get("progress", {})
+    last_sync = progress.get("last_sync")
+    last_sync = last_sync.isoformat() if hasattr(last_sync, "isoformat") else last_sync
+    catalog_version = catalog.version if catalog is not None else "-"
+    key = (
+        f"{view}|{user_doc.get('_id')}|{progress.get('version', 0)}|{last_sync}"
+        f"|{user_doc.get('display_name')}|{catalog_version}"
+    )
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _module_tasks(module: ModuleRecord, subtasks: Dict) -> List[bool]:
+    return [bool(subtasks.get(f"{module.key}-{index}")) for index in range(module.subtask_count)]
+
+
+def _module_summary(module: ModuleRecord, done: bool, tasks: List[bool]) -> Dict:
+    completed_tasks = sum(tasks)
+    return {
+        "id": module.id,
+        "title": module.title,
+        "phase": module.phase,
+        "objective": module.objective,
+        "is_complete": done,
+        "tasks": {
+            "completed": completed_tasks,
+            "total": len(tasks),
+            "percentage": _percentage(completed_tasks, len(tasks)),
+        },
+    }
+
+
+def build_dashboard_view(catalog: CourseCatalog, progress: Dict) -> Dict:
+    """
+    Vista del dashboard: porcentajes, XP, rango, nivel, badges y siguiente módulo
+    """
+    modules = progress.get("modules") or {}
+    subtasks = progress.get("subtasks") or {}
+    xp = progress.get("xp", 0)
+
+    completed_modules = sum(1 for module in catalog.modules if modules.get(module.key))
+    completed_subtasks = sum(
+        1 for module in catalog.modules
+        for index in range(module.subtask_count)
+        if subtasks.get(f"{module.key}-{index}")
+    )
+
+    next_module = next((module for module in catalog.modules if not modules.get(module.key)), None)
+
+    return {
+        "xp": xp,
+        "earned_xp": sum(module.xp for module in catalog.modules if modules.get(module.key)),
+        "rank": rank_for(xp),
+        "level": xp // XP_PER_LEVEL,
+        "xp_for_next_level": XP_PER_LEVEL - (xp % XP_PER_LEVEL),
+        "modules": {
+            "completed": completed_modules,
+            "total": catalog.module_count,
+            "percentage": _percentage(completed_modules, catalog.module_count),
+        },
+        "subtasks": {
+            "completed": completed_subtasks,
+            "total": catalog.total_subtasks,
+            "percentage": _percentage(completed_subtasks, catalog.total_subtasks),
+        },
+        "badges": progress.get("badges", []),
+        "next_module": _module_summary(
+            next_module, False, _module_tasks(next_module, subtasks)
+        ) if next_module is not None else None,
+        "featured_modules": [
+            _module_summary(module, bool(modules.get(module.key)), _module_tasks(module, subtasks))
+            for module in catalog.modules[:3]
+        ],
+    }
+
+
+def build_roadmap_view(catalog: CourseCatalog, progress: Dict) -> Dict:
+    """
+    Vista del roadmap: estado de cada módulo (completed, active, pending, locked),
+    progreso de sus tareas y avance por fase
+    """
+    modules = progress.get("modules") or {}
+    subtasks = progress.get("subtasks") or {}
+
+    items = []
+    previous_done = True
+    for module in catalog.modules:
+        done = bool(modules.get(module.key))
+        tasks = _module_tasks(module, subtasks)
+
+        if done:
+            state = "completed"
+        elif previous_done:
+            state = "active" if any(tasks) else "pending"
+        else:
+            state = "locked"
+
+        item = _module_summary(module, done, tasks)
+        item.update({
+            "state": state,
+            "duration": module.duration,
+            "xp": module.xp,
+            "doc_ref": module.doc_ref,
+            "subtasks": tasks,
+        })
+        items.append(item)
+        previous_done = done
+
+    completed_modules = sum(1 for item in items if item["is_complete"])
+    phases = []
+    for phase in catalog.phases.values():
+        completed = sum(1 for key in phase.module_keys if modules.get(key))
+        phases.append({
+            "name": phase.name,
+            "badge": phase.badge,
+            "completed": completed,
+            "total": len(phase.module_keys),
+            "percentage": _percentage(completed, len(phase.module_keys)),
+        })
+
+    return {
+        "progress_percentage": _percentage(completed_modules, catalog.module_count),
+        "modules": items,
+        "phases": phases,
+    }
@@ -0,0 +1,279 @@
+"""
+Índice de búsqueda de contenido
+Índice invertido con ranking BM25 sobre los docs (por sección) y los módulos del curso
+"""
+import logging
+import math
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from services.catalog import CourseCatalog
+from services.content_paths import DOCS_CONTENT_DIR
+from services.docs_renderer import slugify_heading
+from services.memory_diagnostics import register_cache
+from utils.text import highlight, query_terms, strip_markdown, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Parámetros BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CHARS = 180
+
+_HEADING_RE = re.compile(r"^(#{1,3})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+class IndexedDocument:
+    """
+    Unidad de búsqueda (sección de un doc o módulo) con los offsets de cada término
+    """
+    __slots__ = ("key", "source", "type", "title", "ref", "anchor", "text", "length", "terms")
+
+    def __init__(
+        self, key: str, source: str, doc_type: str, title: str, ref: str,
+        anchor: Optional[str], text: str, heading: Optional[str] = None
+    ):
+        self.key = key
+        self.source = source
+        self.type = doc_type
+        self.title = title
+        self.ref = ref
+        self.anchor = anchor
+        # El encabezado propio (o el título) forma parte del texto indexado
+        heading = heading or title
+        self.text = f"{heading}\n{text}" if text else heading
+
+        terms: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        tokens = tokenize(self.text)
+        for term, start, end in tokens:
+            terms[term].append((start, end))
+        self.terms = dict(terms)
+        self.length = len(tokens)
+
+
+def split_markdown_sections(doc_id: str, doc_title: str, source: str) -> List[IndexedDocument]:
+    """
+    Dividir un markdown en secciones por encabezado (h1-h3)
+    """
+    headings = list(_HEADING_RE.finditer(source))
+    sections = []
+
+    bounds = [(None, 0)] + [(match, match.end()) for match in headings]
+    for index, (match, start) in enumerate(bounds):
+        end = headings[index].start() if index < len(headings) else len(source)
+        body = strip_markdown(source[start:end])
+        heading = strip_markdown(match.group(2)) if match else None
+        if not body and not heading:
+            continue
+
+        anchor = slugify_heading(heading) if heading else None
+        title = f"{doc_title} › {heading}" if heading and heading != doc_title else doc_title
+        sections.append(IndexedDocument(
+            key=f"doc:{doc_id}#{anchor or ''}:{index}",
+            source=f"doc:{doc_id}",
+            doc_type="doc",
+            title=title,
+            ref=doc_id,
+            anchor=anchor,
+            text=body,
+            heading=heading,
+        ))
+    return sections
+
+
+def build_module_documents(catalog: CourseCatalog) -> List[IndexedDocument]:
+    """
+    Un documento por módulo: título, objetivo, temas y tareas del schedule
+    """
+    documents = []
+    for module in catalog.modules:
+        lines = [module.objective]
+        lines.extend(f"{topic}: {task}" for topic, task in zip(module.topics, module.tasks))
+        documents.append(IndexedDocument(
+            key=f"module:{module.key}",
+            source="modules",
+            doc_type="module",
+            title=module.title,
+            ref=module.key,
+            anchor=None,
+            text="\n".join(lines),
+        ))
+    return documents
+
+
+def _load_doc_sections(entries: List[Tuple[str, str, Path]]) -> Dict[str, List[IndexedDocument]]:
+    sections = {}
+    for doc_id, title, path in entries:
+        try:
+            source = path.read_text(encoding="utf-8")
+        except OSError:
+            continue
+        sections[f"doc:{doc_id}"] = split_markdown_sections(doc_id, title, source)
+    return sections
+
+
+class SearchIndex:
+    """
+    Índice invertido término -> {documento: offsets}
+
+    El análisis de texto se hace fuera del event loop; la aplicación de los
+    cambios sobre el índice es síncrona y no cede el control, por lo que las
+    búsquedas nunca ven un índice a medio actualizar.
+    """
+
+    def __init__(self):
+        self.documents: Dict[str, IndexedDocument] = {}
+        self.postings: Dict[str, Dict[str, List[Tuple[int, int]]]] = {}
+        self._sources: Dict[str, Set[str]] = defaultdict(set)
+        self._source_versions: Dict[str, object] = {}
+        self._total_length = 0
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / len(self.documents) if self.documents else 0.0
+
+    def _remove_source(self, source: str):
+        for key in self._sources.pop(source, set()):
+            document = self.documents.pop(key)
+            self._total_length -= document.length
+            for term in document.terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def replace_source(self, source: str, documents: List[IndexedDocument], version: object = None):
+        """
+        Reemplazar todos los documentos de una fuente (archivo o catálogo)
+        """
+        self._remove_source(source)
+        for document in documents:
+            self.documents[document.key] = document
+            self._sources[source].add(document.key)
+            self._total_length += document.length
+            for term, offsets in document.terms.items():
+                self.postings.setdefault(term, {})[document.key] = offsets
+        self._source_versions[source] = version
+
+    def drop_missing_sources(self, prefix: str, keep: Set[str]):
+        """
+        Quitar fuentes con el prefijo dado que ya no existen
+        """
+        for source in [s for s in self._sources if s.startswith(prefix) and s not in keep]:
+            self._remove_source(source)
+            self._source_versions.pop(source, None)
+
+    def source_version(self, source: str) -> object:
+        return self._source_versions.get(source)
+
+    def search(self, query: str, limit: int = 10, doc_type: Optional[str] = None) -> Dict:
+        """
+        Buscar con BM25 y devolver fragmentos resaltados
+
+        Returns:
+            dict: total de coincidencias y resultados ordenados por score
+        """
+        terms = query_terms(query)
+        n_docs = len(self.documents)
+        if not terms or n_docs == 0:
+            return {"total": 0, "results": []}
+
+        average_length = self.average_length or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        idf: Dict[str, float] = {}
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf[term] = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, offsets in postings.items():
+                document = self.documents[key]
+                if doc_type and document.type != doc_type:
+                    continue
+                tf = len(offsets)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * document.length / average_length)
+                scores[key] += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = [
+            self._result(self.documents[key], score, terms, idf)
+            for key, score in ranked[:limit]
+        ]
+        return {"total": len(ranked), "results": results}
+
+    def _result(self, document: IndexedDocument, score: float, terms: List[str], idf: Dict[str, float]) -> Dict:
+        spans = [span for term in terms for span in document.terms.get(term, ())]
+
+        # Centrar el fragmento en la primera aparición del término más raro
+        matched = [term for term in terms if term in document.terms]
+        rarest = max(matched, key=lambda term: idf.get(term, 0.0))
+        anchor_start = document.terms[rarest][0][0]
+        start = max(0, anchor_start - SNIPPET_CHARS // 3)
+        end = min(len(document.text), start + SNIPPET_CHARS)
+
+        result = {
+            "type": document.type,
+            "id": document.ref,
+            "title": document.title,
+            "score": round(score, 4),
+            "snippet": highlight(document.text, spans, start, end),
+        }
+        if document.anchor:
+            result["anchor"] = document.anchor
+        return result
+
+    def size(self) -> Dict[str, int]:
+        return {"documents": len(self.documents), "terms": len(self.postings)}
+
+
+search_index = SearchIndex()
+
+
+async def index_catalog(catalog: Optional[CourseCatalog]):
+    """
+    (Re)indexar los módulos del catálogo si cambió su versión
+    """
+    if catalog is None or search_index.source_version("modules") == catalog.version:
+        return
+
+    documents = await run_in_threadpool(build_module_documents, catalog)
+    search_index.replace_source("modules", documents, version=catalog.version)
+    logger.info("Módulos indexados", extra={"documents": len(documents)})
+
+
+async def index_docs(manifest: Dict, content_dir: Path = DOCS_CONTENT_DIR):
+    """
+    (Re)indexar solo los docs del manifest cuyo archivo cambió
+    """
+    entries = []
+    versions = {}
+    for block in manifest.get("blocks", []):
+        for entry in block.get("docs", []):
+            path = Path(content_dir) / entry["file"]
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            source = f"doc:{entry['id']}"
+            versions[source] = (entry["file"], entry.get("title", ""), stat.st_mtime, stat.st_size)
+            if search_index.source_version(source) != versions[source]:
+                entries.append((entry["id"], entry.get("title", ""), path))
+
+    sections = await run_in_threadpool(_load_doc_sections, entries)
+    for source, documents in sections.items():
+        search_index.replace_source(source, documents, version=versions[source])
+    search_index.drop_missing_sources("doc:", set(versions))
+
+    if sections:
+        logger.info("Docs indexados", extra={"docs": len(sections), **search_index.size()})
+
+
+register_cache("search.documents", lambda: len(search_index.documents))
+register_cache("search.terms", lambda: len(search_index.postings))
@@ -0,0 +1,207 @@
+"""
+Sugerencias de autocompletado
+Trie compacto (radix) con las mejores completions precalculadas en cada nodo
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from services.catalog import CourseCatalog
+from services.memory_diagnostics import register_cache
+from utils.text import fold
+
+logger = logging.getLogger(__name__)
+
+# Completions guardadas por nodo (el máximo que puede pedir /api/suggest)
+SUGGEST_TOP_K = 10
+
+# Pesos por tipo de entrada
+WEIGHT_MODULE = 100
+WEIGHT_DOC = 80
+WEIGHT_BADGE = 60
+WEIGHT_TOPIC = 50
+# Coincidir por una palabra interior pesa menos que por el inicio
+WORD_MATCH_FACTOR = 0.6
+
+
+class SuggestEntry:
+    """
+    Completion sugerida
+    """
+    __slots__ = ("text", "type", "ref", "weight")
+
+    def __init__(self, text: str, entry_type: str, ref: str, weight: float):
+        self.text = text
+        self.type = entry_type
+        self.ref = ref
+        self.weight = weight
+
+    def to_dict(self) -> Dict:
+        return {"text": self.text, "type": self.type, "id": self.ref}
+
+
+class _RadixNode:
+    __slots__ = ("edges", "top")
+
+    def __init__(self):
+        # primer carácter -> (etiqueta de la arista, nodo hijo)
+        self.edges: Dict[str, Tuple[str, "_RadixNode"]] = {}
+        # índices de entradas ordenados por peso descendente
+        self.top: Tuple[int, ...] = ()
+
+
+class _BuildNode:
+    __slots__ = ("children", "scores")
+
+    def __init__(self):
+        self.children: Dict[str, "_BuildNode"] = {}
+        self.scores: Dict[int, float] = {}
+
+
+def _merge_top(scores: Dict[int, float], children_tops: List[Dict[int, float]]) -> Dict[int, float]:
+    merged = dict(scores)
+    for child_top in children_tops:
+        for index, score in child_top.items():
+            if score > merged.get(index, -1.0):
+                merged[index] = score
+    best = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:SUGGEST_TOP_K]
+    return dict(best)
+
+
+class SuggestTrie:
+    """
+    Trie inmutable: se construye completo y se reemplaza por referencia
+
+    La búsqueda recorre como mucho len(prefix) caracteres y devuelve la lista
+    ya ordenada del nodo alcanzado, sin recorrer el subárbol.
+    """
+
+    def __init__(self, entries: List[SuggestEntry]):
+        self.entries = entries
+        self.node_count = 0
+
+        build_root = _BuildNode()
+        for index, entry in enumerate(entries):
+            for key, score in self._keys(entry):
+                node = build_root
+                for char in key:
+                    node = node.children.setdefault(char, _BuildNode())
+                if score > node.scores.get(index, -1.0):
+                    node.scores[index] = score
+
+        self.root = self._compress(build_root)[1]
+
+    @staticmethod
+    def _keys(entry: SuggestEntry) -> List[Tuple[str, float]]:
+        """
+        Claves normalizadas: la frase completa y cada sufijo que empieza en una palabra
+        """
+        words = fold(entry.text).split()
+        keys = [(" ".join(words), entry.weight)]
+        for position in range(1, len(words)):
+            keys.append((" ".join(words[position:]), entry.weight * WORD_MATCH_FACTOR))
+        return keys
+
+    def _compress(self, node: _BuildNode) -> Tuple[Dict[int, float], _RadixNode]:
+        compact = _RadixNode()
+        self.node_count += 1
+        children_tops = []
+
+        for char, child in node.children.items():
+            label = char
+            # Fusionar cadenas de nodos sin entradas propias y con un solo hijo
+            while len(child.children) == 1 and not child.scores:
+                (next_char, next_child), = child.children.items()
+                label += next_char
+                child = next_child
+            child_top, compact_child = self._compress(child)
+            compact.edges[char] = (label, compact_child)
+            children_tops.append(child_top)
+
+        top = _merge_top(node.scores, children_tops)
+        compact.top = tuple(top)
+        return top, compact
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[SuggestEntry]:
+        """
+        Mejores completions para un prefijo
+        """
+        rest = " ".join(fold(prefix).split())
+        if not rest:
+            return []
+
+        node = self.root
+        while rest:
+            edge = node.edges.get(rest[0])
+            if edge is None:
+                return []
+            label, child = edge
+            if rest.startswith(label):
+                rest = rest[len(label):]
+                node = child
+            elif label.startswith(rest):
+                node = child
+                break
+            else:
+                return []
+
+        return [self.entries[index] for index in node.top[:limit]]
+
+
+def build_entries(catalog: Optional[CourseCatalog], manifest: Dict) -> List[SuggestEntry]:
+    """
+    Entradas de autocompletado: módulos, temas del schedule, docs y badges
+    """
+    entries = []
+    seen = set()
+
+    def add(text: str, entry_type: str, ref: str, weight: float):
+        key = (fold(text), entry_type)
+        if text and key not in seen:
+            seen.add(key)
+            entries.append(SuggestEntry(text, entry_type, ref, weight))
+
+    if catalog is not None:
+        for module in catalog.modules:
+            add(module.title, "module", module.key, WEIGHT_MODULE)
+            for topic in module.topics:
+                add(topic, "topic", module.key, WEIGHT_TOPIC)
+        for phase in catalog.phases.values():
+            add(phase.badge, "badge", phase.badge, WEIGHT_BADGE)
+
+    for block in manifest.get("blocks", []):
+        if block.get("badge"):
+            add(block["badge"], "badge", block["id"], WEIGHT_BADGE)
+        for doc in block.get("docs", []):
+            add(doc.get("title", ""), "doc", doc["id"], WEIGHT_DOC)
+
+    return entries
+
+
+def _build_trie(catalog: Optional[CourseCatalog], manifest: Dict) -> SuggestTrie:
+    return SuggestTrie(build_entries(catalog, manifest))
+
+
+_trie = SuggestTrie([])
+
+
+def get_suggest_trie() -> SuggestTrie:
+    """
+    Trie actual
+    """
+    return _trie
+
+
+async def rebuild_suggest_trie(catalog: Optional[CourseCatalog], manifest: Dict):
+    """
+    Construir un trie nuevo fuera del event loop y reemplazar el actual de forma atómica
+    """
+    global _trie
+
+    trie = await run_in_threadpool(_build_trie, catalog, manifest)
+    _trie = trie
+    logger.info("Trie de sugerencias construido", extra={"entries": len(trie.entries), "nodes": trie.node_count})
+
+
+register_cache("suggest.entries", lambda: len(_trie.entries))
@@ -0,0 +1,199 @@
+"""
+Servicio de trazas distribuidas (OpenTelemetry)
+Configura el proveedor de trazas, los exportadores y la instrumentación de comandos MongoDB
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import bson
+from bson import ObjectId
+from pymongo import monitoring
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Exportador: none | otlp | jsonl
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_JSONL_PATH = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "qa-master-path-api")
+
+tracer = trace.get_tracer("qa_master_path")
+
+logger = logging.getLogger(__name__)
+
+_provider: Optional[TracerProvider] = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Exportador que escribe cada span como una línea JSON en un archivo local
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = [span.to_json(indent=None) for span in spans]
+        try:
+            with self._lock, open(self._path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _build_exporter() -> Optional[SpanExporter]:
+    """
+    Crear el exportador configurado en TRACING_EXPORTER
+    """
+    if TRACING_EXPORTER == "jsonl":
+        return JsonLinesSpanExporter(TRACING_JSONL_PATH)
+
+    if TRACING_EXPORTER == "otlp":
+        # Dependencia opcional: solo se necesita con un collector OTLP
+        # El endpoint se toma de OTEL_EXPORTER_OTLP_ENDPOINT (por defecto localhost:4318)
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+
+    return None
+
+
+def setup_tracing() -> bool:
+    """
+    Configurar el proveedor de trazas global
+
+    Returns:
+        bool: True si las trazas quedaron habilitadas
+    """
+    global _provider
+
+    if _provider is not None:
+        return True
+
+    exporter = _build_exporter()
+    if exporter is None:
+        return False
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACING_SERVICE_NAME})
+    )
+    # BatchSpanProcessor exporta desde un hilo propio, nunca en el event loop
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+    logger.info("Trazas habilitadas", extra={"exporter": TRACING_EXPORTER})
+    return True
+
+
+def shutdown_tracing():
+    """
+    Vaciar los spans pendientes y cerrar el exportador
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def is_enabled() -> bool:
+    """
+    Indica si hay un proveedor de trazas activo
+    """
+    return _provider is not None
+
+
+def _extract_user_id(command_name: str, command) -> Optional[str]:
+    """
+    Obtener el ID de usuario del filtro `_id` de un comando sobre `users`
+    """
+    if command.get(command_name) != "users":
+        return None
+
+    if command_name in ("find", "count", "delete"):
+        query = command.get("filter") or command.get("query")
+        if query is None and command.get("deletes"):
+            query = command["deletes"][0].get("q")
+    elif command_name == "update" and command.get("updates"):
+        query = command["updates"][0].get("q")
+    elif command_name == "findAndModify":
+        query = command.get("query")
+    else:
+        query = None
+
+    user_id = query.get("_id") if isinstance(query, dict) else None
+    return str(user_id) if isinstance(user_id, ObjectId) else None
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    Listener de PyMongo que crea un span por cada comando ejecutado por Motor
+
+    Motor ejecuta los comandos en un pool de hilos copiando los contextvars,
+    por lo que el span del request queda como padre de los spans de MongoDB.
+    """
+
+    def __init__(self):
+        self._spans: Dict[Tuple[object, int], trace.Span] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if _provider is None:
+            return
+
+        command_name = event.command_name
+        collection = event.command.get(command_name)
+        span = tracer.start_span(
+            f"mongodb.{command_name}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": command_name,
+            },
+        )
+
+        if span.is_recording():
+            if isinstance(collection, str):
+                span.set_attribute("db.mongodb.collection", collection)
+            span.set_attribute("db.mongodb.document_size", len(bson.encode(event.command)))
+
+            user_id = _extract_user_id(command_name, event.command)
+            if user_id:
+                span.set_attribute("enduser.id", user_id)
+                # Propagar el usuario al span del request si aún no lo tiene
+                parent = trace.get_current_span()
+                if parent.is_recording():
+                    parent.set_attribute("enduser.id", user_id)
+
+        with self._lock:
+            self._spans[(event.connection_id, event.request_id)] = span
+
+    def _finish(self, event, error: Optional[str] = None):
+        with self._lock:
+            span = self._spans.pop((event.connection_id, event.request_id), None)
+
+        if span is None:
+            return
+
+        if error is not None:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, error=str(event.failure.get("errmsg", "")))
+
+
+mongo_command_tracer = MongoCommandTracer()
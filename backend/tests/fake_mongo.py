@@ -0,0 +1,197 @@
+"""
+Colecciones de MongoDB en memoria para los tests unitarios de servicios
+Cubre solo los filtros y operadores que usan los servicios probados:
+igualdad (también contra arrays), $exists, $in, $nin, $lt, $or; $set, $unset, $inc, $setOnInsert
+"""
+import copy
+from typing import Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+def _get(doc: Dict, path: str) -> Tuple[bool, object]:
+    current = doc
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return False, None
+        current = current[part]
+    return True, current
+
+
+def _set(doc: Dict, path: str, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = copy.deepcopy(value)
+
+
+def _unset(doc: Dict, path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+def _matches_operator(found: bool, value, operator: str, argument) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if operator == "$exists":
+        return found == argument
+    if operator == "$in":
+        # Como en MongoDB, null en la lista también acepta el campo ausente
+        return any(item in argument for item in values) if found else None in argument
+    if operator == "$nin":
+        return not found or not any(item in argument for item in values)
+    if operator == "$lt":
+        return found and value < argument
+    raise NotImplementedError(operator)
+
+
+def matches(doc: Dict, query: Dict) -> bool:
+    """
+    El documento cumple el filtro
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        found, value = _get(doc, key)
+        if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            if not all(_matches_operator(found, value, op, arg) for op, arg in condition.items()):
+                return False
+        elif isinstance(value, list) and not isinstance(condition, list):
+            if condition not in value:
+                return False
+        elif not found or value != condition:
+            return False
+    return True
+
+
+def _project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if not included:
+        result = copy.deepcopy(doc)
+        for key in projection:
+            _unset(result, key)
+        return result
+    result = {"_id": doc["_id"]} if projection.get("_id", 1) and "_id" in doc else {}
+    for key in included:
+        found, value = _get(doc, key)
+        if found:
+            _set(result, key, value)
+    return result
+
+
+class Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """
+    Colección en memoria; unique simula un índice único compuesto
+    """
+
+    def __init__(self, unique: Iterable[str] = ()):
+        self.docs = []
+        self.unique = tuple(unique)
+
+    async def find_one(self, query: Dict, projection: Optional[Dict] = None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return _project(doc, projection)
+        return None
+
+    def find(self, query: Dict, projection: Optional[Dict] = None) -> FakeCursor:
+        return FakeCursor([_project(doc, projection) for doc in self.docs if matches(doc, query)])
+
+    def _check_unique(self, doc: Dict):
+        if self.unique and any(all(other.get(f) == doc.get(f) for f in self.unique) for other in self.docs):
+            raise DuplicateKeyError("duplicate key")
+
+    async def insert_one(self, doc: Dict):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return Result(inserted_id=doc["_id"])
+
+    @staticmethod
+    def _apply(doc: Dict, update: Dict, inserting: bool):
+        for operator, fields in update.items():
+            for path, value in fields.items():
+                if operator == "$set" or (operator == "$setOnInsert" and inserting):
+                    _set(doc, path, value)
+                elif operator == "$unset":
+                    _unset(doc, path)
+                elif operator == "$inc":
+                    _set(doc, path, (_get(doc, path)[1] or 0) + value)
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        for doc in self.docs:
+            if matches(doc, query):
+                self._apply(doc, update, inserting=False)
+                return Result(matched_count=1, upserted_id=None)
+        if not upsert:
+            return Result(matched_count=0, upserted_id=None)
+
+        doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        self._check_unique(doc)
+        doc["_id"] = ObjectId()
+        self._apply(doc, update, inserting=True)
+        self.docs.append(doc)
+        return Result(matched_count=0, upserted_id=doc["_id"])
+
+    async def find_one_and_update(self, query: Dict, update: Dict, projection: Optional[Dict] = None,
+                                  return_document: bool = False):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = _project(doc, projection)
+                self._apply(doc, update, inserting=False)
+                return _project(doc, projection) if return_document else before
+        return None
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+
+    async def delete_one(self, query: Dict):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return Result(deleted_count=1)
+        return Result(deleted_count=0)
+
+    async def delete_many(self, query: Dict):
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return Result(deleted_count=before - len(self.docs))
+
+
+class FakeDatabase:
+    """
+    Base de datos con las colecciones users y notes (índice único user_id + module_id)
+    """
+
+    def __init__(self):
+        self.users = FakeCollection()
+        self.notes = FakeCollection(unique=("user_id", "module_id"))
@@ -0,0 +1,100 @@
+"""
+Tests unitarios para services/catalog.py
+"""
+import json
+import pytest
+
+from services.catalog import load_catalog, get_catalog, set_catalog, reload_catalog
+from services.content_paths import MODULES_FILE
+from utils.validators import validate_module_id, validate_subtask_index
+
+
+@pytest.fixture
+def modules_file(tmp_path):
+    """Archivo modules.json mínimo"""
+    path = tmp_path / "modules.json"
+    path.write_text(json.dumps({
+        "modules": [
+            {"id": 2, "phase": "Core", "title": "B", "xp": 600,
+             "schedule": [{"topic": "t1", "task": "x"}]},
+            {"id": 1, "phase": "Core", "title": "A", "xp": 500,
+             "schedule": [{"topic": "t1", "task": "x"}, {"topic": "t2", "task": "y"}]},
+            {"id": 3, "phase": "Technical", "title": "C", "xp": 800, "schedule": []},
+        ]
+    }))
+    return path
+
+
+@pytest.fixture
+def loaded_catalog(modules_file):
+    """Catálogo global cargado durante el test"""
+    previous = get_catalog()
+    set_catalog(load_catalog(modules_file))
+    yield get_catalog()
+    set_catalog(previous)
+
+
+class TestCatalog:
+    """Tests del índice del curso"""
+
+    def test_totals(self, modules_file):
+        """Test totales precalculados"""
+        catalog = load_catalog(modules_file)
+        assert catalog.module_count == 3
+        assert catalog.total_subtasks == 3
+        assert catalog.total_xp == 1900
+        assert [m.id for m in catalog.modules] == [1, 2, 3]
+
+    def test_lookup(self, modules_file):
+        """Test búsqueda por ID"""
+        catalog = load_catalog(modules_file)
+        assert catalog.get("1").subtask_count == 2
+        assert catalog.get(2).title == "B"
+        assert catalog.get("99") is None
+        assert catalog.has_subtask("1", 1) is True
+        assert catalog.has_subtask("1", 2) is False
+
+    def test_phases(self, modules_file):
+        """Test agrupación por fase"""
+        catalog = load_catalog(modules_file)
+        core = catalog.phases["Core"]
+        assert core.badge == "core"
+        assert core.module_keys == ["1", "2"]
+        assert core.total_xp == 1100
+
+    def test_records_use_slots(self, modules_file):
+        """Test registros compactos"""
+        module = load_catalog(modules_file).get("1")
+        assert not hasattr(module, "__dict__")
+
+    def test_real_modules_file(self):
+        """Test el modules.json del proyecto carga"""
+        catalog = load_catalog(MODULES_FILE)
+        assert catalog.module_count > 0
+        assert catalog.total_subtasks > 0
+
+    @pytest.mark.asyncio
+    async def test_reload_keeps_previous_on_error(self, loaded_catalog, modules_file):
+        """Test un archivo inválido no reemplaza el catálogo"""
+        modules_file.write_text("{invalid")
+        catalog = await reload_catalog(modules_file)
+        assert catalog is loaded_catalog
+
+
+class TestCatalogValidation:
+    """Tests de validación contra el catálogo"""
+
+    def test_module_in_catalog(self, loaded_catalog):
+        """Test módulo existente"""
+        assert validate_module_id("3")[0] is True
+
+    def test_module_not_in_catalog(self, loaded_catalog):
+        """Test módulo fuera del curso"""
+        is_valid, message = validate_module_id("50")
+        assert is_valid is False
+        assert "no existe" in message
+
+    def test_subtask_index(self, loaded_catalog):
+        """Test índice de subtarea"""
+        assert validate_subtask_index("2", 0)[0] is True
+        assert validate_subtask_index("2", 1)[0] is False
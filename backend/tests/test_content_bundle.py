@@ -0,0 +1,52 @@
+"""
+Tests unitarios para services/content_bundle.py
+"""
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.content as content_routes
+from services.content_bundle import build_bundle
+
+
+class TestContentBundle:
+    """Tests del bundle versionado"""
+
+    def test_version_is_content_hash(self):
+        """Test mismo contenido -> misma versión; contenido distinto -> versión nueva"""
+        manifest = {"blocks": [{"id": "b1", "docs": []}]}
+        first = build_bundle(None, manifest, {})
+        second = build_bundle(None, dict(manifest), {})
+        changed = build_bundle(None, {"blocks": []}, {})
+
+        assert first.version == second.version
+        assert first.gzip == second.gzip
+        assert changed.version != first.version
+
+    def test_gzip_roundtrip(self):
+        """Test el gzip precomprimido contiene el mismo JSON"""
+        bundle = build_bundle(None, {"blocks": []}, {})
+        payload = json.loads(gzip.decompress(bundle.gzip))
+        assert payload == {"docs": {}, "manifest": {"blocks": []}, "modules": None}
+        assert bundle.url.endswith(bundle.version)
+
+
+class TestContentBundleRoute:
+    """Tests de la negociación de Content-Encoding del bundle"""
+
+    def test_gzip_only_when_accepted(self, monkeypatch):
+        """Test gzip;q=0 rechaza gzip y recibe el JSON sin comprimir"""
+        bundle = build_bundle(None, {"blocks": []}, {})
+        monkeypatch.setattr(content_routes, "get_bundle", lambda: bundle)
+        app = FastAPI()
+        app.include_router(content_routes.router, prefix="/api/content")
+        client = TestClient(app)
+
+        compressed = client.get("/api/content/bundle", headers={"Accept-Encoding": "gzip"})
+        refused = client.get("/api/content/bundle", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in refused.headers
+        assert refused.content == bundle.raw
@@ -0,0 +1,126 @@
+"""
+Tests unitarios para services/docs_renderer.py
+"""
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.docs as docs_routes
+import services.docs_renderer as renderer
+from services.content_paths import DOCS_CONTENT_DIR
+from services.docs_renderer import DocsCache, render_markdown, resolve_doc_image
+
+DOC_PATH = DOCS_CONTENT_DIR / "01-fundamentos" / "ejemplo.md"
+
+IMAGES = {
+    "images/sdlc.png": {
+        "width": 1200,
+        "height": 600,
+        "variants": [
+            {"format": "webp", "width": 480, "file": "sdlc.abc.480.webp"},
+            {"format": "webp", "width": 1200, "file": "sdlc.abc.1200.webp"},
+            {"format": "jpeg", "width": 480, "file": "sdlc.abc.480.jpg"},
+            {"format": "jpeg", "width": 1200, "file": "sdlc.abc.1200.jpg"},
+        ],
+    }
+}
+
+
+class TestDocImages:
+    """Tests de imágenes responsive en el renderizado"""
+
+    def test_resolve_doc_image(self):
+        """Test rutas absolutas, relativas y externas"""
+        assert resolve_doc_image("/app/docs/images/sdlc.png", DOC_PATH) == "images/sdlc.png"
+        assert resolve_doc_image("./images/a.png", DOC_PATH) == "content/01-fundamentos/images/a.png"
+        assert resolve_doc_image("https://example.com/a.png", DOC_PATH) is None
+        assert resolve_doc_image("../../../secreto.png", DOC_PATH) is None
+
+    def test_picture_with_srcset(self):
+        """Test imagen con variantes -> <picture> con srcset y dimensiones"""
+        html, _ = render_markdown("![SDLC <1>](/app/docs/images/sdlc.png)", doc_path=DOC_PATH, images=IMAGES)
+        assert '<source type="image/webp" srcset="/docs/images/variants/sdlc.abc.480.webp 480w' in html
+        assert 'src="/docs/images/variants/sdlc.abc.480.jpg"' in html
+        assert 'alt="SDLC &lt;1&gt;"' in html
+        assert 'width="1200" height="600"' in html
+
+    def test_image_without_variants_unchanged(self):
+        """Test imágenes sin variantes se renderizan igual que antes"""
+        html, _ = render_markdown("![Logo](/app/docs/images/logo.png)", doc_path=DOC_PATH, images=IMAGES)
+        assert html.strip() == '<p><img src="/app/docs/images/logo.png" alt="Logo" /></p>'
+
+
+def _write_docs(tmp_path, text="# Título\n\nContenido"):
+    (tmp_path / "intro.md").write_text(text, encoding="utf-8")
+    manifest = {"blocks": [{"id": "b1", "docs": [{"id": "intro", "title": "Intro", "file": "intro.md"}]}]}
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return tmp_path / "manifest.json"
+
+
+class TestDocsCache:
+    """Tests de la reconstrucción de la caché y de la ruta /api/docs/{doc_id}"""
+
+    def test_invalid_manifest_keeps_previous_cache(self, tmp_path, monkeypatch):
+        """Test un manifest roto no aborta el arranque ni vacía la caché"""
+        monkeypatch.setattr(renderer, "DOCS_RENDER_WORKERS", 0)
+        cache = DocsCache()
+        manifest_file = _write_docs(tmp_path)
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        assert cache.get("intro") is not None
+
+        manifest_file.write_text("{no es json", encoding="utf-8")
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        assert cache.get("intro") is not None
+
+        empty = DocsCache()
+        asyncio.run(empty.rebuild(manifest_file, tmp_path))
+        assert empty.docs == {}
+
+    def test_unreadable_doc_is_skipped(self, tmp_path, monkeypatch):
+        """Test un documento con UTF-8 inválido se omite sin abortar la reconstrucción"""
+        monkeypatch.setattr(renderer, "DOCS_RENDER_WORKERS", 0)
+        manifest_file = _write_docs(tmp_path)
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+        manifest["blocks"][0]["docs"].append({"id": "broken", "title": "Roto", "file": "broken.md"})
+        manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+        (tmp_path / "broken.md").write_bytes(b"# T\xedtulo en latin-1")
+
+        cache = DocsCache()
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        assert set(cache.docs) == {"intro"}
+
+        # Con una versión anterior renderizada se conserva esa
+        (tmp_path / "broken.md").write_text("# Título", encoding="utf-8")
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        previous = cache.get("broken")
+        (tmp_path / "broken.md").write_bytes(b"\xff\xfe")
+        cache.docs["broken"].mtime = -1
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        assert cache.get("broken").html == previous.html
+        assert cache.get("intro") is not None
+
+    def test_doc_etag_and_304(self, tmp_path, monkeypatch):
+        """Test ETag estable, 304 con If-None-Match y ETag nuevo al cambiar el documento"""
+        monkeypatch.setattr(renderer, "DOCS_RENDER_WORKERS", 0)
+        cache = DocsCache()
+        manifest_file = _write_docs(tmp_path)
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        monkeypatch.setattr(docs_routes, "docs_cache", cache)
+
+        app = FastAPI()
+        app.include_router(docs_routes.router, prefix="/api/docs")
+        client = TestClient(app)
+
+        response = client.get("/api/docs/intro")
+        etag = response.headers["etag"]
+        assert response.status_code == 200 and response.json()["doc"]["title"] == "Intro"
+        assert client.get("/api/docs/intro", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/api/docs/missing").status_code == 404
+
+        (tmp_path / "intro.md").write_text("# Título\n\nOtro contenido", encoding="utf-8")
+        cache.docs["intro"].mtime = -1
+        asyncio.run(cache.rebuild(manifest_file, tmp_path))
+        changed = client.get("/api/docs/intro", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
@@ -0,0 +1,78 @@
+"""
+Tests unitarios para services/gc_monitor.py
+"""
+import gc
+
+import pytest
+
+import services.gc_monitor as gc_monitor_module
+from services.gc_monitor import GCMonitor, enable_after_fork, freeze_after_startup, freeze_before_fork
+
+
+@pytest.fixture
+def unfreeze():
+    yield
+    gc.unfreeze()
+    gc.enable()
+
+
+class TestGCMonitor:
+    """Tests de la medición de pausas por generación"""
+
+    def test_pause_accounting_per_generation(self):
+        """Test cada fase stop cuenta la pausa, los recolectados y los no recolectables de su generación"""
+        monitor = GCMonitor()
+        monitor._callback("start", {"generation": 1})
+        monitor._callback("stop", {"generation": 1, "collected": 7, "uncollectable": 1})
+        monitor._callback("start", {"generation": 2})
+        monitor._callback("stop", {"generation": 2, "collected": 3, "uncollectable": 0})
+
+        generations = monitor.snapshot()["generations"]
+        assert [g["collections"] for g in generations] == [0, 1, 1]
+        assert [g["collected"] for g in generations] == [0, 7, 3]
+        assert [g["uncollectable"] for g in generations] == [0, 1, 0]
+
+    def test_stop_without_start_is_ignored(self):
+        """Test un stop sin start (callback instalado a mitad de colección) no se cuenta"""
+        monitor = GCMonitor()
+        monitor._callback("stop", {"generation": 0, "collected": 5, "uncollectable": 0})
+        assert monitor.snapshot()["generations"][0]["collections"] == 0
+
+    def test_install_and_uninstall(self):
+        """Test el callback se registra una sola vez, mide colecciones reales y se quita"""
+        monitor = GCMonitor()
+        monitor.install()
+        monitor.install()
+        try:
+            assert gc.callbacks.count(monitor._callback) == 1
+            gc.collect(2)
+            assert monitor.snapshot()["enabled"] is True
+            assert monitor.snapshot()["generations"][2]["collections"] >= 1
+        finally:
+            monitor.uninstall()
+
+        assert monitor._callback not in gc.callbacks
+        assert monitor.snapshot()["enabled"] is False
+        monitor.uninstall()
+
+
+class TestFreeze:
+    """Tests del congelado del heap antes del fork y tras el arranque"""
+
+    def test_freeze_before_fork(self, unfreeze):
+        """Test el maestro congela su heap y el worker vuelve a activar el GC"""
+        gc.disable()
+        assert freeze_before_fork() == gc.get_freeze_count() > 0
+
+        enable_after_fork()
+        assert gc.isenabled()
+
+    def test_freeze_after_startup_disabled(self, monkeypatch):
+        """Test sin GC_FREEZE_AFTER_STARTUP no congela nada"""
+        monkeypatch.setattr(gc_monitor_module, "GC_FREEZE_AFTER_STARTUP", False)
+        assert freeze_after_startup() == 0
+
+    def test_freeze_after_startup_enabled(self, monkeypatch, unfreeze):
+        """Test con la opción activa devuelve el número de objetos congelados"""
+        monkeypatch.setattr(gc_monitor_module, "GC_FREEZE_AFTER_STARTUP", True)
+        assert freeze_after_startup() == gc.get_freeze_count() > 0
@@ -0,0 +1,121 @@
+"""
+Tests unitarios para services/idempotency.py
+"""
+import asyncio
+import inspect
+
+from pymongo.errors import DuplicateKeyError
+
+import services.idempotency as idempotency
+from services.idempotency import idempotent, _fingerprint
+
+
+class TestIdempotency:
+    """Tests del decorador de Idempotency-Key (sin base de datos)"""
+
+    def test_signature_exposes_header(self):
+        """Test la firma que ve FastAPI incluye la cabecera Idempotency-Key"""
+        @idempotent("xp")
+        async def endpoint(data: dict, if_match: str = None):
+            return {"data": data}
+
+        parameters = inspect.signature(endpoint).parameters
+        assert list(parameters) == ["data", "if_match", "idempotency_key"]
+        assert parameters["idempotency_key"].default.alias == "Idempotency-Key"
+
+    def test_without_key_runs_endpoint(self):
+        """Test sin cabecera el endpoint se ejecuta sin tocar la base de datos"""
+        calls = []
+
+        @idempotent("xp")
+        async def endpoint(data: dict):
+            calls.append(data)
+            return {"ok": True}
+
+        assert asyncio.run(endpoint(data={"amount": 10})) == {"ok": True}
+        assert calls == [{"amount": 10}]
+
+    def test_fingerprint_ignores_key_order(self):
+        """Test misma huella para el mismo cuerpo"""
+        assert _fingerprint({"a": 1, "b": [1, 2]}) == _fingerprint({"b": [1, 2], "a": 1})
+        assert _fingerprint({"a": 1}) != _fingerprint({"a": 2})
+
+
+class FakeKeys:
+    """Colección idempotency_keys mínima en memoria"""
+
+    def __init__(self):
+        self.docs = {}
+        self.renewals = 0
+
+    async def insert_one(self, doc):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicado")
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        return None
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and doc["status"] == query.get("status", doc["status"]):
+            if "locked_at" in update["$set"]:
+                self.renewals += 1
+            doc.update(update["$set"])
+
+    async def delete_one(self, query):
+        self.docs.pop(query["_id"], None)
+
+
+class FakeDB:
+    def __init__(self):
+        self.idempotency_keys = FakeKeys()
+
+
+class Body:
+    def __init__(self, user_id, amount):
+        self.user_id = user_id
+        self.amount = amount
+
+    def model_dump(self):
+        return {"user_id": self.user_id, "amount": self.amount}
+
+
+class TestIdempotencyKeys:
+    """Tests de reserva de claves con una colección en memoria"""
+
+    def _endpoint(self, monkeypatch, delay=0.0):
+        db = FakeDB()
+        monkeypatch.setattr(idempotency, "get_database", lambda: db)
+
+        @idempotent("xp")
+        async def endpoint(data):
+            await asyncio.sleep(delay)
+            return {"user_id": data.user_id, "amount": data.amount}
+
+        return db, endpoint
+
+    def test_keys_are_scoped_per_user(self, monkeypatch):
+        """Test la misma clave en dos usuarios no choca"""
+        db, endpoint = self._endpoint(monkeypatch)
+
+        async def run():
+            first = await endpoint(data=Body("u1", 5), idempotency_key="k")
+            second = await endpoint(data=Body("u2", 7), idempotency_key="k")
+            return first, second
+
+        assert asyncio.run(run()) == ({"user_id": "u1", "amount": 5}, {"user_id": "u2", "amount": 7})
+        assert set(db.idempotency_keys.docs) == {"xp:u1:k", "xp:u2:k"}
+
+    def test_lock_renewed_while_running(self, monkeypatch):
+        """Test una petición larga renueva su reserva para que otra no la retome"""
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_LOCK_SECONDS", 0.03)
+        db, endpoint = self._endpoint(monkeypatch, delay=0.1)
+
+        asyncio.run(endpoint(data=Body("u1", 5), idempotency_key="k"))
+
+        assert db.idempotency_keys.renewals >= 2
+        assert db.idempotency_keys.docs["xp:u1:k"]["status"] == "done"
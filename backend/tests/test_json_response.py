@@ -0,0 +1,60 @@
+"""
+Tests unitarios para utils/json_response.py
+"""
+import json
+from datetime import datetime
+
+import bson
+import pytest
+from bson import Binary, Int64, ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from utils.json_response import FastJSONResponse, dumps, encode_default, register_bson_encoders
+
+# Como en server.py al crear la app
+register_bson_encoders()
+
+
+class TestFastJSONResponse:
+    """Tests de serialización de documentos de MongoDB"""
+
+    def test_raw_mongo_document(self):
+        """Test datetime, ObjectId, bytes e Int64 sin conversión previa"""
+        user_id = ObjectId()
+        created_at = datetime(2024, 1, 2, 3, 4, 5, 6)
+        doc = {"_id": user_id, "created_at": created_at, "body": Binary(b"\xff\x00"), "xp": Int64(5)}
+
+        assert json.loads(FastJSONResponse(doc).body) == {
+            "_id": str(user_id),
+            "created_at": created_at.isoformat(),
+            "body": "/wA=",
+            "xp": 5
+        }
+
+    def test_same_output_as_jsonable_encoder(self):
+        """Test las rutas que devuelven dict producen el mismo JSON"""
+        doc = {"_id": ObjectId(), "last_sync": datetime.utcnow(), "body": Binary(b"\x00\x01")}
+        assert json.loads(dumps(doc)) == jsonable_encoder(doc)
+
+    def test_document_read_from_mongo(self):
+        """Test documento decodificado por bson (el binario de subtipo 0 llega como bytes)"""
+        doc = bson.decode(bson.encode({"_id": ObjectId(), "body": Binary(b"\xff\x00"), "at": datetime(2024, 1, 1)}))
+        assert type(doc["body"]) is bytes
+
+        encoded = jsonable_encoder(doc)
+        assert encoded["body"] == "/wA="
+        assert json.loads(FastJSONResponse(doc).body) == encoded
+
+    def test_stdlib_fallback(self, monkeypatch):
+        """Test sin orjson se usa json con el mismo formato"""
+        import utils.json_response as json_response
+
+        doc = {"id": ObjectId(), "at": datetime(2024, 1, 1), "tags": ["a"]}
+        expected = dumps(doc)
+        monkeypatch.setattr(json_response, "orjson", None)
+        assert json.loads(json_response.dumps(doc)) == json.loads(expected)
+
+    def test_unknown_type(self):
+        """Test tipos no soportados"""
+        with pytest.raises(TypeError):
+            encode_default(object())
@@ -0,0 +1,81 @@
+"""
+Tests unitarios para services/logging_config.py
+"""
+import json
+import logging
+import sys
+
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags, use_span
+
+from services.logging_config import ContextFilter, JsonFormatter, NonBlockingQueueHandler, request_id_var
+
+
+def _record(msg="Progreso guardado %s", args=("u1",), exc_info=None, **extra):
+    record = logging.LogRecord("qa_master_path.test", logging.INFO, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestContextFilter:
+    """Tests del filtro que añade request id y trace id"""
+
+    def test_without_context(self):
+        """Test fuera de un request los campos quedan en None"""
+        record = _record()
+        assert ContextFilter().filter(record) is True
+        assert (record.request_id, record.trace_id, record.span_id) == (None, None, None)
+
+    def test_request_and_span(self):
+        """Test toma el request id del contextvar y los ids del span actual"""
+        span = NonRecordingSpan(SpanContext(
+            trace_id=0x0af7651916cd43dd8448eb211c80319c,
+            span_id=0xb7ad6b7169203331,
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED),
+        ))
+        record = _record()
+
+        token = request_id_var.set("abc-123")
+        try:
+            with use_span(span):
+                ContextFilter().filter(record)
+        finally:
+            request_id_var.reset(token)
+
+        assert record.request_id == "abc-123"
+        assert record.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert record.span_id == "b7ad6b7169203331"
+
+
+class TestJsonFormatter:
+    """Tests del formateador JSON"""
+
+    def test_fields_and_extra(self):
+        """Test campos base, ids de contexto y campos extra en una línea JSON"""
+        record = _record(request_id="abc-123", trace_id=None, span_id=None, user_id="u1", duration_ms=1.5)
+        output = JsonFormatter().format(record)
+
+        assert "\n" not in output
+        entry = json.loads(output)
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "qa_master_path.test"
+        assert entry["message"] == "Progreso guardado u1"
+        assert entry["request_id"] == "abc-123"
+        assert entry["user_id"] == "u1"
+        assert entry["duration_ms"] == 1.5
+        assert "trace_id" not in entry
+        assert "args" not in entry and "msg" not in entry
+
+    def test_exception_after_queue(self):
+        """Test la excepción formateada al encolar llega al JSON"""
+        try:
+            raise ValueError("fallo")
+        except ValueError:
+            record = _record(exc_info=sys.exc_info())
+
+        prepared = NonBlockingQueueHandler(None).prepare(record)
+        entry = json.loads(JsonFormatter().format(prepared))
+
+        assert prepared.exc_info is None
+        assert entry["message"] == "Progreso guardado u1"
+        assert "ValueError: fallo" in entry["exc_info"]
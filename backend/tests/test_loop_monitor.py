@@ -0,0 +1,59 @@
+"""
+Tests unitarios para services/loop_monitor.py
+"""
+import asyncio
+import logging
+import time
+
+from services.loop_monitor import LoopMonitor
+
+
+def _blocking_call(seconds):
+    time.sleep(seconds)
+
+
+async def _run(monitor, block=0.0):
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        if block:
+            _blocking_call(block)
+        await asyncio.sleep(0.1)
+    finally:
+        monitor.stop()
+
+
+class TestLoopMonitor:
+    """Tests de la medición de lag y la detección de bloqueos"""
+
+    def test_idle_loop(self, caplog):
+        """Test sin bloqueos se registran latidos y ningún aviso"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.2)
+        caplog.set_level(logging.WARNING, logger="services.loop_monitor")
+
+        asyncio.run(_run(monitor))
+
+        assert monitor.blocked_count == 0
+        assert monitor.lag.snapshot()["count"] > 0
+        assert caplog.records == []
+
+    def test_stall_reported_once_with_stack(self, caplog):
+        """Test un bloqueo largo se reporta una sola vez con el stack de la llamada"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        caplog.set_level(logging.WARNING, logger="services.loop_monitor")
+
+        asyncio.run(_run(monitor, block=0.4))
+
+        assert monitor.blocked_count == 1
+        assert len(caplog.records) == 1
+        assert "_blocking_call" in caplog.records[0].getMessage()
+        assert monitor.lag.snapshot()["max"] >= 0.3
+
+    def test_snapshot_after_stop(self):
+        """Test el snapshot indica si el monitor está activo"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.2)
+        asyncio.run(_run(monitor))
+
+        snapshot = monitor.snapshot()
+        assert snapshot["enabled"] is False
+        assert snapshot["block_threshold_seconds"] == 0.2
@@ -0,0 +1,113 @@
+"""
+Tests unitarios para services/memory_diagnostics.py
+"""
+import threading
+import tracemalloc
+
+import pytest
+
+import services.memory_diagnostics as diagnostics
+from services.memory_diagnostics import MemoryDiagnostics, get_cache_sizes, register_cache
+
+_retained = []
+
+
+def _allocate_blocks():
+    # Sitio de asignación reconocible en el diff
+    _retained.extend(bytearray(10_000) for _ in range(200))
+
+
+@pytest.fixture
+def memory():
+    was_tracing = tracemalloc.is_tracing()
+    yield MemoryDiagnostics(frames=1)
+    _retained.clear()
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+class TestMemoryDiagnostics:
+    """Tests de snapshots de tracemalloc, base y diff"""
+
+    def test_first_snapshot_has_no_reference(self, memory):
+        """Test el primer snapshot queda como base y no compara con nada"""
+        result = memory.take_snapshot()
+        assert result["compared_to"] is None
+        assert result["previous_taken_at"] is None
+        assert result["top_growth"] == []
+
+    def test_diff_reports_allocation_site(self, memory):
+        """Test el crecimiento entre snapshots señala la línea que asignó la memoria"""
+        first = memory.take_snapshot()
+        _allocate_blocks()
+        result = memory.take_snapshot(limit=5)
+
+        assert result["compared_to"] == "previous"
+        assert result["previous_taken_at"] == first["taken_at"]
+        top = result["top_growth"][0]
+        assert top["site"].startswith(__file__)
+        assert top["size_diff_bytes"] >= 2_000_000
+        assert top["count_diff"] >= 200
+
+    def test_baseline_versus_previous(self, memory):
+        """Test contra la base se acumula el crecimiento; contra el anterior solo lo nuevo"""
+        memory.take_snapshot()
+        _allocate_blocks()
+        memory.take_snapshot()
+
+        previous = memory.take_snapshot(compare_to="previous", limit=5)
+        baseline = memory.take_snapshot(compare_to="baseline", limit=5)
+
+        assert all(stat["size_diff_bytes"] < 2_000_000 for stat in previous["top_growth"])
+        assert baseline["compared_to"] == "baseline"
+        assert baseline["top_growth"][0]["site"].startswith(__file__)
+
+    def test_reset_discards_snapshots(self, memory):
+        """Test tras reset el siguiente snapshot vuelve a ser la base"""
+        memory.take_snapshot()
+        memory.take_snapshot()
+        memory.reset()
+
+        result = memory.take_snapshot(compare_to="baseline")
+        assert result["compared_to"] is None
+        assert result["previous_taken_at"] is None
+
+    def test_concurrent_snapshots_share_one_baseline(self, memory):
+        """Test snapshots simultáneos (threadpool) fijan una sola base y cada uno ve un anterior"""
+        results = []
+        barrier = threading.Barrier(4)
+
+        def take():
+            barrier.wait()
+            results.append(memory.take_snapshot(limit=1))
+
+        threads = [threading.Thread(target=take) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(result["compared_to"] is None for result in results) == 1
+        taken = {result["taken_at"] for result in results}
+        assert all(result["previous_taken_at"] in taken for result in results if result["compared_to"])
+
+    def test_summary(self, memory):
+        """Test el resumen incluye RSS, tracemalloc, objetos del GC y cachés registradas"""
+        memory.start()
+        summary = memory.summary(limit=3)
+
+        assert summary["rss_bytes"] > 0
+        assert summary["tracemalloc"]["tracing"] is True
+        assert len(summary["gc_objects"]) == 3
+        assert isinstance(summary["caches"], dict)
+
+
+class TestCacheRegistry:
+    """Tests del registro de tamaños de caché"""
+
+    def test_failing_cache_reports_minus_one(self, monkeypatch):
+        """Test una caché cuyo tamaño falla se reporta como -1 sin romper el resto"""
+        monkeypatch.setattr(diagnostics, "_cache_registry", {})
+        register_cache("ok", lambda: 3)
+        register_cache("broken", lambda: 1 // 0)
+        assert get_cache_sizes() == {"ok": 3, "broken": -1}
@@ -0,0 +1,100 @@
+"""
+Tests unitarios para utils/msgpack_route.py
+"""
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from bson import ObjectId
+
+from utils.json_response import FastJSONResponse
+from utils.msgpack_route import MsgPackRoute, wants_msgpack
+
+msgpack = pytest.importorskip("msgpack")
+
+
+class Item(BaseModel):
+    name: str
+    amount: int = 1
+
+
+def _client() -> TestClient:
+    router = APIRouter(route_class=MsgPackRoute)
+
+    @router.post("/items")
+    async def create_item(item: Item):
+        return {"success": True, "item": item.model_dump()}
+
+    @router.get("/direct")
+    async def direct():
+        return FastJSONResponse(content={"_id": ObjectId("0123456789abcdef01234567"), "body": b"\x00"}, headers={"ETag": '"1"'})
+
+    @router.get("/replayed")
+    async def replayed():
+        return JSONResponse(content={"success": True}, headers={"Idempotent-Replayed": "true"})
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+class TestMsgPackNegotiation:
+    """Tests de negociación JSON / MessagePack"""
+
+    def test_wants_msgpack(self):
+        """Test preferencia según Accept y calidad"""
+        assert not wants_msgpack(None)
+        assert not wants_msgpack("application/json")
+        assert not wants_msgpack("*/*")
+        assert wants_msgpack("application/msgpack")
+        assert wants_msgpack("application/x-msgpack, application/json")
+        assert wants_msgpack("application/json;q=0.5, application/msgpack")
+        assert not wants_msgpack("application/msgpack;q=0.1, application/json")
+        assert not wants_msgpack("application/msgpack;q=0")
+
+    def test_json_by_default(self):
+        """Test sin Accept msgpack la respuesta sigue siendo JSON"""
+        response = _client().post("/items", json={"name": "a"})
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["vary"] == "Accept"
+        assert response.json() == {"success": True, "item": {"name": "a", "amount": 1}}
+
+    def test_msgpack_request_and_response(self):
+        """Test cuerpo msgpack validado como JSON y respuesta msgpack"""
+        response = _client().post(
+            "/items",
+            content=msgpack.packb({"name": "a", "amount": 3}),
+            headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == {"success": True, "item": {"name": "a", "amount": 3}}
+
+    def test_msgpack_errors(self):
+        """Test cuerpo inválido (400) y validación (422, en JSON)"""
+        client = _client()
+        headers = {"Content-Type": "application/msgpack"}
+        assert client.post("/items", content=b"\xc1", headers=headers).status_code == 400
+        response = client.post("/items", content=msgpack.packb({"amount": 3}), headers=headers)
+        assert response.status_code == 422
+        assert response.headers["content-type"] == "application/json"
+
+    def test_json_response_repacked(self):
+        """Test respuestas JSONResponse del endpoint convertidas conservando cabeceras"""
+        response = _client().get("/replayed", headers={"Accept": "application/msgpack"})
+        assert response.headers["content-type"] == "application/msgpack"
+        assert response.headers["idempotent-replayed"] == "true"
+        assert msgpack.unpackb(response.content) == {"success": True}
+
+    def test_fast_json_response_reuses_content(self, monkeypatch):
+        """Test las lecturas directas se pasan a msgpack sin volver a parsear el JSON"""
+        import utils.msgpack_route as msgpack_route
+
+        def no_parse(_):
+            raise AssertionError("json.loads no debería llamarse")
+
+        monkeypatch.setattr(msgpack_route.json, "loads", no_parse)
+        response = _client().get("/direct", headers={"Accept": "application/msgpack"})
+        assert response.headers["etag"] == '"1"'
+        assert msgpack.unpackb(response.content) == {"_id": "0123456789abcdef01234567", "body": b"\x00"}
@@ -0,0 +1,157 @@
+"""
+Tests unitarios para services/notes_store.py
+"""
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+import services.notes_store as store
+from services.notes_store import (
+    encode_note, decode_note, note_terms, search_notes,
+    get_note, get_notes, migrate_embedded_notes, replace_notes, NoteCodecError
+)
+from tests.fake_mongo import FakeDatabase
+
+
+class TestNoteCompression:
+    """Tests de la compresión transparente de notas largas"""
+
+    def test_short_note_is_plain_text(self):
+        """Test notas por debajo del umbral sin comprimir"""
+        assert encode_note("Repasar XPath") == {"text": "Repasar XPath"}
+        assert decode_note({"text": "Repasar XPath"}) == "Repasar XPath"
+
+    def test_long_note_roundtrip(self, monkeypatch):
+        """Test notas largas comprimidas con zlib y leídas sin cambios"""
+        monkeypatch.setattr(store, "NOTES_CODEC", "zlib")
+        text = "Los localizadores estables evitan pruebas frágiles en Selenium. " * 50
+        fields = encode_note(text)
+
+        assert fields["codec"] == "zlib"
+        assert "text" not in fields
+        assert len(fields["body"]) < len(text) // 5
+        assert decode_note(fields) == text
+
+    def test_configured_codec_falls_back_to_zlib(self, monkeypatch):
+        """Test un NOTES_CODEC desconocido o zstd sin zstandard se cambia por zlib"""
+        assert store._configured_codec("zlib") == "zlib"
+        assert store._configured_codec("lz4") == "zlib"
+        monkeypatch.setattr(store, "zstandard", None)
+        assert store._configured_codec("zstd") == "zlib"
+
+    def test_unreadable_codec_raises_clear_error(self, monkeypatch):
+        """Test notas con un codec desconocido o zstd sin la librería dan NoteCodecError"""
+        with pytest.raises(NoteCodecError, match="desconocido"):
+            decode_note({"body": b"x", "codec": "lz4"})
+
+        monkeypatch.setattr(store, "zstandard", None)
+        with pytest.raises(NoteCodecError, match="zstandard"):
+            decode_note({"body": b"x", "codec": "zstd"})
+
+
+class TestNoteTerms:
+    """Tests de los términos guardados para la búsqueda en notas"""
+
+    def test_terms_are_folded_and_unique(self):
+        """Test sin acentos, sin palabras vacías y sin repetir"""
+        assert note_terms("Gestión de la API y gestion de Selenium") == ["api", "gestion", "selenium"]
+
+
+def _notes(db, user_id):
+    return {doc["module_id"]: decode_note(doc) for doc in db.notes.docs if doc["user_id"] == user_id}
+
+
+class TestNoteMigration:
+    """Tests de la migración de notas embebidas en users.progress.notes"""
+
+    def _user(self, notes):
+        db = FakeDatabase()
+        user_id = ObjectId()
+        db.users.docs.append({"_id": user_id, "progress": {"notes": dict(notes)}})
+        return db, user_id
+
+    def test_migration_keeps_existing_notes(self):
+        """Test una nota ya migrada no se pisa con la copia embebida"""
+        db, user_id = self._user({"1": "antigua", "2": "solo embebida"})
+        db.notes.docs.append({"_id": ObjectId(), "user_id": user_id, "module_id": "1", "text": "nueva"})
+
+        asyncio.run(migrate_embedded_notes(db, user_id, {"1": "antigua", "2": "solo embebida"}))
+
+        assert _notes(db, user_id) == {"1": "nueva", "2": "solo embebida"}
+        assert db.users.docs[0]["progress"]["notes"] == {}
+
+    def test_get_note_migrates_single_note(self):
+        """Test leer una nota embebida la mueve a la colección y deja las demás"""
+        db, user_id = self._user({"1": "uno", "2": "dos"})
+
+        assert asyncio.run(get_note(db, user_id, "1")) == "uno"
+        assert _notes(db, user_id) == {"1": "uno"}
+        assert db.users.docs[0]["progress"]["notes"] == {"2": "dos"}
+
+    def test_get_notes_merges_embedded(self):
+        """Test get_notes devuelve las notas de ambos sitios y migra las embebidas"""
+        db, user_id = self._user({"2": "dos"})
+        db.notes.docs.append({"_id": ObjectId(), "user_id": user_id, "module_id": "1", "text": "uno"})
+
+        notes = asyncio.run(get_notes(db, user_id, {"2": "dos"}))
+
+        assert notes == {"1": "uno", "2": "dos"}
+        assert _notes(db, user_id) == notes
+
+
+class TestReplaceNotes:
+    """Tests de la sincronización completa de notas"""
+
+    def test_replace_upserts_and_removes_missing(self):
+        """Test las notas nuevas se escriben y las que faltan se borran"""
+        db = FakeDatabase()
+        user_id = ObjectId()
+        asyncio.run(replace_notes(db, user_id, {"1": "uno", "2": "dos"}))
+        asyncio.run(replace_notes(db, user_id, {"2": "dos bis", "3": "tres"}))
+
+        assert _notes(db, user_id) == {"2": "dos bis", "3": "tres"}
+
+    def test_failed_write_keeps_notes(self):
+        """Test si la escritura falla no se borra ninguna nota"""
+        db = FakeDatabase()
+        user_id = ObjectId()
+        asyncio.run(replace_notes(db, user_id, {"1": "uno"}))
+
+        async def failing(*args, **kwargs):
+            raise PyMongoError("sin conexión")
+
+        db.notes.bulk_write = failing
+        with pytest.raises(PyMongoError):
+            asyncio.run(replace_notes(db, user_id, {"2": "dos"}))
+
+        assert _notes(db, user_id) == {"1": "uno"}
+
+
+class TestNoteSearch:
+    """Tests de la búsqueda en notas sobre una base de datos en memoria"""
+
+    def test_search_includes_embedded_and_legacy_notes(self, monkeypatch):
+        """Test la primera búsqueda migra las notas embebidas e indexa las antiguas; las siguientes no"""
+        monkeypatch.setattr(store, "_search_ready", set())
+        db = FakeDatabase()
+        user_id = ObjectId()
+        db.users.docs.append({"_id": user_id, "progress": {"notes": {"1": "Localizadores XPath en Selenium"}}})
+        db.notes.docs.append({"_id": ObjectId(), "user_id": user_id, "module_id": "3", "text": "Selenium Grid"})
+
+        prepared = []
+        original = store._index_legacy_notes
+
+        async def counting(*args):
+            prepared.append(args)
+            await original(*args)
+
+        monkeypatch.setattr(store, "_index_legacy_notes", counting)
+
+        found = asyncio.run(search_notes(db, user_id, "selenium"))
+        assert [result["module_id"] for result in found["results"]] == ["3", "1"]
+        assert db.users.docs[0]["progress"]["notes"] == {}
+
+        assert asyncio.run(search_notes(db, user_id, "xpath"))["total"] == 1
+        assert len(prepared) == 1
@@ -0,0 +1,193 @@
+"""
+Tests unitarios para services/progress_hub.py
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+import services.progress_hub as hub_module
+from services.progress_hub import ProgressHub, current_origin
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.sent = []
+        self.delay = delay
+
+    async def send_json(self, event):
+        await asyncio.sleep(self.delay)
+        self.sent.append(event)
+
+
+class TestProgressHub:
+    """Tests del reparto en proceso (sin MongoDB)"""
+
+    def test_fan_out_skips_origin_and_other_users(self, monkeypatch):
+        """Test el evento llega a las otras conexiones del usuario, no a la que escribió"""
+        monkeypatch.setattr(hub_module, "PROGRESS_HUB_CROSS_WORKER", False)
+        hub = ProgressHub()
+        origin, other, stranger = FakeSocket(), FakeSocket(), FakeSocket()
+        origin_id = hub.connect("u1", origin)
+        hub.connect("u1", other)
+        hub.connect("u2", stranger)
+
+        async def publish():
+            current_origin.set(origin_id)
+            await hub.publish("u1", {"type": "op", "op": "xp", "data": {"amount": 5}, "version": 2})
+
+        asyncio.run(publish())
+
+        assert origin.sent == [] and stranger.sent == []
+        assert other.sent == [{"type": "op", "op": "xp", "data": {"amount": 5}, "version": 2}]
+
+    def test_slow_socket_does_not_block(self, monkeypatch):
+        """Test un socket lento se abandona tras el timeout sin retrasar a los demás"""
+        monkeypatch.setattr(hub_module, "PROGRESS_HUB_CROSS_WORKER", False)
+        monkeypatch.setattr(hub_module, "PROGRESS_SEND_TIMEOUT", 0.05)
+        hub = ProgressHub()
+        slow, fast = FakeSocket(delay=1.0), FakeSocket()
+        hub.connect("u1", slow)
+        hub.connect("u1", fast)
+
+        async def publish():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            task = hub.publish("u1", {"type": "op"})
+            # La escritura no espera al reparto
+            assert not task.done()
+            await task
+            return loop.time() - started
+
+        assert asyncio.run(publish()) < 0.5
+        assert fast.sent == [{"type": "op"}] and slow.sent == []
+
+    def test_no_connections_skips_fan_out(self, monkeypatch):
+        """Test sin conexiones del usuario no se intenta ningún envío"""
+        monkeypatch.setattr(hub_module, "PROGRESS_HUB_CROSS_WORKER", False)
+        hub = ProgressHub()
+
+        async def publish():
+            await hub.publish("u1", {"type": "op"})
+
+        asyncio.run(publish())
+        assert hub.delivered == 0 and "u1" not in hub._connections
+
+    def test_disconnect(self):
+        """Test al cerrar la última conexión el usuario deja de estar registrado"""
+        hub = ProgressHub()
+        connection_id = hub.connect("u1", FakeSocket())
+        hub.disconnect("u1", connection_id)
+        assert hub.connection_count() == 0
+        assert "u1" not in hub._connections
+
+
+class FakeEventsCursor:
+    """Cursor tailable sobre la lista de eventos (orden natural = orden de inserción)"""
+
+    def __init__(self, events, query):
+        self._events = events
+        self._since = query.get("_id", {}).get("$gte")
+        self._position = 0
+        self.alive = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while self._position < len(self._events):
+            document = self._events[self._position]
+            self._position += 1
+            if self._since is None or document["_id"] >= self._since:
+                return document
+        self.alive = False
+        raise StopAsyncIteration
+
+
+class FakeEvents:
+    """Colección progress_events: los find tailable pueden fallar según lo programado"""
+
+    def __init__(self, errors):
+        self.events = []
+        self.errors = list(errors)
+        self.opened = 0
+
+    def find(self, query, projection=None, cursor_type=None):
+        if cursor_type is None:
+            return FakeEventsCursor(self.events, query)
+        self.opened += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeEventsCursor(self.events, query)
+
+
+class FakeEventsDB:
+    def __init__(self, events):
+        self.events = events
+
+    def __getitem__(self, name):
+        return self.events
+
+    async def create_collection(self, *args, **kwargs):
+        pass
+
+
+def _event(user_id, amount, seconds_ago=0):
+    # Hora del _id desplazada, con el resto de bytes únicos como en un ObjectId real
+    created = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+    return {
+        "_id": ObjectId(ObjectId.from_datetime(created).binary[:4] + ObjectId().binary[4:]),
+        "user_id": user_id,
+        "worker_id": "otro",
+        "origin": None,
+        "event": json.dumps({"type": "op", "amount": amount}),
+    }
+
+
+class TestTail:
+    """Tests de la lectura de eventos de otros workers"""
+
+    def _run_tail(self, monkeypatch, events, steps):
+        monkeypatch.setattr(hub_module, "PROGRESS_EVENTS_RETRY", 0)
+        monkeypatch.setattr(hub_module, "get_database", lambda: FakeEventsDB(events))
+        hub = ProgressHub()
+        socket = FakeSocket()
+        hub.connect("u1", socket)
+
+        async def run():
+            task = asyncio.get_running_loop().create_task(hub._tail())
+            for step in steps:
+                await asyncio.sleep(0.02)
+                step()
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+        return socket
+
+    def test_resume_keeps_out_of_order_events(self, monkeypatch):
+        """Test al reabrir el cursor se reparte un evento con _id anterior al último visto, sin duplicados"""
+        events = FakeEvents([])
+        # Anterior al arranque del worker: no se reparte
+        events.events.append(_event("u1", 20, seconds_ago=3))
+
+        socket = self._run_tail(monkeypatch, events, [
+            lambda: events.events.append(_event("u1", 1)),
+            # Insertado después por otro worker con un _id menor
+            lambda: events.events.append(_event("u1", 2, seconds_ago=3)),
+        ])
+
+        assert [event["amount"] for event in socket.sent] == [1, 2]
+        assert events.opened >= 2
+
+    def test_unexpected_error_restarts_tail(self, monkeypatch, caplog):
+        """Test un error que no es de PyMongo se registra y la lectura continúa"""
+        events = FakeEvents([PyMongoError("cursor cerrado"), ValueError("inesperado")])
+
+        socket = self._run_tail(monkeypatch, events, [lambda: events.events.append(_event("u1", 5))])
+
+        assert [event["amount"] for event in socket.sent] == [5]
+        assert any("inesperado" in record.exc_text for record in caplog.records if record.exc_text)
@@ -0,0 +1,70 @@
+"""
+Tests unitarios para services/progress_merge.py
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from routes.progress import ProgressOp, _validate_op
+from services.progress_merge import merge_ops, normalize_timestamp
+
+NOW = datetime(2026, 1, 10, 12, 0, 0)
+
+
+def _op(op_type, key=None, value=None, amount=None, minutes=0):
+    return {"type": op_type, "key": key, "value": value, "amount": amount, "ts": NOW + timedelta(minutes=minutes)}
+
+
+class TestProgressMerge:
+    """Tests de la fusión del registro offline"""
+
+    def test_last_writer_wins_per_key(self):
+        """Test la operación más reciente gana y las anteriores al reloj del servidor se descartan"""
+        progress = {
+            "modules": {"2": True},
+            "clocks": {"modules": {"2": NOW}},
+        }
+        ops = [
+            _op("module", "1", True, minutes=-3),
+            _op("module", "1", False, minutes=-1),
+            _op("module", "1", True, minutes=-2),
+            _op("module", "2", False, minutes=-5),
+        ]
+        merged = merge_ops(progress, ops)
+
+        assert merged.modules == {"1": False, "2": True}
+        assert merged.clocks["modules"]["1"] == NOW - timedelta(minutes=1)
+        assert (merged.applied, merged.skipped) == (3, 1)
+
+    def test_grow_only_badges_and_xp(self):
+        """Test badges como conjunto que crece y XP como contador que suma"""
+        progress = {"badges": ["inicio"], "xp": 40}
+        ops = [_op("badge", "inicio"), _op("badge", "api_master"), _op("xp", amount=10), _op("xp", amount=5)]
+        merged = merge_ops(progress, ops)
+
+        assert merged.badges == ["inicio", "api_master"]
+        assert merged.xp == 55
+
+    def test_reset_discards_older_ops(self):
+        """Test operaciones anteriores al reset ignoradas y horas del futuro recortadas"""
+        merged = merge_ops({"reset_at": NOW}, [_op("xp", amount=10, minutes=-1), _op("note", "1", "hola", minutes=1)])
+        assert merged.xp == 0
+        assert merged.notes == {"1": ("hola", NOW + timedelta(minutes=1))}
+
+        future = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        assert normalize_timestamp(future, NOW) == NOW
+
+
+class TestReplayValidation:
+    """Tests de validación de operaciones del registro offline"""
+
+    def test_note_value_must_be_text(self):
+        """Test una nota con value no textual se rechaza en vez de borrarse"""
+        for value in (False, True, None):
+            op = ProgressOp(type="note", key="1", value=value, ts=NOW)
+            with pytest.raises(HTTPException) as error:
+                _validate_op(0, op, NOW)
+            assert error.value.status_code == 400
+
+        assert _validate_op(0, ProgressOp(type="note", key="1", value="", ts=NOW), NOW)["value"] == ""
@@ -0,0 +1,154 @@
+"""
+Tests unitarios para routes/progress.py (endpoints llamados directamente, base de datos en memoria)
+"""
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import PyMongoError
+
+import routes.progress as progress
+from routes.progress import NotePatch, NoteUpdate, ProgressSync, patch_module_note, sync_progress, update_note
+from services.notes_store import get_note, save_note
+from tests.fake_mongo import FakeDatabase
+from utils.text_patch import text_hash
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(progress, "get_database", lambda: db)
+    return db
+
+
+def _user(db, version=3):
+    user_id = ObjectId()
+    db.users.docs.append({"_id": user_id, "progress": {"version": version}})
+    return user_id
+
+
+def _version(db):
+    return db.users.docs[0]["progress"]["version"]
+
+
+def _interleaved(monkeypatch, db, name):
+    # Otro escritor sube la versión justo antes de que el endpoint escriba la nota
+    original = getattr(progress, name)
+
+    async def write(*args, **kwargs):
+        await db.users.update_one({}, {"$inc": {"progress.version": 1}})
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(progress, name, write)
+
+
+class TestSyncKeys:
+    """Tests de validación de las claves de un sync completo"""
+
+    @pytest.mark.parametrize("field, key", [
+        ("modules", "abc"),
+        ("modules", "-1"),
+        ("subtasks", "1-x"),
+        ("subtasks", "1"),
+        ("notes", "abc"),
+    ])
+    def test_invalid_key_is_rejected(self, db, field, key):
+        """Test una clave inválida responde 400 sin escribir nada"""
+        user_id = ObjectId()
+        db.users.docs.append({"_id": user_id, "progress": {"version": 0}})
+        values = "texto" if field == "notes" else True
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(sync_progress(data=ProgressSync(user_id=str(user_id), **{field: {key: values}}), if_match=None, idempotency_key=None))
+
+        assert error.value.status_code == 400
+        assert key in error.value.detail
+        assert db.users.docs[0]["progress"] == {"version": 0}
+
+
+class TestNoteWrites:
+    """Tests del orden versión -> nota en PUT y PATCH /note con un escritor intercalado"""
+
+    def test_put_after_reservation_succeeds(self, db, monkeypatch):
+        """Test una escritura intercalada tras la reserva no convierte en 409 una nota ya guardada"""
+        user_id = _user(db)
+        _interleaved(monkeypatch, db, "save_note")
+
+        result = asyncio.run(update_note(
+            data=NoteUpdate(user_id=str(user_id), module_id="1", note_text="Nota"), if_match='"3"'
+        ))
+
+        assert result["version"] == 4
+        assert result["notes"] == {"1": "Nota"}
+        assert _version(db) == 5
+
+    def test_put_conflict_writes_nothing(self, db):
+        """Test con una versión esperada antigua responde 409 sin guardar la nota"""
+        user_id = _user(db)
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(update_note(
+                data=NoteUpdate(user_id=str(user_id), module_id="1", note_text="Nota"), if_match='"2"'
+            ))
+
+        assert error.value.status_code == 409
+        assert db.notes.docs == []
+        assert _version(db) == 3
+
+    def test_put_failed_write_releases_version(self, db, monkeypatch):
+        """Test si la nota no se puede guardar la versión reservada se devuelve"""
+        user_id = _user(db)
+
+        async def failing(*args, **kwargs):
+            raise PyMongoError("sin conexión")
+
+        monkeypatch.setattr(progress, "save_note", failing)
+        with pytest.raises(PyMongoError):
+            asyncio.run(update_note(
+                data=NoteUpdate(user_id=str(user_id), module_id="1", note_text="Nota"), if_match='"3"'
+            ))
+
+        assert _version(db) == 3
+
+    def test_patch_after_reservation_succeeds(self, db, monkeypatch):
+        """Test PATCH con escritor intercalado: parche guardado y versión reservada en la respuesta"""
+        user_id = _user(db)
+        asyncio.run(save_note(db, user_id, "1", "Hola"))
+        _interleaved(monkeypatch, db, "write_patch")
+
+        result = asyncio.run(patch_module_note(
+            data=NotePatch(
+                user_id=str(user_id), module_id="1", base_hash=text_hash("Hola"),
+                ops=[{"start": 4, "end": 4, "text": " mundo"}]
+            ),
+            if_match='"3"'
+        ))
+
+        assert result["version"] == 4
+        assert result["hash"] == text_hash("Hola mundo")
+        assert asyncio.run(get_note(db, user_id, "1")) == "Hola mundo"
+
+    def test_patch_note_conflict_releases_version(self, db, monkeypatch):
+        """Test si la nota cambia entre la lectura y la escritura responde 409 sin avanzar la versión"""
+        user_id = _user(db)
+        asyncio.run(save_note(db, user_id, "1", "Hola"))
+        original = progress.write_patch
+
+        async def concurrent_edit(db_, user_id_, module_id, *args):
+            await save_note(db_, user_id_, module_id, "Editada en otra pestaña")
+            return await original(db_, user_id_, module_id, *args)
+
+        monkeypatch.setattr(progress, "write_patch", concurrent_edit)
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(patch_module_note(
+                data=NotePatch(
+                    user_id=str(user_id), module_id="1", base_hash=text_hash("Hola"),
+                    ops=[{"start": 4, "end": 4, "text": " mundo"}]
+                ),
+                if_match='"3"'
+            ))
+
+        assert error.value.status_code == 409
+        assert asyncio.run(get_note(db, user_id, "1")) == "Editada en otra pestaña"
+        assert _version(db) == 3
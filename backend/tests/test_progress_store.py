@@ -0,0 +1,62 @@
+"""
+Tests unitarios para services/progress_store.py
+"""
+import pytest
+
+import services.progress_store as store
+from services.progress_store import (
+    encode_modules, encode_subtasks, decode_modules, decode_subtasks, count_completed, module_update, to_api,
+    bump_version, version_filter, replace_fields
+)
+
+
+class TestProgressStore:
+    """Tests del formato bitset y la capa de traducción"""
+
+    def test_roundtrip(self):
+        """Test diccionario -> bits -> diccionario (los false no se guardan)"""
+        modules = {"1": True, "2": False, "63": True, "100": True}
+        subtasks = {"1-0": True, "1-4": True, "12-70": True, "3-1": False}
+        progress = {"module_bits": encode_modules(modules), "subtask_bits": encode_subtasks(subtasks)}
+
+        assert decode_modules(progress) == {"1": True, "63": True, "100": True}
+        assert decode_subtasks(progress) == {"1-0": True, "1-4": True, "12-70": True}
+        assert set(progress["subtask_bits"]) == {"1", "12_1"}
+
+    def test_count_with_mixed_formats(self):
+        """Test popcount y prioridad de las claves del diccionario"""
+        progress = {
+            "module_bits": encode_modules({"1": True, "2": True}),
+            "modules": {"2": False, "3": True},
+            "subtask_bits": encode_subtasks({"1-0": True, "1-1": True}),
+            "subtasks": {"1-1": True},
+        }
+        assert count_completed(progress) == (2, 2)
+        assert to_api(progress)["modules"] == {"1": True, "2": False, "3": True}
+
+    def test_bitset_update_operators(self, monkeypatch):
+        """Test $bit or/and y $unset de la clave antigua"""
+        monkeypatch.setattr(store, "PROGRESS_STORAGE_FORMAT", "bitset")
+        assert module_update("3", True) == {
+            "$bit": {"progress.module_bits.0": {"or": 8}},
+            "$unset": {"progress.modules.3": ""},
+        }
+        assert module_update("3", False)["$bit"]["progress.module_bits.0"] == {"and": ~8}
+
+        monkeypatch.setattr(store, "PROGRESS_STORAGE_FORMAT", "dict")
+        assert module_update("3", True) == {"$set": {"progress.modules.3": True}}
+
+    def test_version_operators(self):
+        """Test incremento de versión junto a otros $inc y condición sobre la versión esperada"""
+        assert bump_version({"$inc": {"progress.xp": 5}}) == {"$inc": {"progress.xp": 5, "progress.version": 1}}
+        assert version_filter(None) == {}
+        assert version_filter(3) == {"progress.version": 3}
+        # Documentos sin versión cuentan como versión 0
+        assert version_filter(0) == {"progress.version": {"$in": [0, None]}}
+
+    def test_bitset_rejects_invalid_positions(self, monkeypatch):
+        """Test IDs no numéricos o negativos no se codifican como palabras del bitset"""
+        monkeypatch.setattr(store, "PROGRESS_STORAGE_FORMAT", "bitset")
+        for modules, subtasks in (({"abc": True}, None), ({"-1": True}, None), (None, {"1-x": True}), (None, {"1--1": True})):
+            with pytest.raises(ValueError):
+                replace_fields(modules, subtasks)
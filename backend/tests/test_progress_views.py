@@ -0,0 +1,61 @@
+"""
+Tests unitarios para services/progress_views.py
+"""
+from datetime import datetime
+
+from services.catalog import CourseCatalog
+from services.progress_views import build_dashboard_view, build_roadmap_view, rank_for, view_etag
+
+
+def _catalog():
+    data = {"modules": [
+        {"id": 1, "phase": "Core", "title": "Uno", "xp": 500, "schedule": [{"topic": "a"}, {"topic": "b"}]},
+        {"id": 2, "phase": "Core", "title": "Dos", "xp": 300, "schedule": [{"topic": "c"}]},
+        {"id": 3, "phase": "Technical", "title": "Tres", "xp": 700, "schedule": [{"topic": "d"}]},
+    ]}
+    return CourseCatalog(data, version="v1", source="test")
+
+
+PROGRESS = {
+    "modules": {"1": True},
+    "subtasks": {"1-0": True, "1-1": True, "2-0": True, "9-0": True},
+    "badges": ["core"],
+    "xp": 1250,
+}
+
+
+class TestProgressViews:
+    """Tests de las vistas de dashboard y roadmap"""
+
+    def test_dashboard_view(self):
+        """Test porcentajes, rango y siguiente módulo"""
+        view = build_dashboard_view(_catalog(), PROGRESS)
+        assert view["modules"] == {"completed": 1, "total": 3, "percentage": 33}
+        # Las subtareas fuera del catálogo no cuentan
+        assert view["subtasks"]["completed"] == 3
+        assert view["rank"] == "Technical QA Tester"
+        assert view["level"] == 12
+        assert view["earned_xp"] == 500
+        assert view["next_module"]["id"] == 2
+        assert view["next_module"]["tasks"]["percentage"] == 100
+
+    def test_roadmap_states(self):
+        """Test estados completed/active/locked como en roadmap-ui-enhanced.js"""
+        view = build_roadmap_view(_catalog(), PROGRESS)
+        assert [m["state"] for m in view["modules"]] == ["completed", "active", "locked"]
+        assert view["modules"][0]["subtasks"] == [True, True]
+        assert view["phases"][0] == {"name": "Core", "badge": "core", "completed": 1, "total": 2, "percentage": 50}
+
+    def test_rank_and_etag(self):
+        """Test rango mínimo y ETag ligado a last_sync"""
+        assert rank_for(0) == "Junior Talent"
+        first = view_etag("dashboard", {"_id": "u1", "progress": {"last_sync": datetime(2026, 1, 1)}}, _catalog())
+        second = view_etag("dashboard", {"_id": "u1", "progress": {"last_sync": datetime(2026, 1, 2)}}, _catalog())
+        assert first != second
+
+    def test_etag_changes_with_version(self):
+        """Test dos escrituras en el mismo milisegundo (mismo last_sync) cambian el ETag"""
+        same_ms = datetime(2026, 1, 1, 12, 0, 0, 123000)
+        first = view_etag("roadmap", {"_id": "u1", "progress": {"last_sync": same_ms, "version": 4}}, _catalog())
+        second = view_etag("roadmap", {"_id": "u1", "progress": {"last_sync": same_ms, "version": 5}}, _catalog())
+        assert first != second
@@ -0,0 +1,80 @@
+"""
+Tests unitarios para routes/ws.py
+"""
+import asyncio
+import inspect
+import json
+
+import pytest
+
+import routes.ws as ws
+
+# Datos mínimos válidos de cada operación
+OP_DATA = {
+    "module": {"module_id": "1", "is_completed": True},
+    "subtask": {"module_id": "1", "task_index": 0, "is_completed": True},
+    "note": {"module_id": "1", "note_text": "Nota"},
+    "note_patch": {"module_id": "1", "base_hash": "0" * 32, "ops": [{"start": 0, "end": 0, "text": "a"}]},
+    "badge": {"badge_name": "first_steps"},
+    "xp": {"amount": 5},
+    "sync": {"xp": 10},
+    "replay": {"ops": [{"type": "xp", "amount": 5, "ts": "2024-01-01T00:00:00"}]},
+}
+
+
+def _stub(endpoint, calls):
+    # Misma firma que el endpoint real: los argumentos de más o de menos fallan como en él
+    signature = inspect.signature(endpoint)
+
+    async def stub(*args, **kwargs):
+        signature.bind(*args, **kwargs)
+        calls.append(kwargs)
+        return {"success": True, "version": 1}
+
+    stub.__signature__ = signature
+    return stub
+
+
+def _handle(op, **message):
+    raw = json.dumps({"id": 1, "op": op, "data": OP_DATA[op], **message})
+    return asyncio.run(ws._handle_message("u1", "c1", raw))
+
+
+class TestHandleMessage:
+    """Tests de ejecución de operaciones recibidas por el canal"""
+
+    @pytest.mark.parametrize("op", sorted(ws.OPERATIONS))
+    def test_every_operation(self, op, monkeypatch):
+        """Test cada operación llega a su endpoint solo con los argumentos que acepta"""
+        assert op in OP_DATA
+        endpoint, model = ws.OPERATIONS[op]
+        calls = []
+        monkeypatch.setitem(ws.OPERATIONS, op, (_stub(endpoint, calls), model))
+
+        result = _handle(op, if_match='"3"', idempotency_key="k1")
+
+        assert result == {"type": "result", "id": 1, "ok": True, "result": {"success": True, "version": 1}}
+        assert calls[0]["data"].user_id == "u1"
+        assert ("if_match" in calls[0]) == (op in ws.VERSIONED_OPERATIONS)
+        assert ("idempotency_key" in calls[0]) == (op in ws.IDEMPOTENT_OPERATIONS)
+
+    def test_replay_without_if_match(self):
+        """Test replay no recibe If-Match"""
+        assert "replay" not in ws.VERSIONED_OPERATIONS
+        assert "module" in ws.VERSIONED_OPERATIONS
+
+    def test_unexpected_error_is_500_result(self, monkeypatch):
+        """Test un error inesperado se responde como resultado 500 sin cerrar el canal"""
+        async def failing(data, if_match=None):
+            raise RuntimeError("boom")
+
+        monkeypatch.setitem(ws.OPERATIONS, "xp", (failing, ws.OPERATIONS["xp"][1]))
+        result = _handle("xp")
+        assert result["ok"] is False and result["status"] == 500
+
+    def test_invalid_messages(self):
+        """Test mensajes que no son JSON, operaciones desconocidas y datos inválidos"""
+        assert asyncio.run(ws._handle_message("u1", "c1", "no json"))["status"] == 400
+        assert asyncio.run(ws._handle_message("u1", "c1", '{"op": "nope"}'))["status"] == 400
+        result = asyncio.run(ws._handle_message("u1", "c1", '{"id": 2, "op": "xp", "data": {"amount": 0}}'))
+        assert result["status"] == 422 and result["id"] == 2
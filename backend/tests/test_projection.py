@@ -0,0 +1,37 @@
+"""
+Tests unitarios para utils/projection.py
+"""
+import pytest
+
+from routes.user import PROFILE_FIELDS
+from utils.projection import InvalidFieldsError, parse_fields, mongo_projection, trim
+
+
+class TestFieldSelection:
+    """Tests de ?fields=: validación, proyección y recorte"""
+
+    def test_parse_fields(self):
+        """Test lista separada por comas, sin duplicados ni campos fuera de la lista blanca"""
+        assert parse_fields(None, PROFILE_FIELDS) is None
+        assert parse_fields(" display_name, progress.xp,display_name ", PROFILE_FIELDS) == [
+            "display_name", "progress.xp"
+        ]
+        with pytest.raises(InvalidFieldsError):
+            parse_fields("display_name,password", PROFILE_FIELDS)
+        with pytest.raises(InvalidFieldsError):
+            parse_fields(",", PROFILE_FIELDS)
+
+    def test_projection_without_path_collisions(self):
+        """Test campos de bits incluidos y rutas hijas absorbidas por el padre"""
+        assert mongo_projection(["progress.modules", "settings", "settings.theme"], PROFILE_FIELDS) == {
+            "progress.module_bits": 1,
+            "progress.modules": 1,
+            "settings": 1,
+        }
+
+    def test_trim(self):
+        """Test recorte por rutas con puntos"""
+        user = {"id": "1", "email": "a@b.co", "progress": {"xp": 5, "badges": []}, "settings": {"theme": "dark"}}
+        assert trim(user, ["progress.xp", "settings"], keep=["id"]) == {
+            "id": "1", "progress": {"xp": 5}, "settings": {"theme": "dark"}
+        }
@@ -0,0 +1,93 @@
+"""
+Tests unitarios para middleware/request_context.py
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
+
+import middleware.request_context as request_context
+from middleware.request_context import RequestContextMiddleware, _parse_sample_rates
+from services.logging_config import request_id_var
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No existe")
+        return {"request_id": request_id_var.get()}
+
+    return TestClient(app)
+
+
+def _access_logs(caplog):
+    return [record for record in caplog.records if record.name == "qa_master_path.access"]
+
+
+class TestRequestId:
+    """Tests de propagación de X-Request-ID"""
+
+    def test_incoming_id_is_propagated(self):
+        """Test el id recibido se usa en el contexto y se devuelve en la respuesta"""
+        response = _client().get("/items/1", headers={"X-Request-ID": "abc-123"})
+        assert response.headers["x-request-id"] == "abc-123"
+        assert response.json() == {"request_id": "abc-123"}
+
+    def test_missing_id_is_generated(self):
+        """Test sin cabecera se genera un id nuevo por request"""
+        client = _client()
+        first = client.get("/items/1")
+        second = client.get("/items/1")
+        assert len(first.headers["x-request-id"]) == 32
+        assert first.json() == {"request_id": first.headers["x-request-id"]}
+        assert first.headers["x-request-id"] != second.headers["x-request-id"]
+
+    def test_long_id_is_truncated(self):
+        """Test un id de cliente demasiado largo se recorta a 128 caracteres"""
+        response = _client().get("/items/1", headers={"X-Request-ID": "x" * 300})
+        assert response.headers["x-request-id"] == "x" * 128
+
+
+class TestAccessLogSampling:
+    """Tests del muestreo de LOG_SAMPLE_RATES"""
+
+    def test_parse_sample_rates(self):
+        """Test parseo de la variable con límites entre 0 y 1"""
+        assert _parse_sample_rates("/a=0.05, /b=2,/c=-1,invalido") == {"/a": 0.05, "/b": 1.0, "/c": 0.0}
+
+    def test_sampled_route_uses_template(self, monkeypatch, caplog):
+        """Test la tasa se busca por plantilla de ruta y descarta los requests exitosos"""
+        monkeypatch.setattr(request_context, "LOG_SAMPLE_RATES", {"/items/{item_id}": 0.0})
+        caplog.set_level(logging.INFO, logger="qa_master_path.access")
+
+        _client().get("/items/1")
+        assert _access_logs(caplog) == []
+
+    @pytest.mark.parametrize("draw, logged", [(0.2, True), (0.8, False)])
+    def test_partial_rate(self, monkeypatch, caplog, draw, logged):
+        """Test con tasa 0.5 se registra según el valor aleatorio"""
+        monkeypatch.setattr(request_context, "LOG_SAMPLE_RATES", {"/items/{item_id}": 0.5})
+        monkeypatch.setattr(request_context.random, "random", lambda: draw)
+        caplog.set_level(logging.INFO, logger="qa_master_path.access")
+
+        _client().get("/items/1", headers={"X-Request-ID": "abc-123"})
+        records = _access_logs(caplog)
+        assert len(records) == int(logged)
+        if logged:
+            assert records[0].route == "/items/{item_id}"
+            assert records[0].status == 200
+            assert records[0].sample_rate == 0.5
+
+    def test_errors_always_logged(self, monkeypatch, caplog):
+        """Test los errores se registran aunque la ruta tenga tasa 0"""
+        monkeypatch.setattr(request_context, "LOG_SAMPLE_RATES", {"/items/{item_id}": 0.0})
+        caplog.set_level(logging.INFO, logger="qa_master_path.access")
+
+        _client().get("/items/missing")
+        records = _access_logs(caplog)
+        assert [record.status for record in records] == [404]
@@ -0,0 +1,74 @@
+"""
+Tests unitarios para services/search_index.py y utils/text.py
+"""
+from services.search_index import SearchIndex, IndexedDocument, split_markdown_sections
+from utils.text import fold, tokenize, highlight
+
+
+def _doc(key, title, text, source="test"):
+    return IndexedDocument(key, source, "doc", title, key, None, text)
+
+
+class TestTextUtils:
+    """Tests de normalización y tokenización"""
+
+    def test_fold_removes_accents(self):
+        """Test minúsculas sin acentos"""
+        assert fold("Gestión de DEFECTOS ñ") == "gestion de defectos n"
+
+    def test_tokenize_offsets_and_stopwords(self):
+        """Test offsets sobre el texto original y palabras vacías"""
+        text = "La gestión de defectos"
+        tokens = tokenize(text)
+        assert [t[0] for t in tokens] == ["gestion", "defectos"]
+        term, start, end = tokens[0]
+        assert text[start:end] == "gestión"
+
+    def test_highlight_escapes_html(self):
+        """Test fragmento resaltado y escapado"""
+        text = "<b>SQL</b> joins"
+        snippet = highlight(text, [(3, 6)], 0, len(text))
+        assert snippet == "&lt;b&gt;<mark>SQL</mark>&lt;/b&gt; joins"
+
+
+class TestSearchIndex:
+    """Tests del índice invertido"""
+
+    def test_accent_insensitive_search(self):
+        """Test la consulta sin acentos encuentra texto acentuado"""
+        index = SearchIndex()
+        index.replace_source("test", [_doc("a", "Gestión", "Reporte de defectos con severidad")])
+        found = index.search("gestion")
+        assert found["total"] == 1
+        assert "<mark>Gestión</mark>" in found["results"][0]["snippet"]
+
+    def test_bm25_ranks_more_relevant_first(self):
+        """Test el documento con más coincidencias gana"""
+        index = SearchIndex()
+        index.replace_source("test", [
+            _doc("a", "Uno", "playwright una vez y mucho texto adicional sin relación"),
+            _doc("b", "Dos", "playwright playwright scripts con playwright"),
+        ])
+        results = index.search("playwright")["results"]
+        assert [r["id"] for r in results] == ["b", "a"]
+
+    def test_replace_source_is_incremental(self):
+        """Test reemplazar una fuente no afecta a las demás"""
+        index = SearchIndex()
+        index.replace_source("s1", [_doc("a", "Alpha", "scrum")], version=1)
+        index.replace_source("s2", [_doc("b", "Beta", "kanban")], version=1)
+        index.replace_source("s1", [_doc("c", "Gamma", "sprint")], version=2)
+
+        assert index.search("scrum")["total"] == 0
+        assert index.search("kanban")["total"] == 1
+        assert index.search("sprint")["total"] == 1
+        assert "scrum" not in index.postings
+        assert index.source_version("s1") == 2
+
+    def test_split_markdown_sections(self):
+        """Test división por encabezados con anclas del frontend"""
+        source = "# Título\nIntro\n## Fases del SDLC\nPlanificación\n"
+        sections = split_markdown_sections("sdlc", "SDLC", source)
+        anchors = [s.anchor for s in sections]
+        assert "fases-del-sdlc" in anchors
+        assert sections[-1].title == "SDLC › Fases del SDLC"
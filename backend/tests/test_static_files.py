@@ -0,0 +1,43 @@
+"""
+Tests unitarios para utils/static_files.py
+"""
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.static_files import PrecompressedStaticFiles, accepted_encodings
+
+
+def _client(tmp_path):
+    (tmp_path / "app.0123456789.js").write_text("console.log('x');" * 100)
+    (tmp_path / "app.0123456789.js.gz").write_bytes(gzip.compress(b"console.log('x');" * 100))
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=tmp_path))
+    return TestClient(app)
+
+
+class TestPrecompressedStaticFiles:
+    """Tests del servidor de estáticos precomprimidos"""
+
+    def test_accepted_encodings(self):
+        """Test parseo de Accept-Encoding con q=0"""
+        assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+        assert accepted_encodings(None) == set()
+
+    def test_serves_gzip_variant(self, tmp_path):
+        """Test variante .gz con el tipo del archivo original y caché inmutable"""
+        response = _client(tmp_path).get("/static/app.0123456789.js", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+        assert "immutable" in response.headers["cache-control"]
+        assert response.text == "console.log('x');" * 100
+
+    def test_range_uses_identity(self, tmp_path):
+        """Test los rangos se sirven sin comprimir"""
+        response = _client(tmp_path).get(
+            "/static/app.0123456789.js", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-6"}
+        )
+        assert response.status_code == 206
+        assert "content-encoding" not in response.headers
+        assert response.content == b"console"
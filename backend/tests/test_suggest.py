@@ -0,0 +1,39 @@
+"""
+Tests unitarios para services/suggest.py
+"""
+from services.suggest import SuggestTrie, SuggestEntry
+
+
+def _trie(*items):
+    return SuggestTrie([SuggestEntry(text, kind, str(i), weight) for i, (text, kind, weight) in enumerate(items)])
+
+
+class TestSuggestTrie:
+    """Tests del trie de autocompletado"""
+
+    def test_prefix_ordered_by_weight(self):
+        """Test las completions salen ordenadas por peso"""
+        trie = _trie(("Postman & API Testing", "module", 100), ("Pruebas Exploratorias", "topic", 50),
+                     ("Page Object Model", "module", 100))
+        assert [e.text for e in trie.suggest("p")] == [
+            "Postman & API Testing", "Page Object Model", "Pruebas Exploratorias"
+        ]
+
+    def test_prefix_ending_mid_edge(self):
+        """Test prefijo que termina dentro de una arista comprimida"""
+        trie = _trie(("Playwright: First Scripts", "module", 100))
+        assert [e.text for e in trie.suggest("playw")] == ["Playwright: First Scripts"]
+        assert trie.suggest("plx") == []
+
+    def test_accent_insensitive_and_inner_words(self):
+        """Test sin acentos y coincidencia por palabra interior"""
+        trie = _trie(("Gestión de Defectos", "doc", 80), ("Defectos críticos", "topic", 50))
+        assert [e.text for e in trie.suggest("gestion")] == ["Gestión de Defectos"]
+        # El inicio de frase (50) gana a la palabra interior (80 * 0.6)
+        assert [e.text for e in trie.suggest("defec")] == ["Defectos críticos", "Gestión de Defectos"]
+
+    def test_limit_and_empty(self):
+        """Test límite y prefijo vacío"""
+        trie = _trie(*[(f"Tema {i}", "topic", i) for i in range(20)])
+        assert len(trie.suggest("tema", limit=3)) == 3
+        assert trie.suggest("   ") == []
@@ -0,0 +1,44 @@
+"""
+Tests unitarios para utils/text_patch.py
+"""
+import pytest
+
+from utils.text_patch import PatchError, apply_patch, text_hash, utf16_length
+
+
+class TestTextPatch:
+    """Tests de los parches por rango usados en el autoguardado de notas"""
+
+    def test_apply_patch(self):
+        """Test inserción, borrado y reemplazo en una sola pasada"""
+        base = "Hola mundo con Selenium"
+        ops = [(0, 0, "¡"), (4, 4, "!"), (5, 11, ""), (15, 23, "Playwright")]
+        assert apply_patch(base, ops) == "¡Hola! con Playwright"
+        assert apply_patch(base, []) == base
+
+    def test_utf16_offsets(self):
+        """Test posiciones en unidades UTF-16, como las calcula el cliente en JavaScript"""
+        base = "😀 Hola"
+        assert utf16_length(base) == 7
+        # "Hola" empieza en 3 para JavaScript (el emoji ocupa 2 unidades)
+        assert apply_patch(base, [(3, 7, "Adiós 🚀")]) == "😀 Adiós 🚀"
+        assert apply_patch(base, [(7, 7, "!")]) == "😀 Hola!"
+
+    def test_split_surrogate_pair(self):
+        """Test un rango no puede partir un emoji en dos"""
+        with pytest.raises(PatchError):
+            apply_patch("😀 Hola", [(1, 1, "x")])
+        with pytest.raises(PatchError):
+            apply_patch("😀 Hola", [(0, 1, "")])
+
+    def test_invalid_ranges(self):
+        """Test rangos fuera del texto, invertidos o solapados"""
+        for ops in ([(0, 30, "")], [(5, 2, "")], [(0, 5, ""), (3, 6, "")]):
+            with pytest.raises(PatchError):
+                apply_patch("Hola mundo", ops)
+
+    def test_hash_changes_with_text(self):
+        """Test revisión estable y distinta para textos distintos"""
+        assert text_hash("nota") == text_hash("nota")
+        assert text_hash("nota") != text_hash("nota ")
+        assert len(text_hash("")) == 32
@@ -0,0 +1,99 @@
+"""
+Tests unitarios para middleware/tracing.py
+"""
+import pytest
+from fastapi import FastAPI, HTTPException, status
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind, StatusCode
+
+from middleware.tracing import TracingMiddleware
+from services import tracing
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_SPAN_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_provider", provider)
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/api/users/{user_id}/progress")
+    async def read_progress(user_id: str):
+        if user_id == "boom":
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Sin base de datos")
+        return {"user_id": user_id}
+
+    return TestClient(app)
+
+
+class TestTracingMiddleware:
+    """Tests del span de servidor por request"""
+
+    def test_traceparent_is_extracted(self, exporter):
+        """Test el span continúa la traza del traceparent entrante"""
+        response = _client().get(
+            "/api/users/u1/progress",
+            headers={"traceparent": f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"}
+        )
+        assert response.status_code == 200
+
+        [span] = exporter.get_finished_spans()
+        assert format(span.context.trace_id, "032x") == TRACE_ID
+        assert format(span.parent.span_id, "016x") == PARENT_SPAN_ID
+        assert span.parent.is_remote
+        assert span.kind == SpanKind.SERVER
+
+    def test_without_traceparent_starts_new_trace(self, exporter):
+        """Test sin cabecera el span es la raíz de una traza nueva"""
+        _client().get("/api/users/u1/progress")
+
+        [span] = exporter.get_finished_spans()
+        assert span.parent is None
+        assert format(span.context.trace_id, "032x") != TRACE_ID
+
+    def test_invalid_traceparent_is_ignored(self, exporter):
+        """Test un traceparent mal formado no se usa como padre"""
+        _client().get("/api/users/u1/progress", headers={"traceparent": "00-invalido-01"})
+
+        [span] = exporter.get_finished_spans()
+        assert span.parent is None
+
+    def test_route_template_and_attributes(self, exporter):
+        """Test el nombre usa la plantilla de ruta y se anotan status y usuario"""
+        _client().get("/api/users/u1/progress")
+
+        [span] = exporter.get_finished_spans()
+        assert span.name == "GET /api/users/{user_id}/progress"
+        assert span.attributes["http.route"] == "/api/users/{user_id}/progress"
+        assert span.attributes["http.target"] == "/api/users/u1/progress"
+        assert span.attributes["http.status_code"] == 200
+        assert span.attributes["enduser.id"] == "u1"
+
+    def test_server_error_marks_span(self, exporter):
+        """Test un 5xx deja el span en estado de error"""
+        _client().get("/api/users/boom/progress")
+
+        [span] = exporter.get_finished_spans()
+        assert span.attributes["http.status_code"] == 503
+        assert span.status.status_code == StatusCode.ERROR
+
+    def test_disabled_creates_no_spans(self, exporter, monkeypatch):
+        """Test sin proveedor configurado el middleware no crea spans"""
+        monkeypatch.setattr(tracing, "_provider", None)
+        response = _client().get("/api/users/u1/progress")
+
+        assert response.status_code == 200
+        assert exporter.get_finished_spans() == ()
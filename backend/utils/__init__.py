@@ -6,21 +6,45 @@ from .validators import (
     validate_display_name,
     validate_url,
     validate_module_id,
+    validate_subtask_index,
     validate_badge_name,
     validate_xp_amount,
     validate_theme,
     validate_language,
     sanitize_text
 )
+from .metrics import Histogram
+from .text import fold, tokenize, strip_markdown, highlight
+from .static_files import PrecompressedStaticFiles
+from .projection import InvalidFieldsError, parse_fields, mongo_projection, trim
+from .json_response import FastJSONResponse, encode_default, register_bson_encoders
+from .msgpack_route import MsgPackRoute, MsgPackResponse, wants_msgpack
 
 __all__ = [
     'validate_email_format',
     'validate_display_name',
     'validate_url',
     'validate_module_id',
+    'validate_subtask_index',
     'validate_badge_name',
     'validate_xp_amount',
     'validate_theme',
     'validate_language',
-    'sanitize_text'
+    'sanitize_text',
+    'Histogram',
+    'fold',
+    'tokenize',
+    'strip_markdown',
+    'highlight',
+    'PrecompressedStaticFiles',
+    'InvalidFieldsError',
+    'parse_fields',
+    'mongo_projection',
+    'trim',
+    'FastJSONResponse',
+    'encode_default',
+    'register_bson_encoders',
+    'MsgPackRoute',
+    'MsgPackResponse',
+    'wants_msgpack'
 ]
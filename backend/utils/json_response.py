@@ -0,0 +1,87 @@
+"""
+Serialización JSON rápida
+Clase de respuesta por defecto de la app: orjson (si está instalado) con codificación
+nativa de datetime, ObjectId y bytes, para que las rutas puedan devolver documentos de
+MongoDB tal cual, sin convertir a mano cada campo
+
+Formato: datetime/date en ISO 8601 (igual que isoformat()), ObjectId y Decimal128 como
+cadena, bytes (y Binary) en base64, set como lista.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any
+
+from bson import Binary, Decimal128, ObjectId
+from fastapi.encoders import ENCODERS_BY_TYPE
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la librería estándar
+    orjson = None
+
+
+def encode_default(obj: Any) -> Any:
+    """
+    Tipos de MongoDB y de Python que JSON no soporta directamente
+
+    Returns:
+        Valor serializable
+    """
+    if isinstance(obj, (ObjectId, Decimal128)):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(obj)).decode("ascii")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializar a JSON (UTF-8, sin espacios)
+
+    Returns:
+        bytes: documento JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serializada con orjson y con soporte de tipos BSON
+
+    Conserva el contenido original en content para que otra clase de respuesta
+    (msgpack) lo serialice sin volver a parsear el JSON.
+    """
+
+    def render(self, content: Any) -> bytes:
+        self.content = content
+        return dumps(content)
+
+
+def register_bson_encoders():
+    """
+    Registrar los tipos BSON en jsonable_encoder de FastAPI
+
+    Las rutas que devuelven un dict (y las respuestas guardadas por Idempotency-Key o
+    enviadas por WebSocket) pasan antes por jsonable_encoder, que no conoce ObjectId ni
+    Decimal128 y decodifica los bytes como UTF-8 (PyMongo lee el binario de subtipo 0
+    como bytes). ENCODERS_BY_TYPE es global: cambia jsonable_encoder en todo el proceso,
+    por eso se hace una sola vez y de forma explícita al crear la app (server.py).
+    """
+    ENCODERS_BY_TYPE[ObjectId] = str
+    ENCODERS_BY_TYPE[Decimal128] = str
+    ENCODERS_BY_TYPE[bytes] = encode_default
+    ENCODERS_BY_TYPE[Binary] = encode_default
@@ -0,0 +1,62 @@
+"""
+Métricas en memoria
+Histogramas simples para exponer latencias sin dependencias externas
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+
+# Límites en segundos (estilo Prometheus)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """
+    Histograma acumulativo con buckets fijos
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        Registrar una observación
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> Dict:
+        """
+        Obtener el estado actual del histograma
+
+        Returns:
+            dict: buckets acumulados (le -> count), count, sum y max
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = running + counts[-1]
+
+        return {
+            "buckets": cumulative,
+            "count": count,
+            "sum": round(total, 6),
+            "max": round(maximum, 6),
+        }
@@ -0,0 +1,134 @@
+"""
+Negociación de contenido MessagePack
+Clase de ruta para los routers de la API: acepta cuerpos application/msgpack y responde
+en msgpack si el cliente lo prefiere en Accept. JSON sigue siendo el formato por defecto.
+
+Los errores (HTTPException, validación) se siguen respondiendo en JSON.
+"""
+import json
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from utils.json_response import FastJSONResponse, encode_default
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+_JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    El cliente prefiere msgpack (calidad mayor o igual que la de JSON en Accept)
+    """
+    if msgpack is None or not accept:
+        return False
+
+    best_msgpack = best_json = 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            best_msgpack = max(best_msgpack, quality)
+        elif media_type in _JSON_MEDIA_TYPES:
+            best_json = max(best_json, quality)
+
+    return best_msgpack > 0 and best_msgpack >= best_json
+
+
+class MsgPackResponse(Response):
+    """
+    Respuesta application/msgpack (mismo contenido que la respuesta JSON)
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True, default=encode_default)
+
+
+class _DecodedRequest(Request):
+    # Petición con el cuerpo msgpack ya decodificado: FastAPI la valida como si fuera JSON
+    def __init__(self, request: Request, body: bytes, payload: Any):
+        scope = dict(request.scope)
+        scope["headers"] = [
+            (name, value) for name, value in request.scope["headers"] if name != b"content-type"
+        ] + [(b"content-type", b"application/json")]
+        super().__init__(scope, request.receive)
+        self._body = body
+        self._json = payload
+
+
+def _repack(response: JSONResponse) -> Response:
+    # Respuestas JSON construidas por el endpoint (lecturas directas, repeticiones por Idempotency-Key)
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    }
+    content = response.content if isinstance(response, FastJSONResponse) else json.loads(response.body)
+    return MsgPackResponse(content, status_code=response.status_code, headers=headers)
+
+
+class MsgPackRoute(APIRoute):
+    """
+    Ruta con negociación JSON / MessagePack en la petición y en la respuesta
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = super().get_route_handler()
+        msgpack_handler = None
+        if msgpack is not None:
+            # Mismo handler de FastAPI con otra clase de respuesta
+            response_class = self.response_class
+            self.response_class = MsgPackResponse
+            try:
+                msgpack_handler = super().get_route_handler()
+            finally:
+                self.response_class = response_class
+
+        async def route_handler(request: Request) -> Response:
+            if _media_type(request.headers.get("content-type", "")) in MSGPACK_MEDIA_TYPES:
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="MessagePack no está disponible en el servidor"
+                    )
+                body = await request.body()
+                try:
+                    payload = msgpack.unpackb(body, timestamp=3) if body else None
+                except Exception:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Cuerpo MessagePack inválido"
+                    )
+                request = _DecodedRequest(request, body, payload)
+
+            if msgpack_handler is not None and wants_msgpack(request.headers.get("accept")):
+                response = await msgpack_handler(request)
+                if isinstance(response, JSONResponse):
+                    response = _repack(response)
+            else:
+                response = await json_handler(request)
+
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return route_handler
@@ -0,0 +1,82 @@
+"""
+Selección de campos (?fields=)
+Traduce una lista de campos de la respuesta a una proyección de MongoDB validada
+contra una lista blanca, y recorta la respuesta a esos campos
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Campo de la respuesta -> campos de MongoDB necesarios para construirlo
+FieldMap = Dict[str, Tuple[str, ...]]
+
+
+class InvalidFieldsError(ValueError):
+    """Campo no permitido en ?fields="""
+
+
+def prefixed(field_map: FieldMap, prefix: str) -> FieldMap:
+    """
+    Mismo mapa con un prefijo en ambos lados ("xp" -> "progress.xp")
+    """
+    return {
+        f"{prefix}.{field}": tuple(f"{prefix}.{path}" for path in paths)
+        for field, paths in field_map.items()
+    }
+
+
+def parse_fields(fields: Optional[str], allowed: FieldMap) -> Optional[List[str]]:
+    """
+    Validar el parámetro fields (lista separada por comas)
+
+    Returns:
+        list: campos pedidos, sin duplicados; None si no se pidió selección
+
+    Raises:
+        InvalidFieldsError: si algún campo no está en la lista blanca
+    """
+    if fields is None:
+        return None
+
+    selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    invalid = [field for field in selected if field not in allowed]
+    if invalid or not selected:
+        raise InvalidFieldsError(
+            f"Campos no permitidos: {', '.join(invalid) or '(vacío)'}. "
+            f"Permitidos: {', '.join(sorted(allowed))}"
+        )
+    return selected
+
+
+def _collapse(paths: Iterable[str]) -> List[str]:
+    # MongoDB rechaza proyectar a la vez "a" y "a.b" (path collision)
+    paths = set(paths)
+    return sorted(
+        path for path in paths
+        if not any(path.startswith(f"{other}.") for other in paths)
+    )
+
+
+def mongo_projection(selected: List[str], allowed: FieldMap, extra: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Proyección de inclusión para los campos seleccionados (más los extra)
+    """
+    paths = [path for field in selected for path in allowed[field]]
+    return {path: 1 for path in _collapse([*paths, *extra])}
+
+
+def trim(data: Dict, selected: List[str], keep: Iterable[str] = ()) -> Dict:
+    """
+    Copia de data con solo los campos seleccionados (rutas con puntos) y los de keep
+    """
+    trimmed: Dict = {}
+    for path in _collapse([*selected, *keep]):
+        parts = path.split(".")
+        source, target = data, trimmed
+        for part in parts[:-1]:
+            if not isinstance(source.get(part), dict):
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return trimmed
@@ -0,0 +1,131 @@
+"""
+Archivos estáticos precomprimidos
+StaticFiles que sirve las variantes .br/.gz generadas por scripts/build_assets.py
+según Accept-Encoding, con ETags fuertes y caché larga para los archivos con fingerprint
+"""
+import json
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Preferencia cuando el cliente acepta varias codificaciones
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# nombre.<hash de 10 hex>.css|js (generado por el build)
+_FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{10}\.(?:css|js)$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """
+    Codificaciones aceptadas (q > 0) en un header Accept-Encoding
+    """
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse que delega el envío al servidor cuando soporta la extensión
+    ASGI http.response.pathsend (sendfile); si no, lee por bloques como siempre
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if (
+            "http.response.pathsend" in extensions
+            and scope["method"].upper() != "HEAD"
+            and self.stat_result is not None
+            and "range" not in Headers(scope=scope)
+        ):
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+            if self.background is not None:
+                await self.background()
+            return
+        await super().__call__(scope, receive, send)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles con variantes precomprimidas, ETag por contenido y Cache-Control
+
+    Args:
+        manifest_file: asset-manifest.json del build (ETags por archivo); opcional
+    """
+
+    def __init__(self, *args, manifest_file: Optional[Path] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.etags: Dict[str, str] = {}
+
+        if manifest_file is not None and Path(manifest_file).exists():
+            files = json.loads(Path(manifest_file).read_text(encoding="utf-8")).get("files", {})
+            base = Path(manifest_file).resolve().parent
+            for relative, digest in files.items():
+                self.etags[str((base / relative).resolve())] = digest
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        headers = {
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE_CACHE if _FINGERPRINT_RE.search(path) else REVALIDATE_CACHE,
+        }
+
+        served_path, served_stat, encoding = path, stat_result, None
+        # Los rangos se sirven siempre sobre la representación sin comprimir
+        if "range" not in request_headers:
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for name, suffix in ENCODINGS:
+                if name not in accepted:
+                    continue
+                try:
+                    variant_stat = os.stat(path + suffix)
+                except OSError:
+                    continue
+                served_path, served_stat, encoding = path + suffix, variant_stat, name
+                headers["Content-Encoding"] = name
+                break
+
+        digest = self.etags.get(str(Path(path).resolve()))
+        if digest is not None:
+            # ETag fuerte: hash del contenido, distinto por cada codificación
+            headers["ETag"] = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+        response = ZeroCopyFileResponse(
+            served_path,
+            status_code=status_code,
+            headers=headers,
+            # El tipo es el del archivo original, no el de la variante .gz/.br
+            media_type=guess_type(path)[0] or "text/plain",
+            stat_result=served_stat,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,96 @@
+"""
+Utilidades de texto para búsqueda
+Normalización sin acentos, tokenización con offsets y limpieza de markdown
+"""
+import html
+import re
+import unicodedata
+from typing import Iterable, List, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Palabras vacías del español (y algunas del inglés frecuentes en el contenido)
+STOPWORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante
+e el ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos fue
+ha hay la las le les lo los mas me mi mis muy no nos o os para pero por que se sea ser si
+sin sobre su sus tambien te tu tus un una unas uno unos y ya
+and the of to in for on with is are
+""".split())
+
+_MARKDOWN_NOISE = [
+    (re.compile(r"```.*?```", re.DOTALL), " "),        # bloques de código
+    (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),    # imágenes -> texto alternativo
+    (re.compile(r"\[([^\]]*)\]\([^)]*\)"), r"\1"),     # enlaces -> texto
+    (re.compile(r"<[^>]+>"), " "),                     # HTML embebido
+    (re.compile(r"^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s+", re.MULTILINE), ""),
+    (re.compile(r"[*_`~|]+"), ""),
+    (re.compile(r"^\s*-{3,}\s*$", re.MULTILINE), ""),
+]
+
+
+def fold(text: str) -> str:
+    """
+    Minúsculas y sin acentos ("Gestión" -> "gestion")
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Tokenizar conservando la posición de cada palabra en el texto original
+
+    Returns:
+        list: (término normalizado, inicio, fin) sin palabras vacías
+    """
+    tokens = []
+    for match in _WORD_RE.finditer(text):
+        term = fold(match.group())
+        if term in STOPWORDS or (len(term) < 2 and not term.isdigit()):
+            continue
+        tokens.append((term, match.start(), match.end()))
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Términos únicos de una consulta, en orden de aparición
+    """
+    seen = []
+    for term, _, _ in tokenize(query):
+        if term not in seen:
+            seen.append(term)
+    return seen
+
+
+def strip_markdown(source: str) -> str:
+    """
+    Texto plano aproximado a partir de markdown
+    """
+    text = source
+    for pattern, replacement in _MARKDOWN_NOISE:
+        text = pattern.sub(replacement, text)
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+
+def highlight(text: str, spans: Iterable[Tuple[int, int]], start: int, end: int) -> str:
+    """
+    Fragmento HTML de text[start:end] con <mark> en los offsets indicados
+
+    El texto fuera de las marcas se escapa.
+    """
+    parts = []
+    cursor = start
+    for span_start, span_end in sorted(spans):
+        if span_start < cursor or span_end > end:
+            continue
+        parts.append(html.escape(text[cursor:span_start]))
+        parts.append(f"<mark>{html.escape(text[span_start:span_end])}</mark>")
+        cursor = span_end
+    parts.append(html.escape(text[cursor:end]))
+
+    snippet = "".join(parts).replace("\n", " ")
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(text) else ""
+    return f"{prefix}{snippet.strip()}{suffix}"
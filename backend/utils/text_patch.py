@@ -0,0 +1,71 @@
+"""
+Parches de texto
+Revisión (hash) de un texto y aplicación de ediciones por rangos contra esa revisión
+
+Las posiciones de los rangos son unidades de código UTF-16, como los índices de las
+cadenas de JavaScript: un emoji (fuera del BMP) cuenta 2.
+"""
+import hashlib
+from typing import Iterable, List, Tuple
+
+# (inicio, fin, texto): reemplaza texto[inicio:fin] por el texto nuevo
+Splice = Tuple[int, int, str]
+
+
+class PatchError(ValueError):
+    """Operaciones de parche inválidas para el texto base"""
+
+
+def text_hash(text: str) -> str:
+    """
+    Revisión de un texto (sha256 del UTF-8, 32 caracteres hex)
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def utf16_length(text: str) -> int:
+    """
+    Longitud en unidades UTF-16 (la de String.length en JavaScript)
+    """
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _splits_pair(encoded: bytes, position: int) -> bool:
+    # La posición cae entre las dos mitades de un par sustituto
+    if position <= 0 or position * 2 >= len(encoded):
+        return False
+    unit = int.from_bytes(encoded[position * 2:position * 2 + 2], "little")
+    return 0xDC00 <= unit <= 0xDFFF
+
+
+def apply_patch(base: str, ops: Iterable[Splice]) -> str:
+    """
+    Aplicar reemplazos por rango sobre el texto base
+
+    Las posiciones son unidades UTF-16 del texto base; los rangos deben venir
+    ordenados y sin solaparse.
+
+    Returns:
+        str: texto resultante
+
+    Raises:
+        PatchError: si algún rango está fuera del texto, desordenado, solapado
+            o parte un carácter en dos
+    """
+    encoded = base.encode("utf-16-le")
+    length = len(encoded) // 2
+    parts: List[bytes] = []
+    cursor = 0
+    for start, end, text in ops:
+        if start < cursor or end < start or end > length:
+            raise PatchError(f"Rango inválido [{start}, {end}) para un texto de {length} unidades UTF-16")
+        if _splits_pair(encoded, start) or _splits_pair(encoded, end):
+            raise PatchError(f"El rango [{start}, {end}) parte un carácter en dos")
+        parts.append(encoded[cursor * 2:start * 2])
+        parts.append(text.encode("utf-16-le", "surrogatepass"))
+        cursor = end
+    parts.append(encoded[cursor * 2:])
+    try:
+        return b"".join(parts).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise PatchError("El texto insertado contiene pares sustitutos incompletos")
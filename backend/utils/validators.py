@@ -6,6 +6,8 @@ import re
 from typing import Optional
 from email_validator import validate_email, EmailNotValidError
 
+from services.catalog import get_catalog
+
 
 def validate_email_format(email: str) -> tuple[bool, Optional[str]]:
     """
@@ -81,6 +83,13 @@ def validate_module_id(module_id: str) -> tuple[bool, Optional[str]]:
     if not module_id.isdigit():
         return False, "El ID del módulo debe ser numérico"
     
+    # Con el catálogo cargado solo son válidos los módulos reales del curso
+    catalog = get_catalog()
+    if catalog is not None:
+        if catalog.get(module_id) is None:
+            return False, f"El módulo {module_id} no existe en el curso"
+        return True, None
+    
     module_num = int(module_id)
     if module_num < 1 or module_num > 100:
         return False, "El ID del módulo debe estar entre 1 y 100"
@@ -88,6 +97,23 @@ def validate_module_id(module_id: str) -> tuple[bool, Optional[str]]:
     return True, None
 
 
+def validate_subtask_index(module_id: str, task_index: int) -> tuple[bool, Optional[str]]:
+    """
+    Validar índice de subtarea contra el schedule del módulo
+    
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    catalog = get_catalog()
+    if catalog is None:
+        return True, None
+    
+    if not catalog.has_subtask(module_id, task_index):
+        return False, f"El módulo {module_id} no tiene la subtarea {task_index}"
+    
+    return True, None
+
+
 def validate_badge_name(badge: str) -> tuple[bool, Optional[str]]:
     """
     Validar nombre de badge